@@ -0,0 +1,260 @@
+"""
+The SQL the app runs against the asset databases, mirrored from
+lib/services/database_service.dart, with parameter sampling so the build
+and benchmark scripts can replay it.
+
+Each entry of APP_QUERIES:
+- name: the DatabaseService method (plus the table, where one method reads several)
+- db: 'quran' (assets/db/Quran.db) or 'tafseer' (assets/db/quran_tafsir.db)
+- sql: the statement as sqflite sends it; {ids} expands to one ? per id
+- params: 'none', 'sura', 'ayah' (sura, aya), 'juz', 'sura_keys' / 'juz_keys'
+  (an ayah_reading id range), 'tafseer_id', 'tafseer_ids', 'fts_match' or
+  'like_pattern' (a keyword search)
+- scan: True where reading the whole table is by design (the surah list,
+  the LIKE fallback), so bench_app_queries.py does not flag it
+
+sample_params() draws parameters uniformly, or with realistic=True weighted
+the way the app is used: popular surahs and juz more often, and keyword
+searches for terms in proportion to how many entries contain them.
+
+Keep this in step with database_service.dart when a query changes.
+"""
+
+import random
+import re
+import sqlite3
+import time
+from collections import Counter
+
+from build_fts_index import fts_query
+
+VERSE_TABLES = [
+    'al_quran_indopak_quran',
+    'al_quran_utsmani_quran',
+    'terjemahan_quran',
+    'jalalayn_quran',
+    'latin_quran',
+    'latin_english_quran',
+]
+
+# getAyahsForSurah preference -> source table; anything else falls through
+# to the last choice, as in the app
+ARABIC_SCRIPTS = {'indopak': 'al_quran_indopak_quran', 'utsmani': 'al_quran_utsmani_quran'}
+TRANSLATIONS = {'sahih': 'terjemahan_quran', 'jalalayn': 'jalalayn_quran'}
+PRONUNCIATIONS = {'latin': 'latin_quran', 'latin_english': 'latin_english_quran', None: None}
+
+# _getJuzBoundaries(): (start surah, start ayah, end surah, end ayah)
+JUZ_BOUNDARIES = [
+    (1, 1, 2, 141), (2, 142, 2, 252), (2, 253, 3, 92), (3, 93, 4, 23), (4, 24, 4, 147),
+    (4, 148, 5, 81), (5, 82, 6, 110), (6, 111, 7, 87), (7, 88, 8, 40), (8, 41, 9, 92),
+    (9, 93, 11, 5), (11, 6, 12, 52), (12, 53, 14, 52), (15, 1, 16, 128), (17, 1, 18, 74),
+    (18, 75, 20, 135), (21, 1, 22, 78), (23, 1, 25, 20), (25, 21, 27, 55), (27, 56, 29, 45),
+    (29, 46, 33, 30), (33, 31, 36, 27), (36, 28, 39, 31), (39, 32, 41, 46), (41, 47, 45, 37),
+    (46, 1, 51, 30), (51, 31, 57, 29), (58, 1, 66, 12), (67, 1, 77, 50), (78, 1, 114, 6),
+]
+
+
+def reading_key(sura, aya):
+    """ayah_reading id of an ayah (build_reading_table.py)."""
+    return sura * 1000 + aya
+
+
+def reading_sql(arabic_script='indopak', translation='sahih', pronunciation='latin_english'):
+    """_getAyahsFromReadingTable: one id range read of ayah_reading for a set of preferences."""
+    arabic = 'indopak' if arabic_script == 'indopak' else 'utsmani'
+    translated = 'sahih' if translation == 'sahih' else 'jalalayn'
+    columns = f"sura, aya, {arabic} AS text, {translated} AS translation"
+    if pronunciation in ('latin', 'latin_english'):
+        columns += f", {pronunciation} AS pronunciation"
+    return f"SELECT {columns} FROM ayah_reading WHERE id BETWEEN ? AND ? ORDER BY id"
+
+
+# Surah name and ayah count for the surahs an ayah_reading id range covers
+READING_HEADER_SQL = "SELECT sura, name, ayahs FROM surah_reading WHERE sura BETWEEN ? / 1000 AND ? / 1000"
+
+WORD_BY_WORD_COLUMNS = """
+        w.word,
+        COALESCE(c.ar1,'') || COALESCE(c.ar2,'') || COALESCE(c.ar3,'') || COALESCE(c.ar4,'') || COALESCE(c.ar5,'') as arabic,
+        w.en as translation,
+        w.en_trans as transliteration"""
+
+APP_QUERIES = [
+    {'name': 'getAllSurahs', 'db': 'quran', 'params': 'none', 'scan': True,
+     'sql': "SELECT * FROM sura_search_sura_search ORDER BY no ASC"},
+    {'name': 'searchSurahs', 'db': 'quran', 'params': 'none', 'scan': True,
+     'sql': "SELECT * FROM sura_search_sura_search ORDER BY no ASC"},
+    {'name': 'getSurahByNumber', 'db': 'quran', 'params': 'sura',
+     'sql': "SELECT * FROM sura_search_sura_search WHERE no = ?"},
+    {'name': '_getAyahCountForSurah', 'db': 'quran', 'params': 'sura',
+     'sql': "SELECT COUNT(*) as count FROM al_quran_indopak_quran WHERE sura = ?"},
+    *[{'name': f'getAyahsForSurah:{table}', 'db': 'quran', 'params': 'sura',
+       'sql': f"SELECT * FROM {table} WHERE sura = ? ORDER BY aya ASC"} for table in VERSE_TABLES],
+    {'name': 'getAyahsForSurah:ayah_reading', 'db': 'quran', 'params': 'sura_keys',
+     'sql': reading_sql()},
+    {'name': 'getAyahsForJuz:ayah_reading', 'db': 'quran', 'params': 'juz_keys',
+     'sql': reading_sql()},
+    {'name': '_getAyahsFromReadingTable:surah_reading', 'db': 'quran', 'params': 'sura_keys',
+     'sql': READING_HEADER_SQL},
+    {'name': 'getWordByWordForAyah', 'db': 'quran', 'params': 'ayah',
+     'sql': f"""
+      SELECT {WORD_BY_WORD_COLUMNS}
+      FROM allwords w
+      JOIN corpus c
+        ON w.sura = c.surah
+        AND w.ayah = c.ayah
+        AND w.word = c.word
+      WHERE w.sura = ? AND w.ayah = ?
+      ORDER BY w.word ASC"""},
+    {'name': 'getWordByWordForSurah', 'db': 'quran', 'params': 'sura',
+     'sql': f"""
+      SELECT
+        w.ayah, {WORD_BY_WORD_COLUMNS}
+      FROM allwords w
+      JOIN corpus c
+        ON w.sura = c.surah
+        AND w.ayah = c.ayah
+        AND w.word = c.word
+      WHERE w.sura = ?
+      ORDER BY w.ayah ASC, w.word ASC"""},
+    {'name': 'getChapterInfo', 'db': 'quran', 'params': 'sura',
+     'sql': "SELECT * FROM chapter_information WHERE chapter_no = ?"},
+    {'name': 'getJuzInfo', 'db': 'quran', 'params': 'juz',
+     'sql': "SELECT * FROM juz_information WHERE juz_no = ?"},
+    {'name': 'getTafseer', 'db': 'tafseer', 'params': 'ayah',
+     'sql': "SELECT text FROM tafseer WHERE surah = ? AND ayah = ?"},
+    {'name': 'getTafseersForSurah', 'db': 'tafseer', 'params': 'sura',
+     'sql': "SELECT ayah, text FROM tafseer WHERE surah = ?"},
+    {'name': 'getTafseerByIds', 'db': 'tafseer', 'params': 'tafseer_ids',
+     'sql': "SELECT id, surah, ayah, verse_key, text FROM tafseer WHERE id IN ({ids})"},
+    {'name': 'getRelatedTafseer', 'db': 'tafseer', 'params': 'tafseer_id',
+     'sql': """
+        SELECT t.id, t.surah, t.ayah, t.verse_key, t.text, r.score
+        FROM tafseer_related r
+        JOIN tafseer t ON t.id = r.related_id
+        WHERE r.id = ?
+        ORDER BY r.rank
+        LIMIT 10"""},
+    {'name': 'searchTafseerKeywords:fts', 'db': 'tafseer', 'params': 'fts_match',
+     'sql': """
+          SELECT t.id, t.surah, t.ayah, t.verse_key, t.text
+          FROM tafseer_fts f
+          JOIN tafseer t ON t.id = f.rowid
+          WHERE tafseer_fts MATCH ?
+          ORDER BY f.rank
+          LIMIT 50"""},
+    {'name': 'searchTafseerKeywords:like', 'db': 'tafseer', 'params': 'like_pattern', 'scan': True,
+     'sql': "SELECT id, surah, ayah, verse_key, text FROM tafseer WHERE text LIKE ? LIMIT 50"},
+]
+
+# Semantic search hydrates this many hits at once
+TAFSEER_IDS_PER_CALL = 20
+
+# Relative weights for realistic sampling; everything else weighs 1.
+# Al-Fatiha, Al-Baqarah, Al-Kahf, Ya-Sin, Ar-Rahman, Al-Waqi'ah, Al-Mulk
+# and the last three surahs are opened far more often than the rest.
+POPULAR_SURAS = {1: 20, 2: 10, 18: 10, 36: 10, 55: 8, 56: 8, 67: 10, 112: 8, 113: 6, 114: 6}
+POPULAR_JUZ = {30: 5, 1: 3}
+# Share of keyword searches with two terms rather than one
+TWO_TERM_SEARCHES = 0.2
+
+
+def _rows(conn, sql):
+    try:
+        return conn.execute(sql).fetchall()
+    except (sqlite3.OperationalError, sqlite3.DatabaseError):
+        return []
+
+
+def _column(conn, sql):
+    return [row[0] for row in _rows(conn, sql)]
+
+
+def keyword_terms(tafseer, sample_rows=2000):
+    """(terms, entries containing each) from the tafseer_fts vocabulary, or counted from a sample of rows."""
+    try:
+        tafseer.execute("CREATE VIRTUAL TABLE IF NOT EXISTS temp.app_queries_vocab "
+                        "USING fts5vocab(main, 'tafseer_fts', 'row')")
+        rows = tafseer.execute("SELECT term, doc FROM temp.app_queries_vocab WHERE length(term) > 3").fetchall()
+        tafseer.execute("DROP TABLE temp.app_queries_vocab")
+        if rows:
+            return [term for term, _ in rows], [doc for _, doc in rows]
+    except sqlite3.OperationalError:
+        pass
+    counts = Counter()
+    for text in _column(tafseer, f"SELECT text FROM tafseer LIMIT {int(sample_rows)}"):
+        counts.update(set(re.findall(r'[^\W\d_]{4,}', re.sub(r'<[^>]+>', ' ', text or '').lower())))
+    return list(counts), list(counts.values())
+
+
+def sample_params(conns, count=50, seed=0, realistic=False):
+    """{params kind: [param tuples]} drawn from the data in conns ({'quran': ..., 'tafseer': ...})."""
+    rng = random.Random(seed)
+    quran = conns.get('quran')
+    tafseer = conns.get('tafseer')
+
+    ayahs = []
+    if quran is not None:
+        ayahs = [tuple(row) for row in _rows(quran, "SELECT sura, aya FROM al_quran_indopak_quran")]
+    if not ayahs and tafseer is not None:
+        ayahs = [tuple(row) for row in _rows(tafseer, "SELECT surah, ayah FROM tafseer")]
+    by_sura = {}
+    for sura, aya in ayahs:
+        by_sura.setdefault(sura, []).append(aya)
+    suras = sorted(by_sura)
+    tafseer_ids = _column(tafseer, "SELECT id FROM tafseer") if tafseer is not None else []
+
+    def pick(values, k, weights=None):
+        if not values:
+            return []
+        if realistic and weights:
+            return rng.choices(values, [weights.get(v, 1) for v in values], k=k)
+        return [rng.choice(values) for _ in range(k)]
+
+    keywords = []
+    if tafseer is not None:
+        terms, docs = keyword_terms(tafseer)
+        if terms:
+            for _ in range(count):
+                words = 2 if rng.random() < TWO_TERM_SEARCHES else 1
+                picked = rng.choices(terms, docs, k=words) if realistic else rng.sample(terms, min(words, len(terms)))
+                keywords.append(' '.join(picked))
+    juz = list(range(1, len(JUZ_BOUNDARIES) + 1))
+
+    return {
+        'none': [()],
+        'sura': [(s,) for s in pick(suras, count, POPULAR_SURAS)],
+        'ayah': [(s, rng.choice(by_sura[s])) for s in pick(suras, count, POPULAR_SURAS)]
+        if realistic else pick(ayahs, count),
+        'juz': [(j,) for j in pick(juz, count, POPULAR_JUZ)],
+        'sura_keys': [(reading_key(s, 0), reading_key(s, 999)) for s in pick(suras, count, POPULAR_SURAS)],
+        'juz_keys': [(reading_key(*JUZ_BOUNDARIES[j - 1][:2]), reading_key(*JUZ_BOUNDARIES[j - 1][2:]))
+                     for j in pick(juz, count, POPULAR_JUZ)],
+        'tafseer_id': [(i,) for i in pick(tafseer_ids, count)],
+        'tafseer_ids': [tuple(rng.sample(tafseer_ids, min(TAFSEER_IDS_PER_CALL, len(tafseer_ids))))
+                        for _ in range(count)] if tafseer_ids else [],
+        'fts_match': [(fts_query(k),) for k in keywords if fts_query(k)],
+        'like_pattern': [(f'%{k}%',) for k in keywords],
+    }
+
+
+def bind(query, params):
+    """(sql, params) ready to execute, with {ids} expanded."""
+    sql = query['sql']
+    if '{ids}' in sql:
+        sql = sql.replace('{ids}', ','.join('?' * len(params)))
+    return sql, params
+
+
+def time_query(conn, query, param_sets, repeats=1):
+    """Latencies in ms for every parameter set, or None if the query cannot run on conn."""
+    samples = []
+    try:
+        for _ in range(repeats):
+            for params in param_sets:
+                sql, args = bind(query, params)
+                start = time.perf_counter()
+                conn.execute(sql, args).fetchall()
+                samples.append((time.perf_counter() - start) * 1000)
+    except sqlite3.OperationalError:
+        return None
+    return samples
@@ -0,0 +1,178 @@
+"""
+Arabic normalization and waqf-aware word splitting for the Quran text tables.
+
+Every profile is compiled once into a str.translate table and a matching
+code point lookup array, so normalizing a verse (or a whole batch of
+verses joined together) is one vectorized pass instead of one regex
+substitution per mark class. Tables only delete characters or map one
+character to one character, which keeps offsets into the original text
+recoverable (ArabicNormalizer.offsets).
+
+Profiles:
+- none:   no changes (tokenize still splits on waqf marks)
+- legacy: tashkeel U+0617-U+061A, U+064B-U+0652 only, as the old check
+          scripts stripped it
+- plain:  all harakat, Quranic annotation marks (waqf, small high/low
+          letters, Uthmani sukun) and tatweel
+- search: plain, plus folding of alef, hamza, yeh and teh marbuta variants
+
+Waqf marks act as word separators in tokenize(), whether they are written
+as their own "word" or attached to the end of one.
+
+Usage:
+    from arabic_text import ArabicNormalizer
+    normalizer = ArabicNormalizer('search')
+    normalizer.normalize(text); normalizer.tokenize(text)
+    for sura, aya, words in normalizer.iter_table(conn, 'al_quran_indopak_quran', tokenize=True): ...
+"""
+
+import numpy as np
+
+ARABIC_TABLES = ['al_quran_indopak_quran', 'al_quran_utsmani_quran']
+
+
+def _chars(*ranges):
+    return ''.join(chr(cp) for start, end in ranges for cp in range(start, end + 1))
+
+
+LEGACY_TASHKEEL = _chars((0x0617, 0x061A), (0x064B, 0x0652))
+HARAKAT = _chars((0x0610, 0x061A), (0x064B, 0x065F), (0x0670, 0x0670), (0x08F0, 0x08F2))
+WAQF_MARKS = _chars((0x06D6, 0x06DC))
+QURANIC_SIGNS = _chars((0x06DD, 0x06DE), (0x06E9, 0x06E9))
+QURANIC_MARKS = _chars((0x06DF, 0x06E8), (0x06EA, 0x06ED), (0x08D3, 0x08E1))
+TATWEEL = 'ـ'
+
+ALEF_VARIANTS = {ch: 'ا' for ch in 'آأإٱٲٳ'}
+HAMZA_VARIANTS = {'ؤ': 'و', 'ئ': 'ي'}
+YEH_VARIANTS = {'ى': 'ي', 'ی': 'ي'}
+TEH_MARBUTA = {'ة': 'ه'}
+
+PROFILES = {
+    'none': {'strip': '', 'fold': {}},
+    'legacy': {'strip': LEGACY_TASHKEEL, 'fold': {}},
+    'plain': {
+        'strip': HARAKAT + WAQF_MARKS + QURANIC_SIGNS + QURANIC_MARKS + TATWEEL,
+        'fold': {},
+    },
+    'search': {
+        'strip': HARAKAT + WAQF_MARKS + QURANIC_SIGNS + QURANIC_MARKS + TATWEEL,
+        'fold': {**ALEF_VARIANTS, **HAMZA_VARIANTS, **YEH_VARIANTS, **TEH_MARBUTA},
+    },
+}
+
+DEFAULT_SEPARATORS = WAQF_MARKS + QURANIC_SIGNS
+
+# Code point the lookup tables use for "delete"; a Unicode noncharacter
+_DELETE = 0xFFFF
+# Joins a batch into one string so it is mapped in one pass. The profiles
+# never map anything to or from it.
+_BATCH_SEP = '\x00'
+
+
+def _lookup_table(table):
+    """Compile a str.translate table over the BMP into a uint32 code point array."""
+    lut = np.arange(0x10000, dtype=np.uint32)
+    for cp, value in table.items():
+        lut[cp] = _DELETE if value is None else ord(value)
+    return lut
+
+
+class ArabicNormalizer:
+    """Precompiled normalize/tokenize for one profile.
+
+    strip, fold and separators override the profile's character sets.
+    table and split_table are ordinary str.translate tables. They are
+    applied through numpy lookup arrays instead, because str.translate does
+    a dict lookup per character on non-ASCII strings and is slower than
+    the regexes it replaces.
+    """
+
+    def __init__(self, profile='plain', strip=None, fold=None, separators=None):
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown profile {profile!r}, expected one of {sorted(PROFILES)}")
+        self.profile = profile
+        strip = PROFILES[profile]['strip'] if strip is None else strip
+        fold = PROFILES[profile]['fold'] if fold is None else fold
+        separators = DEFAULT_SEPARATORS if separators is None else separators
+        if any(len(v) != 1 for v in fold.values()):
+            raise ValueError("fold must map single characters to single characters")
+        if any(ord(ch) >= 0x10000 for ch in (strip + separators + ''.join(fold) + ''.join(fold.values()))):
+            raise ValueError("only characters in the Basic Multilingual Plane can be mapped")
+
+        self.table = str.maketrans({**dict.fromkeys(strip), **fold})
+        self.split_table = str.maketrans({**dict.fromkeys(strip), **fold,
+                                          **dict.fromkeys(separators, ' ')})
+        self._lut = _lookup_table(self.table)
+        self._split_lut = _lookup_table(self.split_table)
+
+    def _map(self, text, lut):
+        """Apply a lookup array; returns (mapped code points, kept mask)."""
+        codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+        if codes.size and codes.max() >= 0x10000:
+            mapped = np.where(codes < 0x10000, lut[codes & 0xFFFF], codes)
+        else:
+            mapped = lut[codes]
+        keep = mapped != _DELETE
+        return mapped[keep], keep
+
+    def _apply(self, text, lut):
+        return self._map(text, lut)[0].tobytes().decode('utf-32-le')
+
+    def normalize(self, text):
+        return self._apply(text, self._lut)
+
+    def tokenize(self, text):
+        """Normalized words; waqf marks split words like spaces do."""
+        return self._apply(text, self._split_lut).split()
+
+    def offsets(self, text):
+        """Index in text of each character normalize(text) keeps."""
+        return np.flatnonzero(self._map(text, self._lut)[1]).tolist()
+
+    def _apply_batch(self, texts, lut):
+        texts = [text or '' for text in texts]
+        if not texts:
+            return []
+        joined = _BATCH_SEP.join(texts)
+        if joined.count(_BATCH_SEP) != len(texts) - 1:
+            return [self._apply(text, lut) for text in texts]
+        return self._apply(joined, lut).split(_BATCH_SEP)
+
+    def normalize_batch(self, texts):
+        """normalize() over a list of texts in one pass."""
+        return self._apply_batch(texts, self._lut)
+
+    def tokenize_batch(self, texts):
+        """tokenize() over a list of texts in one pass."""
+        return [row.split() for row in self._apply_batch(texts, self._split_lut)]
+
+    def iter_table(self, conn, table, key_columns=('sura', 'aya'), text_column='text',
+                   tokenize=False, batch_size=1000):
+        """Stream a table, yielding (*keys, normalized text or word list) per row."""
+        columns = ', '.join(f'"{c}"' for c in (*key_columns, text_column))
+        cursor = conn.execute(f'SELECT {columns} FROM "{table}"')
+        convert = self.tokenize_batch if tokenize else self.normalize_batch
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row, value in zip(rows, convert([row[-1] for row in rows])):
+                yield (*row[:-1], value)
+
+
+_normalizers = {}
+
+
+def get_normalizer(profile='plain'):
+    """Shared ArabicNormalizer per profile."""
+    if profile not in _normalizers:
+        _normalizers[profile] = ArabicNormalizer(profile)
+    return _normalizers[profile]
+
+
+def normalize_arabic(text, profile='plain'):
+    return get_normalizer(profile).normalize(text)
+
+
+def tokenize_arabic(text, profile='plain'):
+    return get_normalizer(profile).tokenize(text)
@@ -0,0 +1,241 @@
+"""
+Single-pass text audit for Quran.db (replaces the check_merge*,
+check_brackets* and check_verse scripts).
+
+Every table with sura, aya and text columns is streamed once through a
+cursor. All rules that apply to the table are compiled into one
+Aho-Corasick automaton per normalization profile (arabic_text.py), so each
+batch of rows is normalized in one pass and every row is scanned once
+however many patterns there are. Matches are mapped back to
+the original text, with the code points of the matched span (to tell a
+missing space from a zero-width character), and written to one report.
+
+Rules (DEFAULT_RULES, or --rules rules.json with the same fields):
+- name, severity ('error' | 'warning' | 'info'), description
+- tables: fnmatch patterns of the tables the rule applies to
+- normalize: an arabic_text.py profile ('none', 'legacy', 'plain', 'search')
+- patterns: literal strings, normalized with the same profile as the text
+
+Usage:
+    python audit_text.py [--db assets/db/Quran.db] [--report build/audit_report.json]
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+from collections import deque
+from fnmatch import fnmatch
+
+from arabic_text import ARABIC_TABLES, PROFILES, get_normalizer
+
+DEFAULT_RULES = [
+    {
+        'name': 'merged_muminun_kull',
+        'severity': 'error',
+        'description': "'المؤمنون/المؤمنين' run into 'كل' with no space (2:285)",
+        'tables': ARABIC_TABLES,
+        'normalize': 'search',
+        'patterns': ['المؤمنونكل', 'المؤمنينكل'],
+    },
+    {
+        'name': 'possible_nun_kaf_merge',
+        'severity': 'warning',
+        'description': "word ending in -un/-in followed directly by 'كل'",
+        'tables': ARABIC_TABLES,
+        'normalize': 'search',
+        'patterns': ['مونكل', 'مينكل', 'نونكل'],
+    },
+    {
+        'name': 'square_brackets',
+        'severity': 'info',
+        'description': "'[' in transliteration text",
+        'tables': ['latin_english_quran', 'latin_quran'],
+        'normalize': 'none',
+        'patterns': ['['],
+    },
+]
+
+
+class AhoCorasick:
+    """Multi-pattern matcher compiled to a DFA over the patterns' alphabet."""
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        goto = [{}]
+        outputs = [[]]
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for ch in pattern:
+                if ch not in goto[state]:
+                    goto.append({})
+                    outputs.append([])
+                    goto[state][ch] = len(goto) - 1
+                state = goto[state][ch]
+            outputs[state].append(index)
+
+        # Breadth-first: fail links, merged outputs and the full transition table
+        fail = [0] * len(goto)
+        self.delta = [dict(goto[0])] + [None] * (len(goto) - 1)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            self.delta[state] = dict(self.delta[fail[state]])
+            self.delta[state].update(goto[state])
+            for ch, child in goto[state].items():
+                fail[child] = self.delta[fail[state]].get(ch, 0)
+                outputs[child] = outputs[child] + outputs[fail[child]]
+                queue.append(child)
+        self.outputs = [tuple(out) for out in outputs]
+
+    def finditer(self, text):
+        """Yield (start, pattern index) for every occurrence, overlaps included."""
+        delta = self.delta
+        outputs = self.outputs
+        patterns = self.patterns
+        state = 0
+        for i, ch in enumerate(text):
+            state = delta[state].get(ch, 0)
+            if outputs[state]:
+                for index in outputs[state]:
+                    yield i - len(patterns[index]) + 1, index
+
+
+def text_tables(conn):
+    """Tables with sura, aya and text columns."""
+    tables = []
+    for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name"):
+        columns = {row[1] for row in conn.execute(f'PRAGMA table_info("{name}")')}
+        if {'sura', 'aya', 'text'} <= columns:
+            tables.append(name)
+    return tables
+
+
+def compile_rules(rules, table):
+    """{profile: (automaton, [(rule, pattern)])} for the rules that apply to table."""
+    grouped = {}
+    for rule in rules:
+        if not any(fnmatch(table, pattern) for pattern in rule['tables']):
+            continue
+        profile = rule.get('normalize', 'none')
+        if profile not in PROFILES:
+            raise ValueError(f"Rule {rule['name']!r}: unknown normalize profile {profile!r}")
+        entries = grouped.setdefault(profile, [])
+        entries.extend((rule, pattern) for pattern in rule['patterns'])
+    return {
+        profile: (AhoCorasick([get_normalizer(profile).normalize(p) for _, p in entries]), entries)
+        for profile, entries in grouped.items()
+    }
+
+
+def audit_table(conn, table, compiled, context=12, batch_size=1000):
+    """Stream the table once; returns (rows scanned, matches)."""
+    matches = []
+    rows = 0
+    cursor = conn.execute(f'SELECT sura, aya, text FROM "{table}"')
+    while True:
+        batch = cursor.fetchmany(batch_size)
+        if not batch:
+            break
+        rows += len(batch)
+        texts = [text or '' for _, _, text in batch]
+        for profile, (automaton, entries) in compiled.items():
+            normalizer = get_normalizer(profile)
+            for (sura, aya, _), text, normalized in zip(batch, texts, normalizer.normalize_batch(texts)):
+                offsets = None
+                for start, index in automaton.finditer(normalized):
+                    rule, pattern = entries[index]
+                    end = start + len(automaton.patterns[index])
+                    if offsets is None:
+                        offsets = normalizer.offsets(text)
+                    start, end = offsets[start], offsets[end - 1] + 1
+                    span = text[start:end]
+                    matches.append({
+                        'rule': rule['name'],
+                        'table': table,
+                        'sura': sura,
+                        'aya': aya,
+                        'pattern': pattern,
+                        'match': span,
+                        'codepoints': [f'U+{ord(ch):04X}' for ch in span],
+                        'context': text[max(0, start - context):end + context],
+                    })
+    return rows, matches
+
+
+def run_audit(db_path='assets/db/Quran.db', rules=None, report_path='build/audit_report.json',
+              tables=None, examples=5):
+    print(f"=== Auditing {db_path} ===\n")
+    if not os.path.exists(db_path):
+        print(f"Error: Database file not found at {db_path}")
+        return None
+
+    rules = rules or DEFAULT_RULES
+    conn = sqlite3.connect(db_path)
+    start = time.perf_counter()
+    matches = []
+    scanned = {}
+    try:
+        for table in tables or text_tables(conn):
+            compiled = compile_rules(rules, table)
+            if not compiled:
+                continue
+            rows, found = audit_table(conn, table, compiled)
+            scanned[table] = rows
+            matches.extend(found)
+            patterns = sum(len(entries) for _, entries in compiled.values())
+            print(f"{table}: {rows} rows, {patterns} patterns, {len(found)} matches")
+    finally:
+        conn.close()
+    elapsed = time.perf_counter() - start
+
+    summary = []
+    for rule in rules:
+        hits = [m for m in matches if m['rule'] == rule['name']]
+        by_table = {}
+        for m in hits:
+            by_table[m['table']] = by_table.get(m['table'], 0) + 1
+        summary.append({'rule': rule['name'], 'severity': rule['severity'],
+                        'description': rule['description'], 'matches': len(hits), 'by_table': by_table})
+
+    print(f"\nScanned {sum(scanned.values())} rows in {len(scanned)} tables in {elapsed:.2f} s\n")
+    for entry in summary:
+        print(f"[{entry['severity']}] {entry['rule']}: {entry['matches']} matches - {entry['description']}")
+        for m in [m for m in matches if m['rule'] == entry['rule']][:examples]:
+            print(f"    {m['table']} {m['sura']}:{m['aya']}  {m['context']}  ({' '.join(m['codepoints'])})")
+
+    report = {
+        'db': db_path,
+        'seconds': elapsed,
+        'tables': scanned,
+        'rules': summary,
+        'matches': matches,
+    }
+    if report_path:
+        os.makedirs(os.path.dirname(report_path) or '.', exist_ok=True)
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nReport written to {report_path}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Audit Quran.db text tables in one pass")
+    parser.add_argument('--db', default='assets/db/Quran.db')
+    parser.add_argument('--rules', help="JSON list of rules (default: DEFAULT_RULES)")
+    parser.add_argument('--tables', help="comma-separated tables (default: every sura/aya/text table)")
+    parser.add_argument('--report', default='build/audit_report.json')
+    parser.add_argument('--examples', type=int, default=5, help="matches to print per rule")
+    args = parser.parse_args()
+
+    rules = None
+    if args.rules:
+        with open(args.rules, encoding='utf-8') as f:
+            rules = json.load(f)
+    tables = args.tables.split(',') if args.tables else None
+    run_audit(args.db, rules, args.report, tables, args.examples)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+"""
+Replay the app's SQL (app_queries.py) against the asset databases and check
+it against a stored baseline.
+
+Every query shape DatabaseService runs is executed with parameters sampled
+the way the app is used (app_queries.sample_params realistic=True: popular
+surahs and juz weighted up, keyword searches weighted by term frequency).
+Per query it records:
+- p50/p99 latency over --samples parameter sets x --repeats runs
+- rows returned and VM steps per call; Python's sqlite3 does not expose
+  sqlite3_stmt_status, so VM steps (counted with a progress handler) stand
+  in for rows scanned: they grow with every row a statement visits
+- the EXPLAIN QUERY PLAN
+
+It fails (exit 1) when:
+- a plan scans a whole table or index, unless the query is marked scan=True
+  in app_queries.py (the surah list, the LIKE fallback)
+- p50 latency is more than --max-regression times the baseline p50, and
+  at least --min-regression-ms slower
+
+Queries whose tables are not in the database (e.g. tafseer_fts before
+build_fts_index.py) are reported as unavailable and not checked.
+
+Usage:
+    python bench_app_queries.py --save-baseline        # record build/app_query_baseline.json
+    python bench_app_queries.py                        # compare with it
+    python bench_app_queries.py --quran-db build/db/Quran.db --tafseer-db build/db/quran_tafsir.db
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+
+from app_queries import APP_QUERIES, bind, sample_params, time_query
+from bench_utils import latency_summary
+from check_word_alignment import read_only_uri
+
+# Count every VM instruction while measuring steps
+STEP_GRANULARITY = 1
+
+
+def query_plan(conn, query, params):
+    sql, args = bind(query, params)
+    return [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", args)]
+
+
+def full_scans(plan):
+    """Plan lines that visit every row of a table or index (virtual tables excluded)."""
+    return [line for line in plan if line.startswith('SCAN ') and 'VIRTUAL TABLE' not in line]
+
+
+def count_work(conn, query, param_sets):
+    """(mean rows returned, mean VM steps) per call."""
+    steps = [0]
+
+    def step():
+        steps[0] += STEP_GRANULARITY
+        return 0
+
+    rows = 0
+    conn.set_progress_handler(step, STEP_GRANULARITY)
+    try:
+        for params in param_sets:
+            sql, args = bind(query, params)
+            rows += len(conn.execute(sql, args).fetchall())
+    finally:
+        conn.set_progress_handler(None, 0)
+    return rows / len(param_sets), steps[0] / len(param_sets)
+
+
+def replay(conns, samples, repeats, seed, realistic=True):
+    """Run every app query; returns one result dict per query."""
+    params = sample_params(conns, samples, seed, realistic)
+    results = []
+    for query in APP_QUERIES:
+        conn = conns.get(query['db'])
+        param_sets = params[query['params']]
+        result = {'name': query['name'], 'db': query['db']}
+        results.append(result)
+        if conn is None or not param_sets:
+            result['status'] = 'unavailable'
+            continue
+        samples_ms = time_query(conn, query, param_sets, repeats)
+        if samples_ms is None:
+            result['status'] = 'unavailable'
+            continue
+        plan = query_plan(conn, query, param_sets[0])
+        rows, steps = count_work(conn, query, param_sets)
+        result.update({
+            'status': 'ok',
+            'latency': latency_summary(samples_ms),
+            'rows_returned': rows,
+            'vm_steps': steps,
+            'plan': plan,
+            'full_scans': [] if query.get('scan') else full_scans(plan),
+        })
+    return results
+
+
+def compare(results, baseline, max_regression, min_regression_ms):
+    """Add 'baseline_p50_ms' and 'regressed' to each result. Returns the names that regressed."""
+    regressed = []
+    for result in results:
+        base = baseline.get(result['name'])
+        if result['status'] != 'ok' or not base:
+            continue
+        old, new = base['p50_ms'], result['latency']['p50_ms']
+        result['baseline_p50_ms'] = old
+        result['regressed'] = new > old * max_regression and new - old >= min_regression_ms
+        if result['regressed']:
+            regressed.append(result['name'])
+    return regressed
+
+
+def print_results(results):
+    print(f"\n{'query':<42} {'p50':>9} {'p99':>9} {'base p50':>9} {'rows':>7} {'VM steps':>10}  plan")
+    for result in results:
+        name = result['name'][:42]
+        if result['status'] != 'ok':
+            print(f"{name:<42} {'unavailable (table missing)':>47}")
+            continue
+        latency = result['latency']
+        base = result.get('baseline_p50_ms')
+        base = f"{base:>7.3f}ms" if base is not None else f"{'-':>9}"
+        flags = []
+        if result['full_scans']:
+            flags.append('FULL SCAN')
+        if result.get('regressed'):
+            flags.append('REGRESSED')
+        print(f"{name:<42} {latency['p50_ms']:>7.3f}ms {latency['p99_ms']:>7.3f}ms {base} "
+              f"{result['rows_returned']:>7.0f} {result['vm_steps']:>10.0f}  {' '.join(flags) or 'ok'}")
+
+    print("\nQuery plans:")
+    for result in results:
+        if result['status'] == 'ok':
+            print(f"  {result['name']}")
+            for line in result['plan']:
+                print(f"      {line}")
+
+
+def open_databases(quran_db, tafseer_db):
+    conns = {}
+    for db, path in (('quran', quran_db), ('tafseer', tafseer_db)):
+        if path and os.path.exists(path):
+            conns[db] = sqlite3.connect(read_only_uri(path), uri=True)
+        else:
+            print(f"Skipping {path}: not found")
+    return conns
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay the app's queries and check plans and latency")
+    parser.add_argument('--quran-db', default='assets/db/Quran.db')
+    parser.add_argument('--tafseer-db', default='assets/db/quran_tafsir.db')
+    parser.add_argument('--samples', type=int, default=50, help="parameter sets per query")
+    parser.add_argument('--repeats', type=int, default=3, help="runs of each parameter set")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--uniform', action='store_true', help="sample parameters uniformly instead")
+    parser.add_argument('--baseline', default='build/app_query_baseline.json')
+    parser.add_argument('--save-baseline', action='store_true', help="write this run as the baseline")
+    parser.add_argument('--max-regression', type=float, default=1.5,
+                        help="fail when p50 exceeds this multiple of the baseline p50")
+    parser.add_argument('--min-regression-ms', type=float, default=0.05,
+                        help="ignore slowdowns smaller than this (timer noise)")
+    parser.add_argument('--output', default='build/app_query_bench.json')
+    args = parser.parse_args()
+
+    print(f"=== App query replay ({args.samples} parameter sets x {args.repeats} runs, "
+          f"{'uniform' if args.uniform else 'realistic'} parameters) ===\n")
+    conns = open_databases(args.quran_db, args.tafseer_db)
+    if not conns:
+        sys.exit(1)
+    try:
+        results = replay(conns, args.samples, args.repeats, args.seed, not args.uniform)
+    finally:
+        for conn in conns.values():
+            conn.close()
+
+    baseline = {}
+    if not args.save_baseline and args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)['queries']
+    regressed = compare(results, baseline, args.max_regression, args.min_regression_ms)
+    print_results(results)
+
+    scans = [r['name'] for r in results if r.get('full_scans')]
+    for path, data in ((args.output, results),
+                       (args.baseline if args.save_baseline else None,
+                        {'quran_db': args.quran_db, 'tafseer_db': args.tafseer_db,
+                         'queries': {r['name']: r['latency'] for r in results if r['status'] == 'ok'}})):
+        if path:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            print(f"\nWritten {path}")
+
+    if not baseline and not args.save_baseline:
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to record one")
+    if scans:
+        print(f"\n❌ Full table scans: {', '.join(scans)}")
+    if regressed:
+        print(f"\n❌ Slower than baseline (> {args.max_regression}x p50): {', '.join(regressed)}")
+    if scans or regressed:
+        sys.exit(1)
+    print("\n✅ No full scans" + (" or regressions" if baseline else ""))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""
+Benchmark arabic_text.py against the regex code it replaces.
+
+Baselines are the per-verse regex versions that were copy-pasted across the
+scripts: normalize_arabic from the old check_merge scripts and
+robust_tokenize from test_arab_split.py. Each is checked for identical
+output against the equivalent ArabicNormalizer configuration before it is
+timed (in batches of 1000 for the batch APIs, as iter_table does), then the plain and search profiles are timed end to end over the
+tables with iter_table.
+
+Usage:
+    python bench_arabic_text.py [--db assets/db/Quran.db] [--repeats 5]
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import time
+
+from arabic_text import ARABIC_TABLES, ArabicNormalizer
+
+SAMPLE_VERSES = [
+    "خَتَمَ اللّٰهُ عَلٰي قُلُوْبِهِمْ وَعَلٰي سَمْعِهِمْ ؕ وَعَلٰٓي اَبْصَارِهِمْ غِشَاوَةٌ وَّلَهُمْ عَذَابٌ عَظِيْمٌ ࣖ",
+    "يٰسٓ ۚ",
+    "ذٰلِكَ الْكِتٰبُ لَا رَيْبَ ۛ فِيْهِ ۛ هُدًى لِّلْمُتَّقِيْنَ ۙ",
+    "ءَامَنَ ٱلرَّسُولُ بِمَآ أُنزِلَ إِلَيۡهِ مِن رَّبِّهِۦ وَٱلۡمُؤۡمِنُونَۚ كُلٌّ ءَامَنَ بِٱللَّهِ",
+]
+
+# The character class robust_tokenize replaced with spaces
+ROBUST_SEPARATORS = ''.join(chr(cp) for cp in [*range(0x06D6, 0x06DD), *range(0x06DF, 0x06E5), 0x06E9])
+
+
+def regex_normalize_arabic(text):
+    """normalize_arabic as it was in check_merge_v2/v3/v4."""
+    tashkeel = re.compile(r'[\u0617-\u061A\u064B-\u0652]')
+    return re.sub(tashkeel, '', text)
+
+
+def regex_robust_tokenize(text):
+    """robust_tokenize as it was in test_arab_split.py."""
+    clean_text = re.sub(r'[\u06D6-\u06DC\u06Df-\u06E4\u06E9]', ' ', text)
+    return [t for t in clean_text.split() if t.strip()]
+
+
+def load_verses(db_path):
+    if db_path and os.path.exists(db_path):
+        conn = sqlite3.connect(db_path)
+        try:
+            verses = []
+            for table in ARABIC_TABLES:
+                verses.extend(row[0] or '' for row in conn.execute(f'SELECT text FROM "{table}"'))
+            if verses:
+                return verses
+        except sqlite3.OperationalError as e:
+            print(f"Note: {e}")
+        finally:
+            conn.close()
+    print(f"Note: no Arabic tables in {db_path}, using the built-in samples")
+    return SAMPLE_VERSES * 3000
+
+
+def best_of(fn, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def compare(label, baseline, candidates, verses, repeats):
+    """Check every candidate matches the baseline, then time them all. Returns False on a mismatch."""
+    expected = [baseline(v) for v in verses]
+    ok = True
+    for name, fn, batched in candidates:
+        got = [x for i in range(0, len(verses), 1000) for x in fn(verses[i:i + 1000])] if batched \
+            else [fn(v) for v in verses]
+        bad = [i for i, (a, b) in enumerate(zip(got, expected)) if a != b]
+        if bad or len(got) != len(expected):
+            ok = False
+            print(f"  ❌ {name}: {len(bad)} verses differ, e.g. {verses[bad[0]][:60]!r}" if bad
+                  else f"  ❌ {name}: {len(got)} results for {len(expected)} verses")
+
+    print(f"\n{label}")
+    base = best_of(lambda: [baseline(v) for v in verses], repeats)
+    print(f"  {'regex (baseline)':<28} {len(verses) / base:>12.0f} verses/s")
+    for name, fn, batched in candidates:
+        if batched:
+            seconds = best_of(lambda: [x for i in range(0, len(verses), 1000)
+                                       for x in fn(verses[i:i + 1000])], repeats)
+        else:
+            seconds = best_of(lambda: [fn(v) for v in verses], repeats)
+        print(f"  {name:<28} {len(verses) / seconds:>12.0f} verses/s  {base / seconds:>6.1f}x")
+    return ok
+
+
+def bench_tables(db_path, repeats):
+    if not (db_path and os.path.exists(db_path)):
+        return
+    conn = sqlite3.connect(db_path)
+    tables = [t for t in ARABIC_TABLES
+              if conn.execute("SELECT 1 FROM sqlite_master WHERE name=?", (t,)).fetchone()]
+    if not tables:
+        conn.close()
+        return
+    print(f"\nEnd to end over {', '.join(tables)} (SQLite read included)")
+    for profile in ('plain', 'search'):
+        normalizer = ArabicNormalizer(profile)
+        for tokenize in (False, True):
+            def run():
+                for table in tables:
+                    for _ in normalizer.iter_table(conn, table, tokenize=tokenize):
+                        pass
+            rows = sum(conn.execute(f'SELECT COUNT(*) FROM "{t}"').fetchone()[0] for t in tables)
+            seconds = best_of(run, repeats)
+            what = 'tokenize' if tokenize else 'normalize'
+            print(f"  {profile + ' ' + what:<28} {rows / seconds:>12.0f} verses/s")
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark arabic_text.py against the old regex code")
+    parser.add_argument('--db', default='assets/db/Quran.db')
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    print("=== Arabic normalization benchmark ===\n")
+    verses = load_verses(args.db)
+    print(f"{len(verses)} verses, {sum(map(len, verses))} characters, best of {args.repeats}")
+
+    legacy = ArabicNormalizer('legacy')
+    robust = ArabicNormalizer('none', separators=ROBUST_SEPARATORS)
+    ok = compare("Tashkeel stripping (legacy profile)", regex_normalize_arabic, [
+        ('str.translate(table)', lambda text: text.translate(legacy.table), False),
+        ('normalize', legacy.normalize, False),
+        ('normalize_batch', legacy.normalize_batch, True),
+    ], verses, args.repeats)
+    ok &= compare("Waqf-aware splitting (robust_tokenize separators)", regex_robust_tokenize, [
+        ('str.translate(split_table)', lambda text: text.translate(robust.split_table).split(), False),
+        ('tokenize', robust.tokenize, False),
+        ('tokenize_batch', robust.tokenize_batch, True),
+    ], verses, args.repeats)
+
+    bench_tables(args.db, args.repeats)
+
+    if not ok:
+        print("\n❌ Output differs from the regex versions")
+        sys.exit(1)
+    print("\n✅ Output matches the regex versions")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+"""
+Query encoder benchmark: latency, throughput and memory per backend.
+Output: build/encoder_bench.json (machine readable, compare runs with --compare)
+
+Backends:
+- torch: the sentence-transformers model
+- onnx: the fp32 export, assets/models/sentence_encoder.onnx
+- onnx-int8: the quantized graph the app ships, assets/models/model.onnx
+
+The query corpus is fixed: the precomputed app queries
+(assets/embeddings/query_embeddings.bin), or a built-in list. For a target
+sequence length, consecutive queries are joined until they reach that many
+tokens and the encoder truncates them to exactly that length; length 0
+keeps the queries as they are.
+
+Each (backend, intra-op threads, inter-op threads) combination runs in a
+fresh process, so thread settings take effect and peak RSS belongs to that
+backend alone. Inside it one encoder is loaded and every (sequence length,
+batch size) pair is timed, changing only the encoder's max_seq_length.
+Peak RSS is read after each pair, so it includes the model and the largest
+activations seen so far in that process.
+
+Usage:
+    python bench_encoders.py
+    python bench_encoders.py --backends onnx,onnx-int8 --threads 1,2,4 --batch-sizes 1,16
+    python bench_encoders.py --output build/after.json --compare build/before.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from bench_utils import latency_summary, format_latency, peak_rss_mb, format_mb
+from onnx_encoder import DEFAULT_TOKENIZER
+from onnx_variants import load_benchmark_queries
+from wordpiece_tokenizer import WordPieceTokenizer
+
+BACKENDS = {
+    'torch': 'all-MiniLM-L6-v2',
+    'onnx': 'assets/models/sentence_encoder.onnx',
+    'onnx-int8': 'assets/models/model.onnx',
+}
+
+
+def make_texts(queries, seq_len, tokenizer_path=DEFAULT_TOKENIZER):
+    """Texts of at least seq_len tokens (with special tokens) built from the queries."""
+    if not seq_len:
+        return list(queries)
+    tokenizer = WordPieceTokenizer(tokenizer_path, max_length=1 << 20)
+    texts = []
+    for start in range(len(queries)):
+        parts = []
+        i = start
+        while True:
+            parts.append(queries[i % len(queries)])
+            text = ' '.join(parts)
+            if len(tokenizer.encode(text)) >= seq_len:
+                break
+            i += 1
+        texts.append(text)
+    return texts
+
+
+def load_encoder(backend, model, intra_op, inter_op):
+    if backend == 'torch':
+        import torch
+        torch.set_num_threads(intra_op)
+        torch.set_num_interop_threads(inter_op)
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(model)
+    from onnx_encoder import OnnxSentenceEncoder
+    return OnnxSentenceEncoder(model, intra_op_threads=intra_op, inter_op_threads=inter_op)
+
+
+def _run_config(backend, model, intra_op, inter_op, batch_sizes, corpora, repeats):
+    """Time every (sequence length, batch size) pair in this process with one encoder."""
+    rows = []
+    start = time.perf_counter()
+    encoder = load_encoder(backend, model, intra_op, inter_op)
+    load_ms = (time.perf_counter() - start) * 1000
+    load_rss_mb = peak_rss_mb()
+
+    for seq_len, texts in corpora.items():
+        # Both backends truncate to max_seq_length when tokenizing
+        encoder.max_seq_length = seq_len or 256
+        for batch_size in batch_sizes:
+            encoder.encode(texts[:batch_size], batch_size=batch_size)  # warmup
+            latencies = []
+            start = time.perf_counter()
+            for _ in range(repeats):
+                for i in range(0, len(texts), batch_size):
+                    t0 = time.perf_counter()
+                    encoder.encode(texts[i:i + batch_size], batch_size=batch_size)
+                    latencies.append((time.perf_counter() - t0) * 1000)
+            elapsed = time.perf_counter() - start
+            rows.append({
+                'backend': backend,
+                'model': model,
+                'intra_op_threads': intra_op,
+                'inter_op_threads': inter_op,
+                'batch_size': batch_size,
+                'seq_len': seq_len,
+                'queries': len(texts) * repeats,
+                'qps': len(texts) * repeats / elapsed,
+                'batch_latency': latency_summary(latencies),
+                'load_ms': load_ms,
+                'load_rss_mb': load_rss_mb,
+                'peak_rss_mb': peak_rss_mb(),
+            })
+    return rows
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def config_key(row):
+    return (row['backend'], row['intra_op_threads'], row['inter_op_threads'],
+            row['batch_size'], row['seq_len'])
+
+
+def compare(baseline_path, results):
+    """Print p50 and QPS changes against an earlier run."""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {config_key(r): r for r in json.load(f)['results']}
+    print(f"\n=== Compared with {baseline_path} ===")
+    print(f"{'backend':<10} {'intra':>5} {'inter':>5} {'batch':>5} {'seq':>4} {'p50 ms':>17} {'QPS':>19}")
+    for row in results:
+        old = baseline.get(config_key(row))
+        if old is None:
+            continue
+        p50, old_p50 = row['batch_latency']['p50_ms'], old['batch_latency']['p50_ms']
+        print(f"{row['backend']:<10} {row['intra_op_threads']:>5} {row['inter_op_threads']:>5} "
+              f"{row['batch_size']:>5} {row['seq_len']:>4} "
+              f"{old_p50:>7.2f} -> {p50:>7.2f} {old['qps']:>8.0f} -> {row['qps']:>8.0f} "
+              f"({(row['qps'] / old['qps'] - 1) * 100:+.1f}%)")
+
+
+def run_benchmark(backends, threads, inter_threads, batch_sizes, seq_lens, repeats=3,
+                  output_path='build/encoder_bench.json', models=None,
+                  queries_path='assets/embeddings/query_embeddings.bin', compare_path=None):
+    print("=== Query encoder benchmark ===\n")
+    models = dict(BACKENDS, **(models or {}))
+    queries = load_benchmark_queries(queries_path)
+    corpora = {seq_len: make_texts(queries, seq_len) for seq_len in seq_lens}
+    print(f"Corpus: {len(queries)} queries; sequence lengths {seq_lens}; batch sizes {batch_sizes}")
+
+    results = []
+    skipped = []
+    ctx = multiprocessing.get_context('spawn')
+    for backend in backends:
+        model = models[backend]
+        if backend != 'torch' and not os.path.exists(model):
+            print(f"Skipping {backend}: {model} not found")
+            skipped.append({'backend': backend, 'model': model, 'reason': 'not found'})
+            continue
+        configs = [(intra_op, inter_op) for intra_op in threads for inter_op in inter_threads]
+        for intra_op, inter_op in configs:
+            print(f"\n{backend} ({model}), intra-op {intra_op}, inter-op {inter_op}")
+            try:
+                with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                    rows = pool.submit(_run_config, backend, model, intra_op, inter_op,
+                                       batch_sizes, corpora, repeats).result()
+            except ImportError as e:
+                print(f"  skipped: {e}")
+                skipped.append({'backend': backend, 'model': model, 'reason': str(e)})
+                break
+            print(f"  loaded in {rows[0]['load_ms']:.0f} ms, RSS after load {format_mb(rows[0]['load_rss_mb'])}")
+            for row in rows:
+                print(f"  batch {row['batch_size']:>3}, seq {row['seq_len'] or 'natural':>7}: "
+                      f"{row['qps']:>8.0f} QPS, {format_latency(row['batch_latency'])}, "
+                      f"peak RSS {format_mb(row['peak_rss_mb'])}")
+            results.extend(rows)
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'cpu_count': os.cpu_count(),
+            'python': platform.python_version(),
+            'repeats': repeats,
+            'query_count': len(queries),
+        },
+        'results': results,
+        'skipped': skipped,
+    }
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output_path}")
+
+    if compare_path:
+        compare(compare_path, results)
+    return report
+
+
+def int_list(value):
+    return [int(v) for v in value.split(',') if v]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark query encoder backends")
+    parser.add_argument('--backends', default='torch,onnx,onnx-int8')
+    parser.add_argument('--model', default=BACKENDS['torch'], help="sentence-transformers model")
+    parser.add_argument('--onnx-model', default=BACKENDS['onnx'])
+    parser.add_argument('--int8-model', default=BACKENDS['onnx-int8'])
+    parser.add_argument('--batch-sizes', default='1,8,32')
+    parser.add_argument('--seq-lens', default='0,32,128',
+                        help="token lengths to test, 0 = queries as they are")
+    parser.add_argument('--threads', default='1,2,4', help="intra-op thread counts")
+    parser.add_argument('--inter-threads', default='1', help="inter-op thread counts")
+    parser.add_argument('--repeats', type=int, default=3, help="passes over the corpus per setting")
+    parser.add_argument('--queries', default='assets/embeddings/query_embeddings.bin')
+    parser.add_argument('--output', default='build/encoder_bench.json')
+    parser.add_argument('--compare', help="earlier JSON report to compare against")
+    args = parser.parse_args()
+
+    models = {'torch': args.model, 'onnx': args.onnx_model, 'onnx-int8': args.int8_model}
+    run_benchmark(args.backends.split(','), int_list(args.threads), int_list(args.inter_threads),
+                  int_list(args.batch_sizes), int_list(args.seq_lens), args.repeats,
+                  args.output, models, args.queries, args.compare)
+
+
+if __name__ == '__main__':
+    main()
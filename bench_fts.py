@@ -0,0 +1,131 @@
+"""
+Keyword search latency: the app's LIKE scan against the FTS5 indexes built
+by build_fts_index.py.
+
+For each indexed table the LIKE query is the one DatabaseService runs today
+(`text LIKE '%query%' LIMIT 50`, no ranking). The FTS query is the
+bm25-ranked MATCH from build_fts_index.py, joined back to the source rows.
+Unless --queries is given, test terms are picked from each index's
+vocabulary (fts5vocab): the most common term, a median one, a rare one, a
+two-term query and a term that matches nothing, because a LIKE scan costs
+very different amounts for each of these.
+
+Usage:
+    python bench_fts.py [--tafseer-db assets/db/quran_tafsir.db] [--quran-db assets/db/Quran.db]
+    python bench_fts.py --queries queries.txt --repeats 50
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+
+from bench_utils import latency_summary
+from build_fts_index import TRANSLATION_TABLES, fts_query, fts_table_name
+
+MISSING_TERM = 'qqzzxxnotaword'
+
+
+def pick_queries(conn, fts):
+    """Representative queries from the index vocabulary, as (label, query)."""
+    conn.execute(f'CREATE VIRTUAL TABLE IF NOT EXISTS temp."{fts}_vocab" USING fts5vocab(main, "{fts}", \'row\')')
+    terms = conn.execute(f'SELECT term, doc FROM temp."{fts}_vocab" WHERE length(term) > 3 ORDER BY doc DESC').fetchall()
+    conn.execute(f'DROP TABLE temp."{fts}_vocab"')
+    if not terms:
+        return [('miss', MISSING_TERM)]
+    common, median, rare = terms[0][0], terms[len(terms) // 2][0], terms[-1][0]
+    return [
+        ('common', common),
+        ('median', median),
+        ('rare', rare),
+        ('two terms', f'{median} {common}'),
+        ('miss', MISSING_TERM),
+    ]
+
+
+def time_query(conn, sql, params, repeats):
+    """(latencies in ms, rows returned by the last run)"""
+    samples = []
+    rows = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        rows = conn.execute(sql, params).fetchall()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples, len(rows)
+
+
+def bench_table(conn, source, columns, queries, repeats, limit):
+    fts = fts_table_name(source)
+    like_sql = f'SELECT {columns} FROM "{source}" WHERE text LIKE ? LIMIT {limit}'
+    fts_sql = (f'SELECT {", ".join("s." + c.strip() for c in columns.split(","))} '
+               f'FROM "{fts}" f JOIN "{source}" s ON s.id = f.rowid '
+               f'WHERE "{fts}" MATCH ? ORDER BY f.rank LIMIT {limit}')
+
+    count = conn.execute(f'SELECT COUNT(*) FROM "{source}"').fetchone()[0]
+    print(f"\n{source} ({count} rows)")
+    print(f"  {'query':<32} {'LIKE p50':>10} {'FTS p50':>10} {'speedup':>8} {'LIKE hits':>10} {'FTS hits':>9}")
+    results = []
+    for label, query in queries:
+        like_ms, like_hits = time_query(conn, like_sql, (f'%{query}%',), repeats)
+        match = fts_query(query)
+        fts_ms, fts_hits = time_query(conn, fts_sql, (match,), repeats) if match else ([], 0)
+        like, ranked = latency_summary(like_ms), latency_summary(fts_ms)
+        speedup = like['p50_ms'] / ranked['p50_ms'] if fts_ms else float('nan')
+        shown = f"{label}: {query}"[:32]
+        print(f"  {shown:<32} {like['p50_ms']:>8.3f}ms {ranked.get('p50_ms', float('nan')):>8.3f}ms "
+              f"{speedup:>7.1f}x {like_hits:>10} {fts_hits:>9}")
+        results.append({'table': source, 'label': label, 'query': query, 'match': match,
+                        'like': like, 'fts': ranked, 'like_hits': like_hits, 'fts_hits': fts_hits})
+    return results
+
+
+def bench_database(db_path, sources, query_list, repeats, limit):
+    if not os.path.exists(db_path):
+        print(f"\nSkipping {db_path}: not found")
+        return []
+    conn = sqlite3.connect(db_path)
+    results = []
+    try:
+        names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+        for source, columns in sources:
+            if fts_table_name(source) not in names:
+                print(f"\n{source}: no {fts_table_name(source)} (run build_fts_index.py), skipped")
+                continue
+            queries = query_list or pick_queries(conn, fts_table_name(source))
+            results.extend(bench_table(conn, source, columns, queries, repeats, limit))
+    finally:
+        conn.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare LIKE and FTS5 keyword search latency")
+    parser.add_argument('--tafseer-db', default='assets/db/quran_tafsir.db')
+    parser.add_argument('--quran-db', default='assets/db/Quran.db')
+    parser.add_argument('--queries', help="file with one query per line (default: picked from each index)")
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--limit', type=int, default=50, help="LIMIT, as in the app")
+    parser.add_argument('--output', default='build/fts_bench.json')
+    args = parser.parse_args()
+
+    query_list = None
+    if args.queries:
+        with open(args.queries, encoding='utf-8') as f:
+            query_list = [('query', line.strip()) for line in f if line.strip()]
+
+    print(f"=== Keyword search: LIKE vs FTS5 ({args.repeats} runs per query, LIMIT {args.limit}) ===")
+    results = bench_database(args.tafseer_db, [('tafseer', 'id, surah, ayah, verse_key, text')],
+                             query_list, args.repeats, args.limit)
+    results += bench_database(args.quran_db, [(t, 'id, sura, aya, text') for t in TRANSLATION_TABLES],
+                              query_list, args.repeats, args.limit)
+
+    if results and args.output:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Small measurement helpers shared by the build and benchmark scripts.
+"""
+
+import sys
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None if unknown."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is bytes on macOS and kilobytes on Linux
+        if sys.platform == 'darwin':
+            return peak / (1024 * 1024)
+        return peak / 1024
+
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+    except (ImportError, AttributeError):
+        return None
+
+
+def format_mb(value):
+    """Format an optional MB figure for the console reports."""
+    return 'n/a' if value is None else f"{value:.1f} MB"
+
+
+def latency_summary(samples_ms):
+    """p50/p95/p99/mean/max of a list of latencies in milliseconds."""
+    samples = np.asarray(samples_ms, dtype=np.float64)
+    if samples.size == 0:
+        return {'count': 0}
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return {
+        'count': int(samples.size),
+        'mean_ms': float(samples.mean()),
+        'p50_ms': float(p50),
+        'p95_ms': float(p95),
+        'p99_ms': float(p99),
+        'max_ms': float(samples.max()),
+    }
+
+
+def format_latency(summary):
+    """One-line rendering of latency_summary() for the console reports."""
+    if not summary.get('count'):
+        return 'no samples'
+    return (f"p50 {summary['p50_ms']:.3f} ms, p95 {summary['p95_ms']:.3f} ms, "
+            f"p99 {summary['p99_ms']:.3f} ms, max {summary['max_ms']:.3f} ms")
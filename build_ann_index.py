@@ -0,0 +1,282 @@
+"""
+IVF-PQ approximate nearest-neighbour index for the tafseer embeddings.
+Input: assets/embeddings/tafseer_embeddings.bin (any format from embedding_format.py)
+Output: build/tafseer_ivfpq.idx
+
+Vectors are assigned to the closest of `nlist` coarse centroids, and the
+residual (vector - centroid) is compressed with product quantization: the
+residual is split into `m` sub-vectors, each replaced by the index of its
+nearest entry in a 256-entry codebook. A query only scores the `nprobe`
+closest lists, so the work per query is roughly count * nprobe / nlist
+codes instead of the whole corpus. With nlist ~ sqrt(count) (the default)
+that is O(sqrt(count)) per query for a fixed nprobe.
+
+Index Format (little endian):
+- Header (32 bytes):
+  - Magic: "TIV1" (4 bytes)
+  - Dim, Count, NList, M, KSub, DSub: Uint32 each
+  - Reserved: Uint32 (0)
+- Centroids: NList * Dim * Float32
+- Codebooks: M * KSub * DSub * Float32
+- List offsets: (NList + 1) * Uint32, entries of list i are [off[i], off[i+1])
+- Entries, grouped by list:
+  - ID: Uint16, Surah: Uint8, Ayah: Uint16 (same packing as TAF1)
+- Codes, grouped by list: Count * M * Uint8
+
+Scores are inner products, as in the app's brute-force search:
+score(q, x) ~= q.centroid + sum_j q_j.codebook_j[code_j]
+"""
+
+import argparse
+import os
+import struct
+import time
+import numpy as np
+
+from embedding_format import read_embeddings
+
+IVF_MAGIC = b'TIV1'
+IVF_HEADER = struct.Struct('<4s7I')
+ENTRY_DTYPE = np.dtype([('id', '<u2'), ('surah', 'u1'), ('ayah', '<u2')])
+
+
+def kmeans(x, k, iters=20, seed=0):
+    """Plain Lloyd's k-means. Returns (centroids, assignment)."""
+    rng = np.random.default_rng(seed)
+    k = min(k, len(x))
+    centroids = x[rng.choice(len(x), size=k, replace=False)].astype(np.float32)
+    x_sq = (x * x).sum(axis=1)
+
+    for _ in range(iters):
+        dist = x_sq[:, None] - 2 * (x @ centroids.T) + (centroids * centroids).sum(axis=1)[None, :]
+        assign = dist.argmin(axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, x)
+        counts = np.bincount(assign, minlength=k)
+        empty = counts == 0
+        centroids[~empty] = sums[~empty] / counts[~empty, None]
+        # Re-seed empty clusters with random points so every list is usable
+        if empty.any():
+            centroids[empty] = x[rng.choice(len(x), size=int(empty.sum()), replace=False)]
+
+    dist = x_sq[:, None] - 2 * (x @ centroids.T) + (centroids * centroids).sum(axis=1)[None, :]
+    return centroids, dist.argmin(axis=1)
+
+
+def train_ivfpq(x, nlist=64, m=48, ksub=256, iters=20, train_size=50000, seed=0):
+    """Train coarse centroids and PQ codebooks and encode every vector.
+
+    Returns (centroids, codebooks, assignment, codes).
+    """
+    n, dim = x.shape
+    if dim % m:
+        raise ValueError(f"dim {dim} is not divisible by m={m}")
+    dsub = dim // m
+    ksub = min(ksub, n)
+
+    rng = np.random.default_rng(seed)
+    train = x if n <= train_size else x[rng.choice(n, size=train_size, replace=False)]
+
+    print(f"Training {nlist} coarse centroids on {len(train)} vectors...")
+    centroids, _ = kmeans(train, nlist, iters, seed)
+    assign = (x @ centroids.T - 0.5 * (centroids * centroids).sum(axis=1)).argmax(axis=1)
+
+    residuals = x - centroids[assign]
+    train_res = residuals if n <= train_size else residuals[rng.choice(n, size=train_size, replace=False)]
+
+    print(f"Training {m} PQ codebooks ({ksub} x {dsub})...")
+    codebooks = np.empty((m, ksub, dsub), dtype=np.float32)
+    codes = np.empty((n, m), dtype=np.uint8)
+    for j in range(m):
+        sub = slice(j * dsub, (j + 1) * dsub)
+        codebooks[j], _ = kmeans(train_res[:, sub], ksub, iters, seed + j + 1)
+        part = residuals[:, sub]
+        dist = (part * part).sum(axis=1)[:, None] - 2 * part @ codebooks[j].T \
+            + (codebooks[j] * codebooks[j]).sum(axis=1)[None, :]
+        codes[:, j] = dist.argmin(axis=1)
+
+    return centroids, codebooks, assign, codes
+
+
+def write_index(path, centroids, codebooks, assign, codes, ids, surahs, ayahs):
+    """Write the index file with entries and codes grouped by list."""
+    nlist, dim = centroids.shape
+    m, ksub, dsub = codebooks.shape
+    order = np.argsort(assign, kind='stable')
+    offsets = np.zeros(nlist + 1, dtype='<u4')
+    offsets[1:] = np.cumsum(np.bincount(assign, minlength=nlist))
+
+    entries = np.empty(len(order), dtype=ENTRY_DTYPE)
+    entries['id'] = np.asarray(ids)[order]
+    entries['surah'] = np.asarray(surahs)[order]
+    entries['ayah'] = np.asarray(ayahs)[order]
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(IVF_HEADER.pack(IVF_MAGIC, dim, len(order), nlist, m, ksub, dsub, 0))
+        f.write(centroids.astype('<f4').tobytes())
+        f.write(codebooks.astype('<f4').tobytes())
+        f.write(offsets.tobytes())
+        f.write(entries.tobytes())
+        f.write(codes[order].astype(np.uint8).tobytes())
+
+
+class IvfPqIndex:
+    """Reference searcher for the TIV1 index file."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            header = f.read(IVF_HEADER.size)
+        magic, dim, count, nlist, m, ksub, dsub, _ = IVF_HEADER.unpack(header)
+        if magic != IVF_MAGIC:
+            raise ValueError(f"Invalid magic bytes: {magic!r}")
+        self.dim, self.count, self.nlist, self.m, self.ksub, self.dsub = dim, count, nlist, m, ksub, dsub
+
+        data = np.memmap(path, dtype=np.uint8, mode='r')
+        pos = IVF_HEADER.size
+
+        def take(dtype, shape):
+            nonlocal pos
+            dtype = np.dtype(dtype)
+            size = int(np.prod(shape)) * dtype.itemsize
+            arr = np.frombuffer(data, dtype=dtype, count=int(np.prod(shape)), offset=pos).reshape(shape)
+            pos += size
+            return arr
+
+        self.centroids = take('<f4', (nlist, dim))
+        self.codebooks = take('<f4', (m, ksub, dsub))
+        self.offsets = take('<u4', (nlist + 1,))
+        self.entries = take(ENTRY_DTYPE, (count,))
+        self.codes = take(np.uint8, (count, m))
+        self.vectors = None
+
+    def attach_vectors(self, ids, embeddings):
+        """Keep exact vectors, reordered to index order, for re-ranking."""
+        row_of = {int(i): row for row, i in enumerate(ids)}
+        self.vectors = np.asarray(embeddings, dtype=np.float32)[
+            [row_of[int(i)] for i in self.entries['id']]]
+
+    def search(self, query, k=10, nprobe=8, refine=0):
+        """Approximate top-k for one query.
+
+        With refine > 0 and vectors attached, the best `refine` PQ candidates
+        are re-scored exactly before the final top-k is taken.
+
+        Returns (positions, scores, scanned): positions index into
+        self.entries, best first; scanned is the number of codes scored.
+        """
+        query = np.asarray(query, dtype=np.float32)
+        coarse = self.centroids @ query
+        nprobe = min(nprobe, self.nlist)
+        lists = np.argpartition(-coarse, nprobe - 1)[:nprobe]
+
+        # Lookup table: inner product of each query sub-vector with each codeword
+        lut = np.einsum('jkd,jd->jk', self.codebooks, query.reshape(self.m, self.dsub))
+        cols = np.arange(self.m)
+
+        positions = []
+        scores = []
+        for lst in lists:
+            start, end = int(self.offsets[lst]), int(self.offsets[lst + 1])
+            if start == end:
+                continue
+            codes = self.codes[start:end]
+            scores.append(coarse[lst] + lut[cols, codes].sum(axis=1))
+            positions.append(np.arange(start, end))
+
+        if not positions:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32), 0
+        positions = np.concatenate(positions)
+        scores = np.concatenate(scores)
+        scanned = len(scores)
+
+        if refine and self.vectors is not None and len(scores) > k:
+            shortlist = np.argpartition(-scores, min(refine, len(scores)) - 1)[:refine]
+            positions = positions[shortlist]
+            scores = self.vectors[positions] @ query
+
+        k = min(k, len(scores))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return positions[best], scores[best], scanned
+
+    def search_ids(self, query, k=10, nprobe=8, refine=0):
+        """Like search(), but returns tafseer ids instead of positions."""
+        positions, scores, _ = self.search(query, k, nprobe, refine)
+        return self.entries['id'][positions].astype(np.int64), scores
+
+
+def evaluate(index, embeddings, ids, nprobes, k=10, queries=200, refine=100, seed=0):
+    """Print recall@k against brute-force search for each nprobe,
+    with and without exact re-ranking of the best `refine` candidates."""
+    rng = np.random.default_rng(seed)
+    sample = embeddings[rng.choice(len(embeddings), size=min(queries, len(embeddings)), replace=False)]
+    # Perturb corpus vectors so queries are not exact copies of indexed entries
+    sample = sample + rng.normal(scale=0.05, size=sample.shape).astype(np.float32)
+    sample /= np.linalg.norm(sample, axis=1, keepdims=True)
+
+    exact = sample @ embeddings.T
+    kk = min(k, len(ids))
+    truth = [set(ids[np.argpartition(-row, kk - 1)[:kk]]) for row in exact]
+
+    index.attach_vectors(ids, embeddings)
+    print(f"\n{'nprobe':>7} {'refine':>7} {'recall@' + str(k):>10} {'scanned':>9} {'ms/query':>9}")
+    for nprobe in nprobes:
+        for rerank in (0, refine):
+            hits = 0
+            scanned = 0
+            start = time.perf_counter()
+            for q, expected in zip(sample, truth):
+                positions, _, n = index.search(q, k, nprobe, rerank)
+                hits += len(expected & set(index.entries['id'][positions].tolist()))
+                scanned += n
+            elapsed = (time.perf_counter() - start) * 1000 / len(sample)
+            print(f"{nprobe:>7} {rerank:>7} {hits / (len(sample) * kk):>10.4f} "
+                  f"{scanned / len(sample):>9.0f} {elapsed:>9.3f}")
+
+
+def build_index(input_path='assets/embeddings/tafseer_embeddings.bin',
+                output_path='build/tafseer_ivfpq.idx', nlist=0, m=48, iters=20,
+                nprobes=(1, 2, 4, 8, 16)):
+    print(f"=== Building IVF-PQ index from {input_path} ===\n")
+
+    if not os.path.exists(input_path):
+        print(f"Error: {input_path} not found!")
+        return
+
+    _, ids, surahs, ayahs, embeddings = read_embeddings(input_path)
+    print(f"Loaded {len(ids)} vectors, dimension {embeddings.shape[1]}")
+    if not nlist:
+        nlist = max(1, int(round(np.sqrt(len(ids)))))
+
+    start = time.perf_counter()
+    centroids, codebooks, assign, codes = train_ivfpq(embeddings, nlist, m, iters=iters)
+    write_index(output_path, centroids, codebooks, assign, codes, ids, surahs, ayahs)
+    elapsed = time.perf_counter() - start
+
+    sizes = np.bincount(assign, minlength=len(centroids))
+    print(f"\nIndex written to {output_path} in {elapsed:.1f} s")
+    print(f"Lists: {len(centroids)} (size min {sizes.min()}, median {int(np.median(sizes))}, max {sizes.max()})")
+    print(f"Index size: {os.path.getsize(output_path) / (1024 * 1024):.2f} MB "
+          f"(source vectors: {embeddings.nbytes / (1024 * 1024):.2f} MB)")
+
+    evaluate(IvfPqIndex(output_path), embeddings, ids, nprobes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build an IVF-PQ index over the tafseer embeddings")
+    parser.add_argument('--input', default='assets/embeddings/tafseer_embeddings.bin')
+    parser.add_argument('--output', default='build/tafseer_ivfpq.idx')
+    parser.add_argument('--nlist', type=int, default=0,
+                        help="number of coarse lists (default: sqrt of the vector count)")
+    parser.add_argument('--m', type=int, default=48, help="PQ sub-vectors (must divide dim)")
+    parser.add_argument('--iters', type=int, default=20, help="k-means iterations")
+    parser.add_argument('--nprobe', default='1,2,4,8,16',
+                        help="comma-separated nprobe values to evaluate")
+    args = parser.parse_args()
+    build_index(args.input, args.output, args.nlist, args.m, args.iters,
+                [int(n) for n in args.nprobe.split(',')])
+
+
+if __name__ == '__main__':
+    main()
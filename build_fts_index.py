@@ -0,0 +1,141 @@
+"""
+FTS5 full-text indexes for keyword search, replacing `text LIKE '%query%'`
+scans with an inverted index and bm25 ranking.
+
+Indexes:
+- assets/db/quran_tafsir.db: tafseer_fts over tafseer.text
+- assets/db/Quran.db: <table>_fts over the translation and
+  transliteration tables (TRANSLATION_TABLES)
+
+Text is normalized before indexing: HTML stripped (clean_html), Arabic
+harakat and Quranic marks removed, alef/hamza/yeh/teh marbuta variants
+folded (arabic_text.py 'search' profile) and transliteration apostrophes
+(ʿ ʾ ' ’) dropped. The FTS5 unicode61 tokenizer then case-folds and removes
+Latin diacritics, so "Allāh", "ALLAH" and "allah" are the same term.
+Queries must go through the same normalization (fts_query(), mirrored by
+DatabaseService._ftsQuery in the app).
+
+The tables are contentless (content=''): they hold only the index, and
+the FTS rowid is the source row's id column, the key the app joins on,
+so results are joined back on id. Each table is dropped and rebuilt from
+scratch, then merged into a single b-tree with 'optimize'.
+
+App query (tafseer):
+    SELECT t.id, t.surah, t.ayah, t.verse_key, t.text
+    FROM tafseer_fts f JOIN tafseer t ON t.id = f.rowid
+    WHERE tafseer_fts MATCH ? ORDER BY f.rank LIMIT 50
+
+Usage:
+    python build_fts_index.py [--tafseer-db assets/db/quran_tafsir.db] [--quran-db assets/db/Quran.db]
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+
+from arabic_text import PROFILES, ArabicNormalizer
+from generate_tafseer_embeddings import clean_html
+
+TRANSLATION_TABLES = ['terjemahan_quran', 'jalalayn_quran', 'latin_quran', 'latin_english_quran']
+DEFAULT_TOKENIZER = 'unicode61 remove_diacritics 2'
+TRANSLITERATION_MARKS = "ʿʾ'’‘`"
+
+_normalizer = ArabicNormalizer('search', strip=PROFILES['search']['strip'] + TRANSLITERATION_MARKS)
+
+
+def normalize_for_index(texts):
+    """HTML-stripped, normalized text for a batch of rows."""
+    return _normalizer.normalize_batch([clean_html(text or '') for text in texts])
+
+
+def fts_query(text, prefix=True):
+    """MATCH expression for a user query: every term required, last one as a prefix.
+
+    Terms are quoted, so FTS5 operators in the input are searched as words.
+    Returns None when nothing searchable is left.
+    """
+    terms = _normalizer.normalize(text).replace('"', ' ').split()
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    if prefix:
+        quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def fts_table_name(table):
+    return f'{table}_fts'
+
+
+def build_fts_table(conn, source, text_column='text', id_column='id', tokenizer=DEFAULT_TOKENIZER,
+                    batch_size=2000):
+    """(Re)build <source>_fts from source.text_column. Returns the number of rows indexed."""
+    fts = fts_table_name(source)
+    with conn:
+        conn.execute(f'DROP TABLE IF EXISTS "{fts}"')
+        conn.execute(f'CREATE VIRTUAL TABLE "{fts}" USING fts5('
+                     f'text, content=\'\', tokenize="{tokenizer}")')
+        cursor = conn.execute(f'SELECT "{id_column}", "{text_column}" FROM "{source}"')
+        rows = 0
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            texts = normalize_for_index([text for _, text in batch])
+            conn.executemany(f'INSERT INTO "{fts}"(rowid, text) VALUES (?, ?)',
+                             zip((row_id for row_id, _ in batch), texts))
+            rows += len(batch)
+        conn.execute(f'INSERT INTO "{fts}"("{fts}") VALUES (\'optimize\')')
+    return rows
+
+
+def database_size(conn):
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    return conn.execute("PRAGMA page_count").fetchone()[0] * page_size
+
+
+def build_indexes(db_path, tables, tokenizer=DEFAULT_TOKENIZER, vacuum=True):
+    """Build an FTS table per source table present in db_path."""
+    if not os.path.exists(db_path):
+        print(f"Skipping {db_path}: not found")
+        return
+    conn = sqlite3.connect(db_path)
+    try:
+        existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+        before = database_size(conn)
+        print(f"{db_path} ({before / (1024 * 1024):.2f} MB)")
+        for table in tables:
+            if table not in existing:
+                print(f"  {table}: not found, skipped")
+                continue
+            start = time.perf_counter()
+            rows = build_fts_table(conn, table, tokenizer=tokenizer)
+            print(f"  {fts_table_name(table)}: {rows} rows in {time.perf_counter() - start:.2f} s")
+        if vacuum:
+            conn.execute("VACUUM")
+        after = database_size(conn)
+        print(f"  size {before / (1024 * 1024):.2f} MB -> {after / (1024 * 1024):.2f} MB\n")
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build FTS5 keyword indexes for tafseer and translations")
+    parser.add_argument('--tafseer-db', default='assets/db/quran_tafsir.db')
+    parser.add_argument('--quran-db', default='assets/db/Quran.db')
+    parser.add_argument('--tokenizer', default=DEFAULT_TOKENIZER, help="FTS5 tokenize= option")
+    parser.add_argument('--no-vacuum', action='store_true', help="skip VACUUM after building")
+    args = parser.parse_args()
+
+    print("=== Building FTS5 indexes ===\n")
+    if not sqlite3.connect(':memory:').execute(
+            "SELECT sqlite_compileoption_used('ENABLE_FTS5')").fetchone()[0]:
+        print("Error: this Python's SQLite was built without FTS5")
+        raise SystemExit(1)
+    build_indexes(args.tafseer_db, ['tafseer'], args.tokenizer, not args.no_vacuum)
+    build_indexes(args.quran_db, TRANSLATION_TABLES, args.tokenizer, not args.no_vacuum)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,291 @@
+"""
+Precomputed reading tables for Quran.db, so opening a surah or a juz is one
+range read instead of a query per script/translation table merged in Dart.
+
+Tables:
+    ayah_reading(id, sura, aya, indopak, utsmani, sahih, jalalayn, latin, latin_english)
+        id = sura * 1000 + aya (INTEGER PRIMARY KEY), so rows are stored in
+        (sura, aya) order and a surah or juz is one rowid range. The columns
+        are named after the getAyahsForSurah preferences. This stays a rowid
+        table: rows are over 1 KB, which a WITHOUT ROWID table would push
+        into overflow pages at the app's 4 KB page size.
+    surah_reading(sura, name, ayahs, data)
+        The header getAyahsForSurah builds from getSurahByNumber and
+        _getAyahCountForSurah, plus the whole surah packed as one
+        zlib-compressed UTF-8 JSON blob {"columns": [...], "rows":
+        [[aya, ...], ...]} for callers that cache or export a surah at
+        once (unpack_surah()).
+
+App reads (app_queries.reading_sql / READING_HEADER_SQL):
+    SELECT sura, aya, indopak AS text, sahih AS translation, latin_english AS pronunciation
+    FROM ayah_reading WHERE id BETWEEN ? AND ? ORDER BY id
+    SELECT sura, name, ayahs FROM surah_reading WHERE sura BETWEEN ? / 1000 AND ? / 1000
+
+After building, every surah and juz is assembled both ways for every
+preference combination: the current per-table queries merged by position,
+as DatabaseService does, and the reading-table reads. Any difference fails
+the build and the tables are dropped again.
+
+Usage:
+    python build_reading_table.py [--db assets/db/Quran.db]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sqlite3
+import time
+import zlib
+
+from app_queries import (ARABIC_SCRIPTS, JUZ_BOUNDARIES, PRONUNCIATIONS, READING_HEADER_SQL, TRANSLATIONS,
+                         reading_key, reading_sql)
+from bench_utils import format_latency, latency_summary
+
+READING_COLUMNS = {**ARABIC_SCRIPTS, **TRANSLATIONS, **{k: v for k, v in PRONUNCIATIONS.items() if k}}
+# Ayah list and count, as _getAyahCountForSurah
+COUNT_TABLE = ARABIC_SCRIPTS['indopak']
+SURAH_TABLE = 'sura_search_sura_search'
+
+
+def duplicate_keys(conn, table):
+    """(sura, aya) pairs that occur more than once in table."""
+    return conn.execute(f'SELECT sura, aya FROM "{table}" GROUP BY sura, aya HAVING COUNT(*) > 1').fetchall()
+
+
+def build_tables(conn):
+    """(Re)create ayah_reading and surah_reading. Returns (ayahs, surahs)."""
+    columns = ', '.join(f'"{name}" TEXT' for name in READING_COLUMNS)
+    selects = ', '.join(f'"{name}".text' for name in READING_COLUMNS)
+    joins = ' '.join(f'LEFT JOIN "{table}" "{name}" ON "{name}".sura = k.sura AND "{name}".aya = k.aya'
+                     for name, table in READING_COLUMNS.items())
+    keys = ' UNION '.join(f'SELECT sura, aya FROM "{table}"' for table in ARABIC_SCRIPTS.values())
+    has_names = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?",
+                             (SURAH_TABLE,)).fetchone()
+
+    with conn:
+        conn.execute("DROP TABLE IF EXISTS ayah_reading")
+        conn.execute("DROP TABLE IF EXISTS surah_reading")
+        conn.execute(f"""
+            CREATE TABLE ayah_reading (
+                id INTEGER PRIMARY KEY,
+                sura INTEGER NOT NULL,
+                aya INTEGER NOT NULL,
+                {columns}
+            )""")
+        conn.execute(f"""
+            INSERT INTO ayah_reading
+            SELECT k.sura * 1000 + k.aya, k.sura, k.aya, {selects}
+            FROM ({keys}) k {joins}
+            ORDER BY k.sura, k.aya""")
+        conn.execute("""
+            CREATE TABLE surah_reading (
+                sura INTEGER PRIMARY KEY,
+                name TEXT,
+                ayahs INTEGER NOT NULL,
+                data BLOB NOT NULL
+            )""")
+        names = dict(conn.execute(f'SELECT no, english FROM "{SURAH_TABLE}"')) if has_names else {}
+        counts = dict(conn.execute(f'SELECT sura, COUNT(*) FROM "{COUNT_TABLE}" GROUP BY sura'))
+        surahs = [sura for (sura,) in conn.execute("SELECT DISTINCT sura FROM ayah_reading ORDER BY sura")]
+        conn.executemany("INSERT INTO surah_reading VALUES (?, ?, ?, ?)",
+                         ((sura, names.get(sura), counts.get(sura, 0), pack_surah(conn, sura))
+                          for sura in surahs))
+    ayahs = conn.execute("SELECT COUNT(*) FROM ayah_reading").fetchone()[0]
+    return ayahs, len(surahs)
+
+
+def pack_surah(conn, sura):
+    names = ['aya', *READING_COLUMNS]
+    rows = conn.execute(f"SELECT {', '.join(names)} FROM ayah_reading WHERE id BETWEEN ? AND ? ORDER BY id",
+                        (reading_key(sura, 0), reading_key(sura, 999))).fetchall()
+    packed = json.dumps({'columns': names, 'rows': rows}, ensure_ascii=False, separators=(',', ':'))
+    return zlib.compress(packed.encode('utf-8'), 9)
+
+
+def unpack_surah(blob):
+    """surah_reading.data -> list of {column: value} per ayah."""
+    packed = json.loads(zlib.decompress(blob).decode('utf-8'))
+    return [dict(zip(packed['columns'], row)) for row in packed['rows']]
+
+
+def legacy_ayahs(rows, sura, name, total, preferences):
+    """getAyahsForSurah as DatabaseService assembles it from per-table rows: merged by position.
+
+    rows is {table: [(aya, text), ...]} for this surah, each ordered by aya.
+    """
+    arabic_script, translation, pronunciation = preferences
+    arabic = rows[ARABIC_SCRIPTS.get(arabic_script, ARABIC_SCRIPTS['utsmani'])]
+    translated = rows[TRANSLATIONS.get(translation, TRANSLATIONS['jalalayn'])]
+    spoken_table = PRONUNCIATIONS.get(pronunciation)
+    spoken = rows[spoken_table] if spoken_table else None
+    ayahs = []
+    for i, (aya, text) in enumerate(arabic):
+        ayah = {'number': sura, 'text': text, 'numberInSurah': aya, 'surahNumber': sura,
+                'surahName': name, 'numberOfAyahs': total, 'totalVerses': total}
+        if i < len(translated):
+            ayah['translation'] = translated[i][1]
+        if spoken is not None and i < len(spoken):
+            ayah['pronunciation'] = spoken[i][1]
+        ayahs.append(ayah)
+    return ayahs
+
+
+def reading_ayahs(conn, first, last, preferences):
+    """_getAyahsFromReadingTable: the same ayah maps from one range read plus the surah headers."""
+    arabic_script, translation, pronunciation = preferences
+    rows = conn.execute(reading_sql(arabic_script, translation, pronunciation), (first, last)).fetchall()
+    headers = {sura: (name, ayahs) for sura, name, ayahs in conn.execute(READING_HEADER_SQL, (first, last))}
+    ayahs = []
+    for sura, aya, text, translated, *spoken in rows:
+        name, total = headers.get(sura, (None, 0))
+        ayah = {'number': sura, 'text': text, 'numberInSurah': aya, 'surahNumber': sura,
+                'surahName': name if name is not None else f'Surah {sura}',
+                'numberOfAyahs': total, 'totalVerses': total, 'translation': translated}
+        if spoken:
+            ayah['pronunciation'] = spoken[0]
+        ayahs.append(ayah)
+    return ayahs
+
+
+def legacy_surah_rows(conn, sura):
+    """{table: [(aya, text)]} with the queries getAyahsForSurah runs today."""
+    return {table: conn.execute(f'SELECT aya, text FROM "{table}" WHERE sura = ? ORDER BY aya ASC',
+                                (sura,)).fetchall()
+            for table in READING_COLUMNS.values()}
+
+
+def legacy_surah_header(conn, sura):
+    """(surahName, totalVerses) from getSurahByNumber and _getAyahCountForSurah."""
+    try:
+        row = conn.execute(f'SELECT english FROM "{SURAH_TABLE}" WHERE no = ?', (sura,)).fetchone()
+    except sqlite3.OperationalError:
+        row = None
+    total = conn.execute(f'SELECT COUNT(*) FROM "{COUNT_TABLE}" WHERE sura = ?', (sura,)).fetchone()[0]
+    return (row[0] if row and row[0] is not None else f'Surah {sura}'), total
+
+
+def verify(conn, examples=5):
+    """Compare both assemblies for every surah, juz and preference combination. Returns the differences."""
+    combinations = list(itertools.product(ARABIC_SCRIPTS, TRANSLATIONS, PRONUNCIATIONS))
+    suras = [s for (s,) in conn.execute(
+        ' UNION '.join(f'SELECT DISTINCT sura FROM "{table}"' for table in READING_COLUMNS.values()))]
+    legacy = {sura: (legacy_surah_rows(conn, sura), *legacy_surah_header(conn, sura)) for sura in suras}
+
+    differences = []
+
+    def compare(label, expected, actual):
+        if expected != actual:
+            ayah = next((a.get('surahNumber'), a.get('numberInSurah'))
+                        for a, b in itertools.zip_longest(expected, actual, fillvalue={}) if a != b)
+            differences.append(f"{label}: first difference at {ayah[0]}:{ayah[1]} "
+                               f"({len(expected)} ayahs before, {len(actual)} after)")
+
+    for preferences in combinations:
+        by_surah = {sura: legacy_ayahs(rows, sura, name, total, preferences)
+                    for sura, (rows, name, total) in legacy.items()}
+        for sura in suras:
+            compare(f"surah {sura} {preferences}", by_surah[sura],
+                    reading_ayahs(conn, reading_key(sura, 0), reading_key(sura, 999), preferences))
+        for juz, (start_sura, start_aya, end_sura, end_aya) in enumerate(JUZ_BOUNDARIES, 1):
+            expected = [ayah for sura in range(start_sura, end_sura + 1) for ayah in by_surah.get(sura, [])
+                        if (start_sura, start_aya) <= (sura, ayah['numberInSurah']) <= (end_sura, end_aya)]
+            compare(f"juz {juz} {preferences}", expected,
+                    reading_ayahs(conn, reading_key(start_sura, start_aya), reading_key(end_sura, end_aya),
+                                  preferences))
+
+    for sura, blob in conn.execute("SELECT sura, data FROM surah_reading"):
+        rows = [dict(zip(['aya', *READING_COLUMNS], row)) for row in conn.execute(
+            f"SELECT aya, {', '.join(READING_COLUMNS)} FROM ayah_reading WHERE id BETWEEN ? AND ? ORDER BY id",
+            (reading_key(sura, 0), reading_key(sura, 999)))]
+        if unpack_surah(blob) != rows:
+            differences.append(f"surah_reading.data for surah {sura} does not match ayah_reading")
+
+    print(f"Verified {len(suras)} surahs and {len(JUZ_BOUNDARIES)} juz x {len(combinations)} preference sets")
+    for difference in differences[:examples]:
+        print(f"  {difference}")
+    return differences
+
+
+def bench(conn, repeats=3):
+    """Per-surah load time: today's five queries, the two reading-table reads, and the packed blob."""
+    suras = [s for (s,) in conn.execute("SELECT sura FROM surah_reading")]
+    preferences = ('indopak', 'sahih', 'latin_english')
+    timings = {'per-table queries': [], 'ayah_reading range': [], 'surah_reading blob': []}
+    for _ in range(repeats):
+        for sura in suras:
+            start = time.perf_counter()
+            legacy_ayahs(legacy_surah_rows(conn, sura), sura, *legacy_surah_header(conn, sura), preferences)
+            timings['per-table queries'].append((time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            reading_ayahs(conn, reading_key(sura, 0), reading_key(sura, 999), preferences)
+            timings['ayah_reading range'].append((time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            unpack_surah(conn.execute("SELECT data FROM surah_reading WHERE sura = ?", (sura,)).fetchone()[0])
+            timings['surah_reading blob'].append((time.perf_counter() - start) * 1000)
+    print("\nSurah load time:")
+    for label, samples in timings.items():
+        print(f"  {label:<20} {format_latency(latency_summary(samples))}")
+
+
+def database_size(conn):
+    return conn.execute("PRAGMA page_count").fetchone()[0] * conn.execute("PRAGMA page_size").fetchone()[0]
+
+
+def build_reading(db_path='assets/db/Quran.db', vacuum=True, run_bench=True):
+    print(f"=== Building reading tables in {db_path} ===\n")
+    if not os.path.exists(db_path):
+        print(f"Error: {db_path} not found!")
+        return False
+
+    conn = sqlite3.connect(db_path)
+    try:
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+        missing = [table for table in READING_COLUMNS.values() if table not in tables]
+        if missing:
+            print(f"Error: missing tables {', '.join(missing)}")
+            return False
+        for table in READING_COLUMNS.values():
+            duplicates = duplicate_keys(conn, table)
+            if duplicates:
+                print(f"Error: {table} has {len(duplicates)} repeated (sura, aya) keys, e.g. {duplicates[0]}")
+                return False
+
+        before = database_size(conn)
+        start = time.perf_counter()
+        ayahs, surahs = build_tables(conn)
+        print(f"ayah_reading: {ayahs} ayahs, surah_reading: {surahs} surahs "
+              f"({time.perf_counter() - start:.2f} s)")
+
+        differences = verify(conn)
+        if differences:
+            print(f"\n❌ {len(differences)} differences from the per-table queries; tables dropped")
+            with conn:
+                conn.execute("DROP TABLE ayah_reading")
+                conn.execute("DROP TABLE surah_reading")
+            return False
+        print("✅ Reading tables match the per-table queries")
+
+        if run_bench:
+            bench(conn)
+        if vacuum:
+            conn.execute("VACUUM")
+        after = database_size(conn)
+        print(f"\nSize {before / (1024 * 1024):.2f} MB -> {after / (1024 * 1024):.2f} MB")
+    finally:
+        conn.close()
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the ayah_reading and surah_reading tables in Quran.db")
+    parser.add_argument('--db', default='assets/db/Quran.db')
+    parser.add_argument('--no-vacuum', action='store_true', help="skip VACUUM after building")
+    parser.add_argument('--no-bench', action='store_true', help="skip the load time comparison")
+    args = parser.parse_args()
+    if not build_reading(args.db, not args.no_vacuum, not args.no_bench):
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""
+Precomputed "related tafseer" table: the top-k nearest neighbours of every
+tafseer entry, so the app can show related passages without a model or a
+vector scan.
+Input: assets/embeddings/tafseer_embeddings.bin (any format from embedding_format.py)
+Output: tafseer_related table in assets/db/quran_tafsir.db
+
+Neighbours are found with blocked matrix products: each block of rows is
+scored against the whole matrix (block_size * count floats of scratch), the
+top-k is taken with argpartition, and the block is discarded. Memory stays
+bounded however large the corpus grows.
+
+Entries whose text is repeated for consecutive ayahs have near-identical
+vectors; anything scoring above --duplicate-threshold is skipped so the
+related list is not filled with copies of the same passage.
+
+Table:
+    tafseer_related(id, rank, related_id, score)
+    PRIMARY KEY (id, rank), WITHOUT ROWID
+
+App lookup (one index range scan):
+    SELECT t.id, t.surah, t.ayah, t.verse_key, t.text, r.score
+    FROM tafseer_related r JOIN tafseer t ON t.id = r.related_id
+    WHERE r.id = ? ORDER BY r.rank
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+import numpy as np
+
+from bench_utils import peak_rss_mb, format_mb
+from embedding_format import read_embeddings
+
+DEFAULT_DUPLICATE_THRESHOLD = 0.999
+
+
+def related_neighbours(embeddings, k=10, block_size=1024, duplicate_threshold=DEFAULT_DUPLICATE_THRESHOLD):
+    """Top-k neighbours of every row, excluding itself and near-duplicates.
+
+    Returns (positions, scores), each (count, k). Rows with fewer than k
+    usable neighbours are padded with position -1.
+    """
+    count = len(embeddings)
+    k = min(k, count - 1)
+    positions = np.full((count, k), -1, dtype=np.int64)
+    scores = np.zeros((count, k), dtype=np.float32)
+
+    for start in range(0, count, block_size):
+        end = min(start + block_size, count)
+        block = embeddings[start:end] @ embeddings.T
+        block[np.arange(end - start), np.arange(start, end)] = -np.inf
+        block[block >= duplicate_threshold] = -np.inf
+
+        part = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        part_scores = np.take_along_axis(block, part, axis=1)
+        order = np.argsort(-part_scores, axis=1)
+        part = np.take_along_axis(part, order, axis=1)
+        part_scores = np.take_along_axis(part_scores, order, axis=1)
+
+        valid = np.isfinite(part_scores)
+        positions[start:end] = np.where(valid, part, -1)
+        scores[start:end] = np.where(valid, part_scores, 0)
+    return positions, scores
+
+
+def verify_against_brute_force(embeddings, scores, duplicate_threshold, sample=200, seed=0):
+    """Compare sampled rows with one unblocked search; returns the mismatch count.
+
+    Scores are compared rather than ids, so ties may be broken either way.
+    """
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(embeddings), size=min(sample, len(embeddings)), replace=False)
+    k = scores.shape[1]
+    mismatches = 0
+    for row in rows:
+        exact = embeddings @ embeddings[row]
+        exact[row] = -np.inf
+        exact = np.sort(exact[exact < duplicate_threshold])[::-1][:k]
+        got = scores[row][:len(exact)]
+        if len(exact) < k and scores[row][len(exact):].any():
+            mismatches += 1
+        elif not np.allclose(got, exact, atol=1e-5):
+            mismatches += 1
+    return mismatches
+
+
+def write_related_table(db_path, ids, positions, scores):
+    """Replace tafseer_related in one transaction."""
+    rows = []
+    for row_id, neighbours, row_scores in zip(ids, positions, scores):
+        rank = 0
+        for pos, score in zip(neighbours, row_scores):
+            if pos < 0:
+                continue
+            rows.append((int(row_id), rank, int(ids[pos]), round(float(score), 4)))
+            rank += 1
+
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            conn.execute("DROP TABLE IF EXISTS tafseer_related")
+            conn.execute("""
+                CREATE TABLE tafseer_related (
+                    id INTEGER NOT NULL,
+                    rank INTEGER NOT NULL,
+                    related_id INTEGER NOT NULL,
+                    score REAL NOT NULL,
+                    PRIMARY KEY (id, rank)
+                ) WITHOUT ROWID
+            """)
+            conn.executemany("INSERT INTO tafseer_related VALUES (?, ?, ?, ?)", rows)
+    finally:
+        conn.close()
+    return len(rows)
+
+
+def build_related(input_path='assets/embeddings/tafseer_embeddings.bin',
+                  db_path='assets/db/quran_tafsir.db', k=10, block_size=1024,
+                  duplicate_threshold=DEFAULT_DUPLICATE_THRESHOLD, verify=200):
+    print(f"=== Building related tafseer table from {input_path} ===\n")
+
+    for path in (input_path, db_path):
+        if not os.path.exists(path):
+            print(f"Error: {path} not found!")
+            return
+
+    _, ids, _, _, embeddings = read_embeddings(input_path)
+    print(f"Loaded {len(ids)} vectors, dimension {embeddings.shape[1]}")
+    print(f"Block size {block_size}: {block_size * len(ids) * 4 / (1024 * 1024):.1f} MB of scores per block")
+
+    start = time.perf_counter()
+    positions, scores = related_neighbours(embeddings, k, block_size, duplicate_threshold)
+    elapsed = time.perf_counter() - start
+    print(f"Top-{positions.shape[1]} neighbours for {len(ids)} entries in {elapsed:.2f} s "
+          f"({len(ids) / elapsed:.0f} rows/s)")
+
+    short = int((positions < 0).any(axis=1).sum())
+    if short:
+        print(f"Note: {short} entries have fewer than {positions.shape[1]} neighbours "
+              f"below the duplicate threshold {duplicate_threshold}")
+
+    if verify:
+        mismatches = verify_against_brute_force(embeddings, scores, duplicate_threshold, verify)
+        print(f"Brute-force check on {min(verify, len(ids))} rows: {mismatches} mismatches")
+        if mismatches:
+            raise SystemExit(1)
+
+    written = write_related_table(db_path, ids, positions, scores)
+    print(f"\nWrote {written} rows to tafseer_related in {db_path}")
+    print(f"Peak RSS: {format_mb(peak_rss_mb())}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute related tafseer entries into quran_tafsir.db")
+    parser.add_argument('--input', default='assets/embeddings/tafseer_embeddings.bin')
+    parser.add_argument('--db', default='assets/db/quran_tafsir.db')
+    parser.add_argument('--k', type=int, default=10, help="neighbours per entry")
+    parser.add_argument('--block-size', type=int, default=1024, help="rows scored per matrix product")
+    parser.add_argument('--duplicate-threshold', type=float, default=DEFAULT_DUPLICATE_THRESHOLD,
+                        help="skip neighbours at or above this score (repeated passages)")
+    parser.add_argument('--verify', type=int, default=200,
+                        help="rows to check against unblocked search (0 to skip)")
+    args = parser.parse_args()
+    build_related(args.input, args.db, args.k, args.block_size, args.duplicate_threshold, args.verify)
+
+
+if __name__ == '__main__':
+    main()
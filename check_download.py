@@ -0,0 +1,149 @@
+"""
+Offline check for download_onnx_model.py.
+
+Serves generated files from a local HTTP server that supports Range
+requests and can drop a connection half way, then checks that the fetcher:
+- downloads everything and verifies the hashes
+- skips files that already match without contacting the server
+- resumes a partial .part file with a Range request
+- recovers from a dropped connection by resuming
+- discards a corrupt .part file and starts over
+- refuses a file whose hash does not match the manifest
+
+Usage:
+    python check_download.py
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from download_onnx_model import download_model
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """Serves server.files {path: bytes}; honours "Range: bytes=N-"."""
+
+    def do_GET(self):
+        server = self.server
+        data = server.files.get(self.path.lstrip('/'))
+        if data is None:
+            self.send_error(404)
+            return
+
+        start = 0
+        match = re.match(r'bytes=(\d+)-$', self.headers.get('Range', ''))
+        with server.lock:
+            server.requests.append((self.path, self.headers.get('Range')))
+            drop = self.path.lstrip('/') in server.drop_once
+            server.drop_once.discard(self.path.lstrip('/'))
+        if match:
+            start = int(match.group(1))
+            if start >= len(data):
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{len(data)}')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{len(data) - 1}/{len(data)}')
+        else:
+            self.send_response(200)
+        body = data[start:]
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        # Simulate a dropped connection: send half the body and hang up
+        self.wfile.write(body[:len(body) // 2] if drop else body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(files):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), RangeHandler)
+    server.files = files
+    server.requests = []
+    server.drop_once = set()
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def check(label, condition):
+    print(f"{'✅' if condition else '❌'} {label}")
+    return condition
+
+
+def main():
+    print("=== Offline check for download_onnx_model.py ===\n")
+    files = {
+        'onnx/model_quantized.onnx': os.urandom(3 * 1024 * 1024 + 123),
+        'tokenizer.json': json.dumps({'vocab': list(range(5000))}).encode(),
+        'vocab.txt': b'[PAD]\n[UNK]\n[CLS]\n[SEP]\n' * 100,
+    }
+    server = start_server(files)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    ok = True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, 'models')
+        manifest_path = os.path.join(tmp, 'manifest.json')
+        local_names = {'onnx/model_quantized.onnx': 'model.onnx', 'tokenizer.json': 'tokenizer.json',
+                       'vocab.txt': 'vocab.txt'}
+        manifest = {'base_url': 'http://unused.invalid', 'files': {
+            local: {'path': remote, 'sha256': hashlib.sha256(files[remote]).hexdigest()}
+            for remote, local in local_names.items()}}
+        with open(manifest_path, 'w') as f:
+            json.dump(manifest, f)
+
+        def run(**kwargs):
+            server.requests.clear()
+            return download_model(out, manifest_path, base_url, jobs=3, **kwargs)
+
+        def matches():
+            return all(open(os.path.join(out, local), 'rb').read() == files[remote]
+                       for remote, local in local_names.items())
+
+        ok &= check("fresh download succeeds and matches", run() and matches())
+
+        ok &= check("second run makes no requests", run() and not server.requests)
+
+        model = os.path.join(out, 'model.onnx')
+        data = files['onnx/model_quantized.onnx']
+        os.remove(model)
+        with open(model + '.part', 'wb') as f:
+            f.write(data[:1000000])
+        ok &= check("partial .part file is resumed with a Range request",
+                    run() and matches() and server.requests == [('/onnx/model_quantized.onnx', 'bytes=1000000-')])
+
+        os.remove(model)
+        server.drop_once.add('onnx/model_quantized.onnx')
+        ok &= check("dropped connection is resumed on retry",
+                    run() and matches() and len(server.requests) == 2
+                    and server.requests[1][1] is not None)
+
+        os.remove(model)
+        with open(model + '.part', 'wb') as f:
+            f.write(os.urandom(2000000))
+        ok &= check("corrupt .part file is discarded and downloaded again", run() and matches())
+
+        manifest['files']['vocab.txt']['sha256'] = '0' * 64
+        with open(manifest_path, 'w') as f:
+            json.dump(manifest, f)
+        os.remove(os.path.join(out, 'vocab.txt'))
+        ok &= check("hash mismatch fails and leaves no file",
+                    not run(retries=2) and not os.path.exists(os.path.join(out, 'vocab.txt'))
+                    and not os.path.exists(os.path.join(out, 'vocab.txt.part')))
+
+    server.shutdown()
+    print("\nAll checks passed" if ok else "\nSome checks failed")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Validate TAF2 embedding files (see embedding_format.py).
+
+Checks that the blocks sit where the header says and the vector block is
+64-byte aligned, that the file size, padding and CRC-32 checksums match,
+that ids are unique and metadata fits its fields, and that every vector is
+unit length within --tolerance.
+
+Usage:
+    python check_taf2.py                                   # assets/embeddings/tafseer_embeddings_taf2.bin
+    python check_taf2.py build/a.bin build/b.bin --tolerance 1e-5
+"""
+
+import argparse
+import os
+import sys
+
+from embedding_format import TAF2_NORM_TOLERANCE, read_taf2_header, validate_taf2
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate TAF2 embedding files")
+    parser.add_argument('paths', nargs='*', default=['assets/embeddings/tafseer_embeddings_taf2.bin'])
+    parser.add_argument('--tolerance', type=float, default=TAF2_NORM_TOLERANCE,
+                        help="largest accepted | |v| - 1 |")
+    args = parser.parse_args()
+
+    print("=== TAF2 validation ===")
+    failed = False
+    for path in args.paths:
+        if not os.path.exists(path):
+            print(f"\n❌ {path}: not found")
+            failed = True
+            continue
+        print(f"\n{path} ({os.path.getsize(path)} bytes)")
+        try:
+            with open(path, 'rb') as f:
+                header = read_taf2_header(f)
+            print(f"  {header['count']} entries, dim {header['dim']}, vectors at byte {header['vectors']}")
+        except ValueError:
+            pass  # reported by validate_taf2
+        problems = validate_taf2(path, args.tolerance)
+        for problem in problems:
+            print(f"  {problem}")
+        if problems:
+            print(f"❌ {path}: {len(problems)} problem(s)")
+            failed = True
+        else:
+            print(f"✅ {path}: aligned, checksums match, all vectors unit length")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+"""
+Parity check and throughput benchmark for wordpiece_tokenizer.py.
+
+Tokenizes the whole tafseer corpus (raw and HTML-cleaned, as the embedding
+build sees it), the precomputed app queries and a set of Unicode edge cases
+with WordPieceTokenizer and with the HuggingFace `tokenizers` reference,
+and fails if any token id differs.
+
+It also reports how far the app's simplified BertTokenizer
+(lib/services/bert_tokenizer.dart, ported below) drifts from the reference.
+That part is informational and never fails the check.
+
+Usage:
+    python check_tokenizer_parity.py [--db assets/db/quran_tafsir.db] [--benchmark]
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import time
+
+from generate_tafseer_embeddings import clean_html
+from query_embedding_table import QueryEmbeddingTable
+from wordpiece_tokenizer import WordPieceTokenizer, DEFAULT_TOKENIZER
+
+EDGE_CASES = [
+    "Hello, World!",
+    "Café résumé naïve façade",
+    "ΣΟΦΟΣ σοφός",
+    "İstanbul ǅ ß ﬁ",
+    "日本語のテキスト 中文",
+    "unaffable antidisestablishmentarianism xyzqqqq",
+    "a [SEP] b [CLS][MASK]",
+    "emoji 😀 ©2024 _under_score_ $5 €10 ½",
+    "tabs\tand\nnewlines\r\nand nbsp em space",
+    "zero​width‍ joiner﻿ bom \x00 nul �",
+    "Allāh ʿAlī Qurʾān Ṣalāh",
+    "بسم الله الرحمن الرحيم",
+    "﴿ بِسْمِ ٱللَّهِ ﴾ (1:1)",
+    "x" * 150,
+    "",
+    "   ",
+]
+
+APP_SPLIT_RE = re.compile(r'[\s.,;:!?()"[\]{}<>]+')
+APP_MAX_LENGTH = 128
+
+
+def app_tokenizer_ids(vocab, text):
+    """Port of BertTokenizer.encode in lib/services/bert_tokenizer.dart, without padding."""
+    unk = vocab['[UNK]']
+    ids = [vocab['[CLS]']]
+    for word in APP_SPLIT_RE.split(text.lower().strip()):
+        if not word:
+            continue
+        if word in vocab:
+            ids.append(vocab[word])
+            continue
+        pieces = []
+        start = 0
+        while start < len(word):
+            end = len(word)
+            found = None
+            while start < end:
+                piece = word[start:end] if start == 0 else '##' + word[start:end]
+                if piece in vocab:
+                    found = piece
+                    break
+                end -= 1
+            if found is not None:
+                pieces.append(found)
+                start = end
+            else:
+                if start == 0:
+                    pieces.append('[UNK]')
+                start += 1
+        ids.extend(vocab.get(p, unk) for p in (pieces or ['[UNK]']))
+    ids.append(vocab['[SEP]'])
+    if len(ids) > APP_MAX_LENGTH:
+        ids = ids[:APP_MAX_LENGTH - 1] + [vocab['[SEP]']]
+    return ids
+
+
+def load_corpus(db_path, queries_path):
+    corpus = {'edge cases': list(EDGE_CASES)}
+    if queries_path and os.path.exists(queries_path):
+        corpus['app queries'] = QueryEmbeddingTable(queries_path).queries
+    if db_path and os.path.exists(db_path):
+        conn = sqlite3.connect(db_path)
+        rows = [row[0] or '' for row in conn.execute("SELECT text FROM tafseer ORDER BY id")]
+        conn.close()
+        corpus['tafseer (raw)'] = rows
+        corpus['tafseer (cleaned)'] = [clean_html(text).strip() for text in rows]
+    else:
+        print(f"Note: {db_path} not found, tafseer corpus skipped")
+    return corpus
+
+
+def reference_tokenizer(path, max_length):
+    from tokenizers import Tokenizer
+    tokenizer = Tokenizer.from_file(path)
+    tokenizer.no_padding()
+    tokenizer.enable_truncation(max_length)
+    return tokenizer
+
+
+def check_parity(tokenizer, reference, corpus, max_examples=5):
+    """Print per-corpus mismatches; returns the total count."""
+    total = 0
+    print(f"\n{'corpus':<20} {'texts':>7} {'tokens':>10} {'mismatches':>11} {'app drift':>10}")
+    for name, texts in corpus.items():
+        expected = [enc.ids for enc in reference.encode_batch(texts)]
+        got = tokenizer.token_ids(texts)
+        bad = [i for i, (a, b) in enumerate(zip(got, expected)) if a != b]
+        # The app truncates at 128 tokens; compare it against the reference at the same length
+        drift = sum(app_tokenizer_ids(tokenizer.vocab, t) != e[:APP_MAX_LENGTH - 1] + e[-1:]
+                    if len(e) > APP_MAX_LENGTH else app_tokenizer_ids(tokenizer.vocab, t) != e
+                    for t, e in zip(texts, expected))
+        print(f"{name:<20} {len(texts):>7} {sum(map(len, expected)):>10} {len(bad):>11} {drift:>10}")
+        for i in bad[:max_examples]:
+            print(f"  {texts[i][:80]!r}\n    got      {got[i][:20]}\n    expected {expected[i][:20]}")
+        total += len(bad)
+    return total
+
+
+def benchmark(path, reference, texts, max_length, batch_size=64):
+    """Texts/s and tokens/s for cold and warm caches, batches and the reference."""
+    print(f"\n=== Tokenizer throughput: {len(texts)} texts ===")
+
+    tokenizer = WordPieceTokenizer(path, max_length)
+    start = time.perf_counter()
+    tokens = sum(len(ids) for ids in tokenizer.token_ids(texts))
+    cold = time.perf_counter() - start
+
+    tokenizer.text_ids.cache_clear()  # keep the word cache: repeated words, new texts
+    start = time.perf_counter()
+    tokenizer.token_ids(texts)
+    warm_words = time.perf_counter() - start
+
+    start = time.perf_counter()
+    tokenizer.token_ids(texts)
+    warm_texts = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(0, len(texts), batch_size):
+        tokenizer.encode_batch(texts[i:i + batch_size])
+    batched = time.perf_counter() - start
+
+    start = time.perf_counter()
+    reference.encode_batch(texts)
+    ref = time.perf_counter() - start
+
+    rows = [
+        ('wordpiece, cold caches', cold),
+        ('wordpiece, warm word cache', warm_words),
+        ('wordpiece, repeated texts', warm_texts),
+        (f'encode_batch({batch_size}), warm', batched),
+        ('tokenizers (Rust)', ref),
+    ]
+    for label, seconds in rows:
+        print(f"{label:<28} {len(texts) / seconds:>10.0f} texts/s {tokens / seconds:>12.0f} tokens/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check wordpiece_tokenizer.py against HuggingFace tokenizers")
+    parser.add_argument('--tokenizer', default=DEFAULT_TOKENIZER)
+    parser.add_argument('--db', default='assets/db/quran_tafsir.db')
+    parser.add_argument('--queries', default='assets/embeddings/query_embeddings.bin')
+    parser.add_argument('--max-length', type=int, default=256)
+    parser.add_argument('--benchmark', action='store_true', help="also measure throughput")
+    args = parser.parse_args()
+
+    print("=== WordPiece tokenizer parity ===")
+    tokenizer = WordPieceTokenizer(args.tokenizer, args.max_length)
+    reference = reference_tokenizer(args.tokenizer, args.max_length)
+    corpus = load_corpus(args.db, args.queries)
+
+    mismatches = check_parity(tokenizer, reference, corpus)
+    print("\n✅ Token ids match the reference" if not mismatches
+          else f"\n❌ {mismatches} texts differ from the reference")
+
+    if args.benchmark:
+        texts = max(corpus.values(), key=len)
+        benchmark(args.tokenizer, reference, texts, args.max_length)
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
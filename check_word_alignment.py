@@ -0,0 +1,226 @@
+"""
+Check that the word-by-word tables line up across Quran.db and QGT.db.
+
+The app joins allwords to corpus on (sura, ayah, word), so every ayah needs
+the same word numbers on both sides. QGT.db is ATTACHed to Quran.db
+(both read-only) and one set-based GROUP BY query compares, for every ayah:
+- word counts in Quran.db allwords, QGT.db corpus and Quran.db corpus
+- allwords rows with no QGT corpus row and the reverse
+- words whose Arabic text (ar1..ar5) in Quran.db corpus differs from QGT.db
+
+The ayah list is the union of the verse table and both word tables, so
+an ayah missing entirely from one side is reported too. A second query
+lists the differing words. Both go to one JSON report.
+
+Usage:
+    python check_word_alignment.py --qgt path/to/QGT.db [--db assets/db/Quran.db]
+    QGT_DB=path/to/QGT.db python check_word_alignment.py
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+VERSE_TABLE = 'al_quran_utsmani_quran'
+
+ARABIC_WORD = "COALESCE({0}.ar1,'') || COALESCE({0}.ar2,'') || COALESCE({0}.ar3,'') " \
+              "|| COALESCE({0}.ar4,'') || COALESCE({0}.ar5,'')"
+
+# Cheap per-column test first; the concatenation only runs for rows that differ
+TEXT_DIFFERS = "(m.ar1 IS NOT q.ar1 OR m.ar2 IS NOT q.ar2 OR m.ar3 IS NOT q.ar3 " \
+               "OR m.ar4 IS NOT q.ar4 OR m.ar5 IS NOT q.ar5) " \
+               f"AND {ARABIC_WORD.format('m')} != {ARABIC_WORD.format('q')}"
+
+
+def read_only_uri(path):
+    return Path(path).resolve().as_uri() + '?mode=ro'
+
+
+def connect(db_path, qgt_path):
+    conn = sqlite3.connect(read_only_uri(db_path), uri=True)
+    conn.execute("ATTACH DATABASE ? AS qgt", (read_only_uri(qgt_path),))
+    return conn
+
+
+def has_table(conn, schema, table):
+    query = f"SELECT 1 FROM {schema}.sqlite_master WHERE type='table' AND name=?"
+    return conn.execute(query, (table,)).fetchone() is not None
+
+
+def alignment_query(with_verses, with_corpus):
+    """One statement returning the number of ayahs and every ayah where anything disagrees.
+
+    Per-ayah aggregates decide which ayahs need a closer look: the counts
+    differ, or either side's word numbers are not exactly 1..n. Only those
+    ayahs are compared word by word for numbers without a partner.
+    """
+    ayahs = ["SELECT sura, ayah FROM aw", "SELECT sura, ayah FROM qc"]
+    if with_verses:
+        ayahs.append(f'SELECT sura, aya FROM main."{VERSE_TABLE}"')
+    ctes = [
+        """aw AS (
+            SELECT sura, ayah, COUNT(*) AS n, COUNT(DISTINCT word) AS d, MIN(word) AS lo, MAX(word) AS hi
+            FROM main.allwords GROUP BY sura, ayah)""",
+        """qc AS (
+            SELECT surah AS sura, ayah, COUNT(*) AS n, COUNT(DISTINCT word) AS d, MIN(word) AS lo, MAX(word) AS hi
+            FROM qgt.corpus GROUP BY surah, ayah)""",
+    ]
+    corpus_columns = "NULL AS mc_n, NULL AS td_n"
+    corpus_joins = ""
+    corpus_filter = ""
+    if with_corpus:
+        ctes += [
+            "mc AS (SELECT surah AS sura, ayah, COUNT(*) AS n FROM main.corpus GROUP BY surah, ayah)",
+            f"""td AS (
+            SELECT q.surah AS sura, q.ayah, COUNT(*) AS n FROM qgt.corpus q
+            JOIN main.corpus m ON m.surah = q.surah AND m.ayah = q.ayah AND m.word = q.word
+            WHERE {TEXT_DIFFERS} GROUP BY q.surah, q.ayah)""",
+        ]
+        corpus_columns = "COALESCE(mc.n, 0) AS mc_n, COALESCE(td.n, 0) AS td_n"
+        corpus_joins = " LEFT JOIN mc USING (sura, ayah) LEFT JOIN td USING (sura, ayah)"
+        corpus_filter = " OR mc.n IS NOT qc.n OR td.n > 0"
+
+    ctes += [
+        f"ayahs(sura, ayah) AS ({' UNION '.join(ayahs)})",
+        f"""flagged AS (
+            SELECT a.sura, a.ayah, COALESCE(aw.n, 0) AS aw_n, COALESCE(qc.n, 0) AS qc_n,
+                   {corpus_columns}
+            FROM ayahs a LEFT JOIN aw USING (sura, ayah) LEFT JOIN qc USING (sura, ayah){corpus_joins}
+            WHERE aw.n IS NOT qc.n{corpus_filter}
+               OR NOT (aw.d IS aw.n AND aw.lo IS 1 AND aw.hi IS aw.n
+                       AND qc.d IS qc.n AND qc.lo IS 1 AND qc.hi IS qc.n))""",
+        """words AS (
+            SELECT sura, ayah, word, SUM(src = 0) AS a, SUM(src = 1) AS q FROM (
+                SELECT w.sura, w.ayah, w.word, 0 AS src
+                FROM main.allwords w JOIN flagged f ON f.sura = w.sura AND f.ayah = w.ayah
+                UNION ALL
+                SELECT c.surah, c.ayah, c.word, 1
+                FROM qgt.corpus c JOIN flagged f ON f.sura = c.surah AND f.ayah = c.ayah)
+            GROUP BY sura, ayah, word)""",
+        """unmatched AS (
+            SELECT sura, ayah, SUM(q = 0) AS aw_only, SUM(a = 0) AS qc_only
+            FROM words GROUP BY sura, ayah)""",
+    ]
+    return f"""
+        WITH {', '.join(ctes)}
+        SELECT t.total, f.sura, f.ayah, f.aw_n, f.qc_n, COALESCE(u.aw_only, 0), COALESCE(u.qc_only, 0),
+               f.mc_n, f.td_n
+        FROM (SELECT COUNT(*) AS total FROM ayahs) t
+        LEFT JOIN (flagged f LEFT JOIN unmatched u USING (sura, ayah)) ON 1
+        ORDER BY f.sura, f.ayah
+    """
+
+
+# Words that differ, restricted to the ayahs (sura * 1000 + ayah, as a JSON
+# list) the first query flagged, so neither side is joined in full again
+WORD_DIFF_QUERY = f"""
+    WITH keys AS (SELECT value FROM json_each(?))
+    SELECT q.surah, q.ayah, q.word, {ARABIC_WORD.format('m')}, {ARABIC_WORD.format('q')}
+    FROM (SELECT * FROM qgt.corpus WHERE surah * 1000 + ayah IN keys) q
+    JOIN (SELECT * FROM main.corpus WHERE surah * 1000 + ayah IN keys) m
+      ON m.surah = q.surah AND m.ayah = q.ayah AND m.word = q.word
+    WHERE {TEXT_DIFFERS}
+    ORDER BY q.surah, q.ayah, q.word
+"""
+
+
+def check_alignment(db_path='assets/db/Quran.db', qgt_path=None,
+                    report_path='build/word_alignment_report.json', examples=10):
+    print("=== Word alignment: Quran.db vs QGT.db ===\n")
+    for label, path in (('Quran.db', db_path), ('QGT.db', qgt_path)):
+        if not path or not os.path.exists(path):
+            print(f"Error: {label} not found at {path}")
+            return None
+
+    conn = connect(db_path, qgt_path)
+    try:
+        for schema, table in (('main', 'allwords'), ('qgt', 'corpus')):
+            if not has_table(conn, schema, table):
+                print(f"Error: {schema}.{table} does not exist")
+                return None
+        with_verses = has_table(conn, 'main', VERSE_TABLE)
+        with_corpus = has_table(conn, 'main', 'corpus')
+
+        start = time.perf_counter()
+        rows = conn.execute(alignment_query(with_verses, with_corpus)).fetchall()
+        ayahs = rows[0][0]
+        rows = [row[1:] for row in rows if row[1] is not None]
+        keys = [sura * 1000 + ayah for sura, ayah, *_, text_diffs in rows if text_diffs]
+        word_diffs = conn.execute(WORD_DIFF_QUERY, (json.dumps(keys),)).fetchall() if keys else []
+        elapsed = time.perf_counter() - start
+    finally:
+        conn.close()
+
+    mismatches = [{
+        'sura': sura,
+        'ayah': ayah,
+        'allwords': allwords,
+        'qgt_corpus': qgt_corpus,
+        'allwords_without_corpus': aw_only,
+        'corpus_without_allwords': qc_only,
+        'quran_corpus': quran_corpus,
+        'text_diffs': text_diffs,
+    } for sura, ayah, allwords, qgt_corpus, aw_only, qc_only, quran_corpus, text_diffs in rows]
+
+    count_diffs = [m for m in mismatches if m['allwords'] != m['qgt_corpus']]
+    key_diffs = [m for m in mismatches if m['allwords_without_corpus'] or m['corpus_without_allwords']]
+    ayah_sources = ['allwords', 'qgt.corpus'] + ([VERSE_TABLE] if with_verses else [])
+    print(f"Ayahs checked: {ayahs} (from {', '.join(ayah_sources)})")
+    print(f"Query time: {elapsed * 1000:.0f} ms\n")
+    print(f"Word count differs (allwords vs QGT corpus): {len(count_diffs)} ayahs")
+    print(f"Word numbers without a partner:              {len(key_diffs)} ayahs")
+    if with_corpus:
+        corpus_diffs = [m for m in mismatches if m['quran_corpus'] != m['qgt_corpus']]
+        print(f"Quran.db corpus count differs from QGT:      {len(corpus_diffs)} ayahs")
+        print(f"Arabic word text differs from QGT:           {len(word_diffs)} words "
+              f"in {sum(1 for m in mismatches if m['text_diffs'])} ayahs")
+    else:
+        print("Quran.db has no corpus table; text comparison skipped")
+
+    for m in mismatches[:examples]:
+        print(f"  {m['sura']}:{m['ayah']}  allwords={m['allwords']} qgt={m['qgt_corpus']}"
+              f" unmatched={m['allwords_without_corpus']}/{m['corpus_without_allwords']}"
+              + (f" corpus={m['quran_corpus']} text_diffs={m['text_diffs']}" if with_corpus else ""))
+    for sura, ayah, word, ours, theirs in word_diffs[:examples]:
+        print(f"  {sura}:{ayah}:{word}  Quran.db '{ours}'  QGT.db '{theirs}'")
+
+    report = {
+        'quran_db': db_path,
+        'qgt_db': qgt_path,
+        'seconds': elapsed,
+        'ayahs': ayahs,
+        'mismatched_ayahs': len(mismatches),
+        'mismatches': mismatches,
+        'word_diffs': [{'sura': s, 'ayah': a, 'word': w, 'quran_db': ours, 'qgt_db': theirs}
+                       for s, a, w, ours, theirs in word_diffs],
+    }
+    if report_path:
+        os.makedirs(os.path.dirname(report_path) or '.', exist_ok=True)
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nReport written to {report_path}")
+
+    print("\n✅ Word tables are aligned" if not mismatches
+          else f"\n❌ {len(mismatches)} ayahs do not line up")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare allwords/corpus across Quran.db and QGT.db")
+    parser.add_argument('--db', default='assets/db/Quran.db')
+    parser.add_argument('--qgt', default=os.environ.get('QGT_DB'), help="path to QGT.db (or $QGT_DB)")
+    parser.add_argument('--report', default='build/word_alignment_report.json')
+    parser.add_argument('--examples', type=int, default=10, help="mismatches to print")
+    args = parser.parse_args()
+
+    report = check_alignment(args.db, args.qgt, args.report, args.examples)
+    if report is None or report['mismatched_ayahs']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
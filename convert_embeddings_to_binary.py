@@ -2,6 +2,9 @@
 Convert JSON embeddings to optimized binary format for Flutter.
 Reduces file size from ~92MB to ~10MB.
 
+The JSON array is parsed one element at a time and entries are written in
+vectorized blocks, so peak memory stays flat regardless of the entry count.
+
 Binary Format:
 - Magic: "TAF1" (4 bytes)
 - Count: Uint32 (4 bytes)
@@ -11,70 +14,341 @@ Binary Format:
   - Surah: Uint8 (1 byte)
   - Ayah: Uint16 (2 bytes) (Ayah > 255 exists)
   - Embedding: 384 * Float32 (1536 bytes)
+
+--format f16 / int8 writes the compact TAH1 / TAQ1 variants described in
+embedding_format.py instead. Those builds are checked against float32
+brute-force search (recall@10 and top-1 agreement) and rejected if they
+fall below the configured thresholds.
+
+--format taf2 writes the columnar TAF2 layout (aligned, normalized vectors)
+and validates the result with embedding_format.validate_taf2.
 """
 
+import argparse
 import json
-import struct
 import os
+import time
+import numpy as np
+
+from bench_utils import peak_rss_mb, format_mb
+from embedding_format import (write_taf1_header, patch_taf1_count, pack_taf1_records,
+                              write_embeddings, read_embeddings, write_taf2, read_taf2,
+                              validate_taf2)
+from embedding_search import top_k
+from query_embedding_table import QueryEmbeddingTable
+
+READ_CHUNK_SIZE = 1 << 20   # characters read from the JSON file at a time
+BLOCK_SIZE = 1024           # entries packed per write
+
+DEFAULT_MIN_RECALL = 0.95   # recall@10 of quantized vs float32 search
+DEFAULT_MIN_TOP1 = 0.95     # fraction of queries with the same best match
+
+
+def iter_json_array(path, chunk_size=READ_CHUNK_SIZE):
+    """Yield the elements of a top-level JSON array without loading the file."""
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buf = f.read(chunk_size)
+        eof = not buf
+        pos = 0
 
-def convert_to_binary(json_path='assets/embeddings/tafseer_embeddings.json', output_path='assets/embeddings/tafseer_embeddings.bin'):
+        def skip(pos, chars):
+            while pos < len(buf) and buf[pos] in chars:
+                pos += 1
+            return pos
+
+        pos = skip(pos, ' \t\r\n')
+        if pos >= len(buf) or buf[pos] != '[':
+            raise ValueError(f"{path} does not contain a JSON array")
+        pos += 1
+
+        while True:
+            pos = skip(pos, ' \t\r\n,')
+            if pos < len(buf) and buf[pos] == ']':
+                return
+            try:
+                if pos >= len(buf):
+                    raise ValueError("need more data")
+                value, end = decoder.raw_decode(buf, pos)
+            except ValueError:
+                if eof:
+                    raise ValueError(f"Truncated or malformed JSON in {path}")
+                # Element crosses the chunk boundary: drop consumed text and refill
+                more = f.read(chunk_size)
+                eof = not more
+                buf = buf[pos:] + more
+                pos = 0
+                continue
+            yield value
+            pos = end
+
+
+def _write_block(f, block):
+    ids = [int(e['id']) for e in block]
+    surahs = [int(e['surah']) for e in block]
+    ayahs = [int(e['ayah']) for e in block]
+    embeddings = np.array([e['embedding'] for e in block], dtype=np.float64)
+    f.write(pack_taf1_records(ids, surahs, ayahs, embeddings).tobytes())
+
+
+def convert_to_binary(json_path='assets/embeddings/tafseer_embeddings.json',
+                      output_path='assets/embeddings/tafseer_embeddings.bin',
+                      block_size=BLOCK_SIZE):
     print(f"=== Converting {json_path} to Binary ===\n")
-    
+
     if not os.path.exists(json_path):
         print(f"Error: {json_path} not found!")
         return
 
-    # Load JSON
-    print("Loading JSON (this might take a moment)...")
-    with open(json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    count = len(data)
-    print(f"Loaded {count} entries.")
-    
+    start = time.perf_counter()
+    count = 0
+    dim = None
+    block = []
+
+    print("Streaming JSON entries...")
+    with open(output_path, 'wb') as f:
+        # Count is unknown until the stream ends; patched afterwards
+        for entry in iter_json_array(json_path):
+            if dim is None:
+                dim = len(entry['embedding'])
+                print(f"Embedding dimension: {dim}")
+                write_taf1_header(f, 0, dim)
+            elif len(entry['embedding']) != dim:
+                raise ValueError(f"Entry {entry.get('id')} has dimension "
+                                 f"{len(entry['embedding'])}, expected {dim}")
+
+            block.append(entry)
+            if len(block) == block_size:
+                _write_block(f, block)
+                count += len(block)
+                block = []
+                if count % (block_size * 4) == 0:
+                    print(f"  Processed {count}")
+
+        if block:
+            _write_block(f, block)
+            count += len(block)
+
+        if dim is not None:
+            patch_taf1_count(f, count)
+
     if count == 0:
+        os.remove(output_path)
         print("No data to convert.")
         return
 
-    # Helper to check embedding dim
-    dim = len(data[0]['embedding'])
-    print(f"Embedding dimension: {dim}")
+    elapsed = time.perf_counter() - start
+    print(f"\nconversion complete! {count} entries written.")
 
-    # Open binary file
-    with open(output_path, 'wb') as f:
-        # Header
-        f.write(b'TAF1')            # Magic
-        f.write(struct.pack('<I', count)) # Count (Little Endian Uint32)
-        f.write(struct.pack('<I', dim))   # Dim (Little Endian Uint32)
-        
-        print("Writing binary data...")
-        for i, entry in enumerate(data):
-            # Fields
-            id_val = int(entry['id'])
-            surah = int(entry['surah'])
-            ayah = int(entry['ayah'])
-            embedding = entry['embedding']
-            
-            # Write metadata
-            f.write(struct.pack('<H', id_val))  # ID (Uint16)
-            f.write(struct.pack('<B', surah))   # Surah (Uint8)
-            f.write(struct.pack('<H', ayah))    # Ayah (Uint16)
-            
-            # Write embedding (384 floats)
-            # 'f' is standard float (32-bit)
-            f.write(struct.pack(f'<{dim}f', *embedding))
-            
-            if (i + 1) % 1000 == 0:
-                print(f"  Processed {i + 1}/{count}")
-
-    print(f"\nconversion complete!")
-    
     json_size = os.path.getsize(json_path) / (1024 * 1024)
     bin_size = os.path.getsize(output_path) / (1024 * 1024)
-    
+
     print(f"Original JSON: {json_size:.2f} MB")
     print(f"Binary Output: {bin_size:.2f} MB")
     print(f"Reduction: {(1 - bin_size/json_size)*100:.1f}%")
+    print(f"Time: {elapsed:.2f} s ({json_size / max(elapsed, 1e-9):.1f} MB/s, "
+          f"{count / max(elapsed, 1e-9):.0f} entries/s)")
+    print(f"Peak RSS: {format_mb(peak_rss_mb())}")
+
+
+def load_source(path, block_size=BLOCK_SIZE):
+    """Load entries from a JSON dump or a TAF1 file into arrays.
+
+    Returns (ids, surahs, ayahs, embeddings).
+    """
+    if not path.endswith('.json'):
+        fmt, ids, surahs, ayahs, embeddings = read_embeddings(path)
+        if fmt not in ('f32', 'taf2'):
+            raise ValueError(f"{path} is already quantized ({fmt}); convert from float32")
+        return ids, surahs, ayahs, embeddings
+
+    ids, surahs, ayahs, blocks, block = [], [], [], [], []
+    for entry in iter_json_array(path):
+        ids.append(int(entry['id']))
+        surahs.append(int(entry['surah']))
+        ayahs.append(int(entry['ayah']))
+        block.append(entry['embedding'])
+        if len(block) == block_size:
+            blocks.append(np.array(block, dtype=np.float32))
+            block = []
+    if block:
+        blocks.append(np.array(block, dtype=np.float32))
+    embeddings = np.concatenate(blocks) if blocks else np.empty((0, 0), dtype=np.float32)
+    return np.array(ids), np.array(surahs), np.array(ayahs), embeddings
+
+
+def load_eval_queries(embeddings, query_path='assets/embeddings/query_embeddings.bin',
+                      sample=500, seed=0):
+    """Queries for the recall check.
+
+    Returns (real query embeddings, indices of sampled entries). Sampled
+    entries are used as queries with themselves excluded from the results.
+    """
+    queries = np.empty((0, embeddings.shape[1]), dtype=np.float32)
+    if query_path and os.path.exists(query_path):
+        if query_path.endswith('.json'):
+            queries = np.array([q['embedding'] for q in iter_json_array(query_path)], dtype=np.float32)
+        else:
+            queries = np.asarray(QueryEmbeddingTable(query_path).matrix, dtype=np.float32)
+        if queries.ndim != 2 or queries.shape[1] != embeddings.shape[1]:
+            queries = np.empty((0, embeddings.shape[1]), dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(len(embeddings), size=min(sample, len(embeddings)), replace=False)
+    return queries, picks
+
+
+def _without_self(indices, own, k):
+    """Drop each row's own index from its result list and keep the first k."""
+    keep = indices != own[:, None]
+    # Rows that did not contain their own index lose their last entry instead
+    keep[keep.all(axis=1), -1] = False
+    return indices[keep].reshape(len(indices), -1)[:, :k]
+
+
+def measure_recall(baseline, candidate, queries, k=10, exclude=None):
+    """Recall@k and top-1 agreement of candidate search vs baseline search.
+
+    exclude gives, per query, a corpus index left out of both result lists
+    (the query's own row when sampled queries are taken from the corpus).
+    """
+    if exclude is None:
+        expected, _ = top_k(baseline, queries, k)
+        found, _ = top_k(candidate, queries, k)
+    else:
+        expected = _without_self(top_k(baseline, queries, k + 1)[0], exclude, k)
+        found = _without_self(top_k(candidate, queries, k + 1)[0], exclude, k)
+    overlap = [len(set(a) & set(b)) for a, b in zip(expected, found)]
+    recall = float(np.mean(overlap)) / expected.shape[1]
+    top1 = float(np.mean(expected[:, 0] == found[:, 0]))
+    return recall, top1
+
+
+def convert_quantized(input_path, output_path, fmt, min_recall=DEFAULT_MIN_RECALL,
+                      min_top1=DEFAULT_MIN_TOP1, query_path='assets/embeddings/query_embeddings.bin'):
+    """Write a compact format and verify search quality before keeping it."""
+    print(f"=== Converting {input_path} to {fmt} ===\n")
+
+    if not os.path.exists(input_path):
+        print(f"Error: {input_path} not found!")
+        return False
+
+    start = time.perf_counter()
+    ids, surahs, ayahs, embeddings = load_source(input_path)
+    if len(ids) == 0:
+        print("No data to convert.")
+        return False
+    print(f"Loaded {len(ids)} entries, dimension {embeddings.shape[1]}")
+
+    tmp_path = output_path + '.tmp'
+    write_embeddings(tmp_path, ids, surahs, ayahs, embeddings, fmt)
+    _, _, _, _, decoded = read_embeddings(tmp_path)
+
+    queries, picks = load_eval_queries(embeddings, query_path)
+    checks = []
+    if len(queries):
+        checks.append((f"{len(queries)} real queries",)
+                      + measure_recall(embeddings, decoded, queries))
+    checks.append((f"{len(picks)} sampled entries (self excluded)",)
+                  + measure_recall(embeddings, decoded, embeddings[picks], exclude=picks))
+    print("\nRecall check:")
+    for name, recall, top1 in checks:
+        print(f"  {name}: recall@10 {recall:.4f}, top-1 agreement {top1:.4f}")
+    print(f"  thresholds (on {checks[0][0]}): recall@10 {min_recall}, top-1 {min_top1}")
+    print(f"  max abs error: {float(np.abs(decoded - embeddings).max()):.2e}")
+
+    # Real queries decide when present; sampled entries only stand in without them
+    _, recall, top1 = checks[0]
+
+    if recall < min_recall or top1 < min_top1:
+        os.remove(tmp_path)
+        print(f"\n✗ {fmt} build rejected: search quality below threshold")
+        return False
+
+    os.replace(tmp_path, output_path)
+    elapsed = time.perf_counter() - start
+    f32_size = (12 + len(ids) * (5 + 4 * embeddings.shape[1])) / (1024 * 1024)
+    out_size = os.path.getsize(output_path) / (1024 * 1024)
+    print(f"\n✓ Wrote {output_path}")
+    print(f"Float32 size: {f32_size:.2f} MB")
+    print(f"{fmt} size: {out_size:.2f} MB ({(1 - out_size / f32_size) * 100:.1f}% smaller)")
+    print(f"Time: {elapsed:.2f} s, peak RSS: {format_mb(peak_rss_mb())}")
+    return True
+
+
+def convert_taf2(input_path, output_path):
+    """Write the columnar TAF2 layout and validate it before keeping it."""
+    print(f"=== Converting {input_path} to TAF2 ===\n")
+
+    if not os.path.exists(input_path):
+        print(f"Error: {input_path} not found!")
+        return False
+
+    start = time.perf_counter()
+    ids, surahs, ayahs, embeddings = load_source(input_path)
+    if len(ids) == 0:
+        print("No data to convert.")
+        return False
+    norms = np.linalg.norm(embeddings.astype(np.float64), axis=1)
+    print(f"Loaded {len(ids)} entries, dimension {embeddings.shape[1]}, "
+          f"norms {norms.min():.4f}..{norms.max():.4f}")
+
+    tmp_path = output_path + '.tmp'
+    try:
+        write_taf2(tmp_path, ids, surahs, ayahs, embeddings)
+    except ValueError as e:
+        print(f"\n✗ TAF2 build rejected: {e}")
+        return False
+    problems = validate_taf2(tmp_path)
+    _, _, _, vectors = read_taf2(tmp_path)
+    expected = embeddings / norms[:, None]
+    error = float(np.abs(vectors - expected).max())
+    print(f"Max abs difference from the normalized source: {error:.2e}")
+    del vectors
+
+    if problems:
+        os.remove(tmp_path)
+        for problem in problems:
+            print(f"  {problem}")
+        print("\n✗ TAF2 build rejected: validation failed")
+        return False
+
+    os.replace(tmp_path, output_path)
+    print(f"\n✓ Wrote {output_path} ({os.path.getsize(output_path) / (1024 * 1024):.2f} MB)")
+    print(f"Time: {time.perf_counter() - start:.2f} s, peak RSS: {format_mb(peak_rss_mb())}")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--input', default='assets/embeddings/tafseer_embeddings.json',
+                        help="JSON dump, or a TAF1 .bin when --format is f16/int8/taf2")
+    parser.add_argument('--output', help="defaults to assets/embeddings/tafseer_embeddings[_FORMAT].bin")
+    parser.add_argument('--format', choices=['f32', 'f16', 'int8', 'taf2'], default='f32')
+    parser.add_argument('--block-size', type=int, default=BLOCK_SIZE,
+                        help="entries packed per write")
+    parser.add_argument('--min-recall', type=float, default=DEFAULT_MIN_RECALL,
+                        help="minimum recall@10 against float32 search")
+    parser.add_argument('--min-top1', type=float, default=DEFAULT_MIN_TOP1,
+                        help="minimum top-1 agreement against float32 search")
+    parser.add_argument('--queries', default='assets/embeddings/query_embeddings.bin',
+                        help="query embeddings used by the recall check")
+    args = parser.parse_args()
+
+    if args.format == 'f32':
+        output = args.output or 'assets/embeddings/tafseer_embeddings.bin'
+        convert_to_binary(args.input, output, args.block_size)
+        return
+
+    output = args.output or f'assets/embeddings/tafseer_embeddings_{args.format}.bin'
+    if args.format == 'taf2':
+        if not convert_taf2(args.input, output):
+            raise SystemExit(1)
+        return
+
+    if not convert_quantized(args.input, output, args.format,
+                             args.min_recall, args.min_top1, args.queries):
+        raise SystemExit(1)
+
 
 if __name__ == '__main__':
-    convert_to_binary()
+    main()
@@ -1,53 +1,189 @@
 """
 Download pre-exported ONNX model from HuggingFace.
 No Python version restrictions - just downloads files!
+
+Files, their source paths and pinned SHA-256 hashes are listed in
+model_manifest.json. Downloads run in parallel, go to "<name>.part" first,
+resume with HTTP Range requests after an interrupted transfer, and only
+replace the real file once the hash matches. Files that already match
+their pinned hash are skipped.
+
+A file with no pinned hash ("sha256": null) is downloaded and its hash is
+printed; --pin records it in the manifest after you have checked the file.
+
+Usage:
+    python download_onnx_model.py
+    python download_onnx_model.py --mirror http://localhost:8000/models --jobs 6
+    python download_onnx_model.py --pin
 """
 
-import urllib.request
-import os
+import argparse
+import hashlib
+import http.client
 import json
+import os
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+MANIFEST_PATH = 'model_manifest.json'
+CHUNK_SIZE = 1 << 16
+
+
+def sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def format_size(size):
+    if size > 1024 * 1024:
+        return f"{size / (1024*1024):.2f} MB"
+    return f"{size / 1024:.2f} KB"
+
+
+def load_manifest(path=MANIFEST_PATH):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def fetch(url, part_path, timeout=30):
+    """Download url into part_path, resuming from its current size.
+
+    Returns the number of bytes received in this call.
+    """
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    request = urllib.request.Request(url)
+    if offset:
+        request.add_header('Range', f'bytes={offset}-')
+
+    try:
+        response = urllib.request.urlopen(request, timeout=timeout)
+    except urllib.error.HTTPError as e:
+        if e.code == 416 and offset:
+            return 0  # nothing left to fetch; the hash check decides
+        raise
 
-MODEL_FILES = {
-    # From Xenova/all-MiniLM-L6-v2 - Quantized
-    'model.onnx': 'https://huggingface.co/Xenova/all-MiniLM-L6-v2/resolve/main/onnx/model_quantized.onnx',
-    'tokenizer.json': 'https://huggingface.co/Xenova/all-MiniLM-L6-v2/resolve/main/tokenizer.json',
-    'config.json': 'https://huggingface.co/Xenova/all-MiniLM-L6-v2/resolve/main/config.json',
-    'special_tokens_map.json': 'https://huggingface.co/Xenova/all-MiniLM-L6-v2/resolve/main/special_tokens_map.json',
-    'tokenizer_config.json': 'https://huggingface.co/Xenova/all-MiniLM-L6-v2/resolve/main/tokenizer_config.json',
-    'vocab.txt': 'https://huggingface.co/Xenova/all-MiniLM-L6-v2/resolve/main/vocab.txt',
-}
-
-def download_model(output_dir='assets/models'):
-    """Download all model files from HuggingFace."""
+    with response:
+        # A 200 to a Range request means the server sent the whole file again
+        mode = 'ab' if offset and response.status == 206 else 'wb'
+        received = 0
+        with open(part_path, mode) as f:
+            for chunk in iter(lambda: response.read(CHUNK_SIZE), b''):
+                f.write(chunk)
+                received += len(chunk)
+        # A dropped connection ends the stream early instead of raising
+        length = response.headers.get('Content-Length')
+        if length is not None and received < int(length):
+            raise http.client.IncompleteRead(b'', int(length) - received)
+    return received
+
+
+def download_file(name, entry, base_url, output_dir, retries=3, force=False):
+    """Fetch and verify one file. Returns a result dict."""
+    path = os.path.join(output_dir, name)
+    part_path = path + '.part'
+    expected = entry.get('sha256')
+    url = f"{base_url.rstrip('/')}/{entry['path']}"
+
+    if os.path.exists(path) and not force:
+        if expected is None:
+            return {'name': name, 'status': 'exists (unpinned)', 'sha256': sha256_file(path)}
+        if sha256_file(path) == expected:
+            return {'name': name, 'status': 'up to date', 'sha256': expected}
+
+    received = 0
+    start = time.perf_counter()
+    for attempt in range(1, retries + 1):
+        try:
+            received += fetch(url, part_path)
+        except (urllib.error.URLError, http.client.HTTPException, OSError) as e:
+            if attempt == retries:
+                return {'name': name, 'status': 'failed', 'error': str(e)}
+            time.sleep(min(2 ** attempt, 10))
+            continue
+
+        actual = sha256_file(part_path)
+        if expected is None or actual == expected:
+            break
+        # Corrupt or stale partial data: start the next attempt from scratch
+        os.remove(part_path)
+        if attempt == retries:
+            return {'name': name, 'status': 'hash mismatch', 'sha256': actual, 'expected': expected}
+
+    os.replace(part_path, path)
+    return {
+        'name': name,
+        'status': 'downloaded' if expected else 'downloaded (unpinned)',
+        'sha256': actual,
+        'bytes': received,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def download_model(output_dir='assets/models', manifest_path=MANIFEST_PATH, mirror=None,
+                   jobs=4, retries=3, force=False, pin=False):
+    """Download all model files from HuggingFace (or a mirror)."""
     print("=== Downloading ONNX Model from HuggingFace ===\n")
-    
+
+    manifest = load_manifest(manifest_path)
+    base_url = mirror or manifest['base_url']
+    files = manifest['files']
     os.makedirs(output_dir, exist_ok=True)
-    
-    for filename, url in MODEL_FILES.items():
-        filepath = os.path.join(output_dir, filename)
-        print(f"Downloading {filename}...")
-        
-        try:
-            urllib.request.urlretrieve(url, filepath)
-            size = os.path.getsize(filepath)
-            if size > 1024 * 1024:
-                print(f"  ✓ {size / (1024*1024):.2f} MB")
-            else:
-                print(f"  ✓ {size / 1024:.2f} KB")
-        except Exception as e:
-            print(f"  ✗ Failed: {e}")
-            return False
-    
+    print(f"Source: {base_url} ({len(files)} files, {jobs} parallel)\n")
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        results = list(pool.map(
+            lambda item: download_file(item[0], item[1], base_url, output_dir, retries, force),
+            files.items()))
+
+    ok = True
+    for result in results:
+        name = result['name']
+        status = result['status']
+        if status in ('failed', 'hash mismatch'):
+            ok = False
+            detail = result.get('error') or f"got {result['sha256'][:16]}, expected {result['expected'][:16]}"
+            print(f"  ✗ {name}: {status} ({detail})")
+            continue
+        size = format_size(os.path.getsize(os.path.join(output_dir, name)))
+        extra = ''
+        if 'bytes' in result:
+            extra = f", {format_size(result['bytes'])} in {result['seconds']:.1f} s"
+        print(f"  ✓ {name}: {status} ({size}{extra})")
+        if files[name].get('sha256') is None:
+            print(f"    sha256 {result['sha256']}")
+            if pin:
+                files[name]['sha256'] = result['sha256']
+
+    if pin and ok:
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+            f.write('\n')
+        print(f"\nPinned hashes written to {manifest_path}")
+
+    if not ok:
+        print("\n=== Download Failed ===")
+        return False
+
     print("\n=== Download Complete! ===")
-    print(f"\nFiles saved to {output_dir}:")
-    for f in os.listdir(output_dir):
-        size = os.path.getsize(os.path.join(output_dir, f))
-        if size > 1024 * 1024:
-            print(f"  - {f} ({size / (1024*1024):.2f} MB)")
-        else:
-            print(f"  - {f} ({size / 1024:.2f} KB)")
-    
     return True
 
+
 if __name__ == '__main__':
-    download_model()
+    parser = argparse.ArgumentParser(description="Download the ONNX model files listed in model_manifest.json")
+    parser.add_argument('--output-dir', default='assets/models')
+    parser.add_argument('--manifest', default=MANIFEST_PATH)
+    parser.add_argument('--mirror', default=os.environ.get('MODEL_MIRROR'),
+                        help="base URL to use instead of the manifest's (or $MODEL_MIRROR)")
+    parser.add_argument('--jobs', type=int, default=4, help="parallel downloads")
+    parser.add_argument('--retries', type=int, default=3, help="attempts per file, resuming each time")
+    parser.add_argument('--force', action='store_true', help="download even if the local file matches")
+    parser.add_argument('--pin', action='store_true', help="record hashes of unpinned files in the manifest")
+    args = parser.parse_args()
+    if not download_model(args.output_dir, args.manifest, args.mirror, args.jobs,
+                          args.retries, args.force, args.pin):
+        raise SystemExit(1)
@@ -0,0 +1,69 @@
+"""
+Persistent embedding cache for the tafseer build.
+
+Vectors are stored in a sidecar SQLite file keyed by SHA-256 of the model
+identity plus the cleaned text, so a rebuild only sends new or edited rows
+through the encoder.
+"""
+
+import hashlib
+import os
+import sqlite3
+import numpy as np
+
+LOOKUP_CHUNK = 500  # keys per SELECT ... IN (...), below SQLite's variable limit
+
+
+class EmbeddingCache:
+    """SQLite-backed map from (model, text) to a float32 vector."""
+
+    def __init__(self, path, model_id):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.model_id = model_id
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                dim INTEGER NOT NULL,
+                vector BLOB NOT NULL
+            ) WITHOUT ROWID
+        """)
+
+    def key(self, text):
+        """Cache key for a cleaned text under this cache's model."""
+        h = hashlib.sha256()
+        h.update(self.model_id.encode('utf-8'))
+        h.update(b'\x00')
+        h.update(text.encode('utf-8'))
+        return h.hexdigest()
+
+    def get_many(self, keys):
+        """Return {key: vector} for the keys present in the cache."""
+        found = {}
+        keys = list(keys)
+        for i in range(0, len(keys), LOOKUP_CHUNK):
+            chunk = keys[i:i + LOOKUP_CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT key, dim, vector FROM embeddings WHERE key IN ({placeholders})",
+                chunk,
+            )
+            for key, dim, blob in rows:
+                found[key] = np.frombuffer(blob, dtype='<f4', count=dim)
+        return found
+
+    def put_many(self, keys, vectors):
+        """Store one vector per key, replacing any previous value."""
+        vectors = np.asarray(vectors, dtype='<f4')
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, dim, vector) VALUES (?, ?, ?)",
+                ((key, vec.shape[0], vec.tobytes()) for key, vec in zip(keys, vectors)),
+            )
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
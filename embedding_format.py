@@ -0,0 +1,357 @@
+"""
+Shared helpers for the binary embedding formats read by the Flutter app.
+
+TAF1 layout (little endian, no padding):
+- Magic: "TAF1" (4 bytes)
+- Count: Uint32 (4 bytes)
+- Dim: Uint32 (4 bytes)
+- Entries:
+  - ID: Uint16 (2 bytes)
+  - Surah: Uint8 (1 byte)
+  - Ayah: Uint16 (2 bytes)
+  - Embedding: Dim * Float32
+
+Compact variants share the same header and metadata fields:
+- "TAH1": Embedding is Dim * Float16
+- "TAQ1": Scale: Float32, then Embedding: Dim * Int8 (value = int8 * scale)
+
+Records are described with a packed NumPy structured dtype, so whole blocks
+of entries can be written with a single tobytes() call instead of one
+struct.pack per field.
+
+TAF2 is a columnar float32 layout (little endian). Vectors are
+L2-normalized when written and stored as one (count, dim) block starting on
+a 64-byte boundary, so readers can map it as a matrix without copying:
+- Header (64 bytes, zero padded):
+  - Magic: "TAF2" (4 bytes)
+  - Count, Dim, Flags (bit 0: vectors normalized): Uint32 each
+  - Offsets of the ids, ayahs, surahs and vector blocks: Uint32 each
+  - CRC-32 of the metadata bytes [64, vectors offset), CRC-32 of the vectors: Uint32 each
+- IDs: Count * Uint16
+- Ayahs: Count * Uint16
+- Surahs: Count * Uint8, then zero padding to the next 64-byte boundary
+- Vectors: Count * Dim * Float32
+"""
+
+import os
+import struct
+import zlib
+import numpy as np
+
+TAF1_MAGIC = b'TAF1'
+TAF1_HEADER = struct.Struct('<4sII')
+
+# Magic bytes of each vector encoding
+FORMATS = {
+    'f32': b'TAF1',
+    'f16': b'TAH1',
+    'int8': b'TAQ1',
+}
+
+# Limits of the packed metadata fields
+MAX_ID = 0xFFFF
+MAX_SURAH = 0xFF
+MAX_AYAH = 0xFFFF
+
+TAF2_MAGIC = b'TAF2'
+TAF2_HEADER = struct.Struct('<4s9I')
+TAF2_HEADER_SIZE = 64
+TAF2_ALIGN = 64
+TAF2_NORMALIZED = 1
+# Largest | |v| - 1 | accepted for a stored vector (float32 rounding is ~1e-7)
+TAF2_NORM_TOLERANCE = 1e-4
+
+_METADATA_FIELDS = [
+    ('id', '<u2'),
+    ('surah', 'u1'),
+    ('ayah', '<u2'),
+]
+
+
+def record_dtype(fmt, dim):
+    """Packed record dtype for one entry of the given format."""
+    if fmt == 'f32':
+        return np.dtype(_METADATA_FIELDS + [('embedding', '<f4', (dim,))])
+    if fmt == 'f16':
+        return np.dtype(_METADATA_FIELDS + [('embedding', '<f2', (dim,))])
+    if fmt == 'int8':
+        return np.dtype(_METADATA_FIELDS + [('scale', '<f4'), ('embedding', 'i1', (dim,))])
+    raise ValueError(f"Unknown embedding format: {fmt}")
+
+
+def taf1_record_dtype(dim):
+    """Packed record dtype for one TAF1 entry (5 + 4 * dim bytes)."""
+    return record_dtype('f32', dim)
+
+
+def write_taf1_header(f, count, dim, magic=TAF1_MAGIC):
+    """Write the 12-byte header at the current position."""
+    f.write(TAF1_HEADER.pack(magic, count, dim))
+
+
+def patch_taf1_count(f, count):
+    """Rewrite the entry count of a file opened for writing."""
+    pos = f.tell()
+    f.seek(4)
+    f.write(struct.pack('<I', count))
+    f.seek(pos)
+
+
+def read_header(f):
+    """Read the 12-byte header of any supported format. Returns (fmt, count, dim)."""
+    magic, count, dim = TAF1_HEADER.unpack(f.read(TAF1_HEADER.size))
+    for fmt, fmt_magic in FORMATS.items():
+        if magic == fmt_magic:
+            return fmt, count, dim
+    raise ValueError(f"Invalid magic bytes: {magic!r}")
+
+
+def read_taf1_header(f):
+    """Read and validate a TAF1 header. Returns (count, dim)."""
+    fmt, count, dim = read_header(f)
+    if fmt != 'f32':
+        raise ValueError(f"Expected TAF1, found {FORMATS[fmt]!r}")
+    return count, dim
+
+
+def check_metadata_ranges(ids, surahs, ayahs):
+    """Raise if any metadata value does not fit its packed field."""
+    for name, values, limit in (('id', ids, MAX_ID),
+                                ('surah', surahs, MAX_SURAH),
+                                ('ayah', ayahs, MAX_AYAH)):
+        values = np.asarray(values)
+        if values.size and (values.min() < 0 or values.max() > limit):
+            raise ValueError(f"{name} out of range for TAF1 (0..{limit})")
+
+
+def quantize_int8(embeddings):
+    """Symmetric per-vector int8 quantization. Returns (codes, scales)."""
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    scales = np.abs(embeddings).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.rint(embeddings / scales[:, None]).clip(-127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def pack_records(fmt, ids, surahs, ayahs, embeddings):
+    """Pack parallel metadata arrays and an (n, dim) matrix into records."""
+    embeddings = np.asarray(embeddings)
+    if embeddings.ndim != 2:
+        raise ValueError("embeddings must be a 2-D matrix")
+    check_metadata_ranges(ids, surahs, ayahs)
+
+    records = np.empty(len(embeddings), dtype=record_dtype(fmt, embeddings.shape[1]))
+    records['id'] = ids
+    records['surah'] = surahs
+    records['ayah'] = ayahs
+    if fmt == 'int8':
+        records['embedding'], records['scale'] = quantize_int8(embeddings)
+    else:
+        records['embedding'] = embeddings
+    return records
+
+
+def pack_taf1_records(ids, surahs, ayahs, embeddings):
+    """Pack parallel metadata arrays and an (n, dim) matrix into TAF1 records."""
+    return pack_records('f32', ids, surahs, ayahs, np.asarray(embeddings, dtype='<f4'))
+
+
+def decode_embeddings(records, fmt):
+    """Float32 (n, dim) matrix from packed records of the given format."""
+    if fmt == 'int8':
+        return records['embedding'].astype(np.float32) * records['scale'][:, None]
+    return records['embedding'].astype(np.float32)
+
+
+def write_embeddings(output_path, ids, surahs, ayahs, embeddings, fmt='f32'):
+    """Write a complete embedding file from in-memory arrays."""
+    records = pack_records(fmt, ids, surahs, ayahs, embeddings)
+    dim = records.dtype['embedding'].shape[0]
+    with open(output_path, 'wb') as f:
+        write_taf1_header(f, len(records), dim, FORMATS[fmt])
+        f.write(records.tobytes())
+    return len(records)
+
+
+def write_taf1(output_path, ids, surahs, ayahs, embeddings):
+    """Write a complete TAF1 file from in-memory arrays."""
+    return write_embeddings(output_path, ids, surahs, ayahs,
+                            np.asarray(embeddings, dtype='<f4'), 'f32')
+
+
+def read_records(path):
+    """Read the raw records of an embedding file. Returns (fmt, records)."""
+    with open(path, 'rb') as f:
+        fmt, count, dim = read_header(f)
+        records = np.fromfile(f, dtype=record_dtype(fmt, dim), count=count)
+    if len(records) != count:
+        raise ValueError(f"{path} is truncated: {len(records)} of {count} entries")
+    return fmt, records
+
+
+def read_embeddings(path):
+    """Read any supported embedding file.
+
+    Returns (fmt, ids, surahs, ayahs, embeddings) with embeddings decoded
+    to a float32 matrix. TAF2 files report fmt 'taf2'.
+    """
+    if is_taf2(path):
+        ids, surahs, ayahs, embeddings = read_taf2(path, mmap=False)
+        return ('taf2', ids.astype(np.int64), surahs.astype(np.int64),
+                ayahs.astype(np.int64), embeddings)
+    fmt, records = read_records(path)
+    return (fmt, records['id'].astype(np.int64), records['surah'].astype(np.int64),
+            records['ayah'].astype(np.int64), decode_embeddings(records, fmt))
+
+
+def _align(offset, alignment=TAF2_ALIGN):
+    return -(-offset // alignment) * alignment
+
+
+def taf2_layout(count, dim):
+    """Byte offsets of each TAF2 block and the total file size."""
+    layout = {'ids': TAF2_HEADER_SIZE}
+    layout['ayahs'] = layout['ids'] + 2 * count
+    layout['surahs'] = layout['ayahs'] + 2 * count
+    layout['vectors'] = _align(layout['surahs'] + count)
+    layout['size'] = layout['vectors'] + 4 * count * dim
+    return layout
+
+
+def normalize_rows(embeddings):
+    """L2-normalize each row in float64 and return float32. Raises on zero or non-finite rows."""
+    embeddings = np.asarray(embeddings, dtype=np.float64)
+    if embeddings.ndim != 2:
+        raise ValueError("embeddings must be a 2-D matrix")
+    if not np.isfinite(embeddings).all():
+        raise ValueError("embeddings contain NaN or infinite values")
+    norms = np.linalg.norm(embeddings, axis=1)
+    if (norms == 0).any():
+        raise ValueError(f"{int((norms == 0).sum())} zero vectors cannot be normalized")
+    return (embeddings / norms[:, None]).astype('<f4')
+
+
+def write_taf2(output_path, ids, surahs, ayahs, embeddings):
+    """Write a TAF2 file, normalizing the vectors. Returns the entry count."""
+    vectors = normalize_rows(embeddings)
+    check_metadata_ranges(ids, surahs, ayahs)
+    count, dim = vectors.shape
+    if not (len(ids) == len(surahs) == len(ayahs) == count):
+        raise ValueError("metadata arrays and embeddings differ in length")
+    layout = taf2_layout(count, dim)
+
+    metadata = bytearray(layout['vectors'] - TAF2_HEADER_SIZE)
+    for name, dtype, values in (('ids', '<u2', ids), ('ayahs', '<u2', ayahs), ('surahs', 'u1', surahs)):
+        start = layout[name] - TAF2_HEADER_SIZE
+        column = np.asarray(values).astype(dtype).tobytes()
+        metadata[start:start + len(column)] = column
+    vector_bytes = vectors.tobytes()
+
+    header = TAF2_HEADER.pack(TAF2_MAGIC, count, dim, TAF2_NORMALIZED,
+                              layout['ids'], layout['ayahs'], layout['surahs'], layout['vectors'],
+                              zlib.crc32(metadata), zlib.crc32(vector_bytes))
+    with open(output_path, 'wb') as f:
+        f.write(header.ljust(TAF2_HEADER_SIZE, b'\0'))
+        f.write(metadata)
+        f.write(vector_bytes)
+    return count
+
+
+def is_taf2(path):
+    with open(path, 'rb') as f:
+        return f.read(4) == TAF2_MAGIC
+
+
+def read_taf2_header(f):
+    """Read a TAF2 header. Returns a dict of its fields."""
+    data = f.read(TAF2_HEADER_SIZE)
+    if len(data) < TAF2_HEADER_SIZE:
+        raise ValueError("File too short for a TAF2 header")
+    fields = TAF2_HEADER.unpack_from(data)
+    if fields[0] != TAF2_MAGIC:
+        raise ValueError(f"Invalid magic bytes: {fields[0]!r}")
+    return dict(zip(('count', 'dim', 'flags', 'ids', 'ayahs', 'surahs', 'vectors',
+                     'metadata_crc', 'vectors_crc'), fields[1:]))
+
+
+def read_taf2(path, mmap=True):
+    """Read a TAF2 file. Returns (ids, surahs, ayahs, embeddings).
+
+    With mmap, every array is a read-only view of the mapped file; the
+    embeddings are a C-contiguous (count, dim) float32 matrix.
+    """
+    with open(path, 'rb') as f:
+        header = read_taf2_header(f)
+    count, dim = header['count'], header['dim']
+    if header['vectors'] % TAF2_ALIGN:
+        raise ValueError(f"{path}: vector block at {header['vectors']} is not {TAF2_ALIGN}-byte aligned")
+    if (header['vectors'] + 4 * count * dim) > os.path.getsize(path):
+        raise ValueError(f"{path} is truncated")
+
+    if mmap:
+        data = np.memmap(path, dtype=np.uint8, mode='r')
+    else:
+        data = np.fromfile(path, dtype=np.uint8)
+
+    def column(name, dtype, shape):
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        return data[header[name]:header[name] + size].view(dtype).reshape(shape)
+
+    return (column('ids', '<u2', (count,)), column('surahs', 'u1', (count,)),
+            column('ayahs', '<u2', (count,)), column('vectors', '<f4', (count, dim)))
+
+
+def validate_taf2(path, tolerance=TAF2_NORM_TOLERANCE):
+    """Check a TAF2 file's layout, alignment, checksums, metadata and norms.
+
+    Returns a list of problems; an empty list means the file is valid.
+    """
+    size = os.path.getsize(path)
+    try:
+        with open(path, 'rb') as f:
+            header = read_taf2_header(f)
+    except ValueError as e:
+        return [str(e)]
+    count, dim = header['count'], header['dim']
+    layout = taf2_layout(count, dim)
+    problems = []
+    if dim == 0 and count:
+        problems.append("dimension is 0")
+    for name in ('ids', 'ayahs', 'surahs', 'vectors'):
+        if header[name] != layout[name]:
+            problems.append(f"{name} block at {header[name]}, expected {layout[name]}")
+    if header['vectors'] % TAF2_ALIGN:
+        problems.append(f"vector block at {header['vectors']} is not {TAF2_ALIGN}-byte aligned")
+    if size != layout['size']:
+        problems.append(f"file is {size} bytes, expected {layout['size']}")
+    if not header['flags'] & TAF2_NORMALIZED:
+        problems.append("normalized flag is not set")
+    if problems:
+        return problems
+
+    data = np.memmap(path, dtype=np.uint8, mode='r')
+    if data[TAF2_HEADER.size:TAF2_HEADER_SIZE].any():
+        problems.append("header padding is not zero")
+    if data[layout['surahs'] + count:layout['vectors']].any():
+        problems.append("padding before the vector block is not zero")
+    if zlib.crc32(data[TAF2_HEADER_SIZE:layout['vectors']]) != header['metadata_crc']:
+        problems.append("metadata checksum mismatch")
+    if zlib.crc32(data[layout['vectors']:]) != header['vectors_crc']:
+        problems.append("vector checksum mismatch")
+
+    ids, surahs, ayahs, vectors = read_taf2(path)
+    if len(np.unique(ids)) != count:
+        problems.append(f"{count - len(np.unique(ids))} duplicate ids")
+    try:
+        check_metadata_ranges(ids, surahs, ayahs)
+    except ValueError as e:
+        problems.append(str(e))
+    if count:
+        if not np.isfinite(vectors).all():
+            problems.append("vectors contain NaN or infinite values")
+        else:
+            error = np.abs(np.linalg.norm(vectors.astype(np.float64), axis=1) - 1.0)
+            bad = int((error > tolerance).sum())
+            if bad:
+                problems.append(f"{bad} vectors not unit length (max | |v| - 1 | = {error.max():.2e})")
+    return problems
@@ -0,0 +1,362 @@
+"""
+Patches for the embedding files (TAF1 and its TAH1/TAQ1 variants), so a
+tafseer correction ships as the few changed vectors instead of a new
+tafseer_embeddings.bin.
+
+diff compares two files of the same format and dimension by id:
+- removed: ids only in the old file
+- added: ids only in the new file
+- changed: ids in both whose records differ (vector, surah or ayah)
+and reports how far the changed vectors moved (cosine between old and new).
+Unchanged entries cost nothing, so rebuild with the embedding cache on
+(generate_tafseer_embeddings.py) to keep unchanged texts bit-identical.
+
+apply rebuilds the new file from the old file and the patch. The old file
+must match the patch's base SHA-256 and the result must match its target
+SHA-256, otherwise nothing is written.
+
+When a patch only changes existing entries, it also stores where each
+changed record sits in the old file and a digest of the record it replaces.
+--in-place then reads only the header and those records, checks their
+digests, overwrites them and reads them back, so the I/O is a few
+kilobytes per change. Untouched records are not read, so they are not
+verified; --verify-full adds the whole-file SHA-256 checks (reading the
+file twice).
+
+Patch layout (little endian):
+- Header (96 bytes):
+  - Magic: "TAP1" (4 bytes)
+  - Format: magic of both embedding files, e.g. "TAF1" (4 bytes)
+  - Dim: Uint32
+  - Flags: Uint32 (bit 0: target order stored, bit 1: in-place table stored)
+  - Base count, Target count: Uint32 each
+  - Removed count, Upsert count: Uint32 each
+  - Base SHA-256, Target SHA-256: 32 bytes each
+- Removed ids: Removed count * Uint16
+- Target order (only with flag bit 0): Target count * Uint16 ids. Without
+  it the target is in ascending id order, as the generator writes it.
+- Upserts: Upsert count records in the embedding format (added and
+  changed entries, ascending id)
+- In-place table (only with flag bit 1): per upsert, its record index in
+  the old file (Uint32) and the BLAKE2b-128 digest of the old record
+  (16 bytes)
+
+Usage:
+    python embedding_patch.py diff old.bin new.bin --patch build/tafseer_embeddings.patch
+    python embedding_patch.py apply old.bin build/tafseer_embeddings.patch --output new.bin
+    python embedding_patch.py apply assets/embeddings/tafseer_embeddings.bin PATCH --in-place
+"""
+
+import argparse
+import hashlib
+import os
+import struct
+import time
+import numpy as np
+
+from download_onnx_model import format_size, sha256_file
+from embedding_format import (FORMATS, TAF1_HEADER, decode_embeddings, read_header, read_records,
+                              record_dtype)
+
+PATCH_MAGIC = b'TAP1'
+PATCH_HEADER = struct.Struct('<4s4s6I32s32s')
+FLAG_ORDER = 1
+FLAG_IN_PLACE = 2
+IN_PLACE_DTYPE = np.dtype([('index', '<u4'), ('digest', 'V16')])
+
+
+def record_digest(data):
+    """BLAKE2b-128 digest of one packed record."""
+    return hashlib.blake2b(bytes(data), digest_size=16).digest()
+
+
+def _fmt_for_magic(magic):
+    for fmt, fmt_magic in FORMATS.items():
+        if fmt_magic == magic:
+            return fmt
+    raise ValueError(f"Unknown embedding format {magic!r}")
+
+
+def _raw(records):
+    """Records viewed as opaque byte strings, for exact comparison."""
+    return records.view(np.dtype((np.void, records.dtype.itemsize)))
+
+
+def _check_unique(ids, label):
+    if len(np.unique(ids)) != len(ids):
+        raise ValueError(f"{label} has repeated ids")
+
+
+def drift_stats(old_vectors, new_vectors, ids, worst=10):
+    """Cosine between old and new vectors of changed entries."""
+    if not len(ids):
+        return {'count': 0}
+    dots = np.einsum('ij,ij->i', old_vectors, new_vectors)
+    norms = np.linalg.norm(old_vectors, axis=1) * np.linalg.norm(new_vectors, axis=1)
+    cosine = np.divide(dots, norms, out=np.ones_like(dots), where=norms > 0)
+    order = np.argsort(cosine)[:worst]
+    return {
+        'count': int(len(ids)),
+        'min': float(cosine.min()),
+        'p05': float(np.percentile(cosine, 5)),
+        'median': float(np.median(cosine)),
+        'mean': float(cosine.mean()),
+        'worst': [{'id': int(ids[i]), 'cosine': float(cosine[i])} for i in order],
+    }
+
+
+def diff_files(old_path, new_path, patch_path):
+    """Write the patch turning old_path into new_path. Returns a summary dict."""
+    old_fmt, old = read_records(old_path)
+    new_fmt, new = read_records(new_path)
+    if old_fmt != new_fmt or old.dtype != new.dtype:
+        raise ValueError("both files need the same format and dimension; ship the new file instead")
+    _check_unique(old['id'], old_path)
+    _check_unique(new['id'], new_path)
+
+    old_ids, new_ids = old['id'].astype(np.int64), new['id'].astype(np.int64)
+    removed = np.setdiff1d(old_ids, new_ids)
+    added = np.setdiff1d(new_ids, old_ids)
+
+    common, old_pos, new_pos = np.intersect1d(old_ids, new_ids, assume_unique=True, return_indices=True)
+    differs = _raw(old[old_pos]) != _raw(new[new_pos])
+    changed = common[differs]
+    embedding_changed = np.any(old['embedding'][old_pos[differs]] != new['embedding'][new_pos[differs]],
+                               axis=tuple(range(1, old['embedding'].ndim)))
+    if 'scale' in old.dtype.names:
+        embedding_changed |= old['scale'][old_pos[differs]] != new['scale'][new_pos[differs]]
+
+    upsert_ids = np.union1d(added, changed)
+    sorter = np.argsort(new_ids)
+    upserts = new[sorter[np.searchsorted(new_ids, upsert_ids, sorter=sorter)]]
+
+    ordered = bool(np.all(np.diff(new_ids) > 0))
+    flags = 0 if ordered else FLAG_ORDER
+    dim = old.dtype['embedding'].shape[0]
+
+    # Same ids in the same order: every upsert overwrites one old record
+    in_place = None
+    if np.array_equal(old_ids, new_ids):
+        flags |= FLAG_IN_PLACE
+        in_place = np.empty(len(upserts), dtype=IN_PLACE_DTYPE)
+        old_sorter = np.argsort(old_ids)
+        in_place['index'] = old_sorter[np.searchsorted(old_ids, upsert_ids, sorter=old_sorter)]
+        in_place['digest'] = [record_digest(old[i].tobytes()) for i in in_place['index']]
+
+    header = PATCH_HEADER.pack(PATCH_MAGIC, FORMATS[old_fmt], dim, flags, len(old), len(new),
+                               len(removed), len(upserts),
+                               bytes.fromhex(sha256_file(old_path)), bytes.fromhex(sha256_file(new_path)))
+    os.makedirs(os.path.dirname(patch_path) or '.', exist_ok=True)
+    with open(patch_path, 'wb') as f:
+        f.write(header)
+        f.write(removed.astype('<u2').tobytes())
+        if flags & FLAG_ORDER:
+            f.write(new_ids.astype('<u2').tobytes())
+        f.write(upserts.tobytes())
+        if in_place is not None:
+            f.write(in_place.tobytes())
+
+    moved = changed[embedding_changed]
+    old_by_id = old[old_pos[differs][embedding_changed]]
+    new_by_id = new[new_pos[differs][embedding_changed]]
+    return {
+        'format': old_fmt,
+        'dim': dim,
+        'removed': int(len(removed)),
+        'added': int(len(added)),
+        'changed': int(len(changed)),
+        'metadata_only': int(len(changed) - len(moved)),
+        'unchanged': int(len(common) - len(changed)),
+        'drift': drift_stats(decode_embeddings(old_by_id, old_fmt), decode_embeddings(new_by_id, new_fmt), moved),
+        'patch_bytes': os.path.getsize(patch_path),
+        'full_bytes': os.path.getsize(new_path),
+    }
+
+
+def read_patch(patch_path):
+    """Parse a patch.
+
+    Returns (header dict, removed ids, target order or None, upsert records,
+    in-place table or None).
+    """
+    with open(patch_path, 'rb') as f:
+        data = f.read()
+    if len(data) < PATCH_HEADER.size:
+        raise ValueError(f"{patch_path} is too short to be a patch")
+    magic, fmt_magic, dim, flags, base_count, target_count, removed_count, upsert_count, base_sha, target_sha = \
+        PATCH_HEADER.unpack_from(data)
+    if magic != PATCH_MAGIC:
+        raise ValueError(f"Invalid magic bytes: {magic!r}")
+    fmt = _fmt_for_magic(fmt_magic)
+    dtype = record_dtype(fmt, dim)
+
+    order_count = target_count if flags & FLAG_ORDER else 0
+    in_place_count = upsert_count if flags & FLAG_IN_PLACE else 0
+    expected = (PATCH_HEADER.size + 2 * (removed_count + order_count) + upsert_count * dtype.itemsize
+                + in_place_count * IN_PLACE_DTYPE.itemsize)
+    if len(data) != expected:
+        raise ValueError(f"{patch_path} is {len(data)} bytes, expected {expected}")
+
+    offset = PATCH_HEADER.size
+    removed = np.frombuffer(data, '<u2', removed_count, offset).astype(np.int64)
+    offset += 2 * removed_count
+    order = np.frombuffer(data, '<u2', order_count, offset).astype(np.int64) if order_count else None
+    offset += 2 * order_count
+    upserts = np.frombuffer(data, dtype, upsert_count, offset)
+    offset += upsert_count * dtype.itemsize
+    in_place = np.frombuffer(data, IN_PLACE_DTYPE, in_place_count, offset) if in_place_count else None
+    header = {'fmt': fmt, 'dim': dim, 'base_count': base_count, 'target_count': target_count,
+              'base_sha256': base_sha.hex(), 'target_sha256': target_sha.hex()}
+    return header, removed, order, upserts, in_place
+
+
+def patched_records(base, removed, order, upserts):
+    """Target records from the base records and the patch contents."""
+    upsert_ids = upserts['id'].astype(np.int64)
+    base_ids = base['id'].astype(np.int64)
+    keep = ~np.isin(base_ids, removed) & ~np.isin(base_ids, upsert_ids)
+    records = np.concatenate([base[keep], upserts])
+    ids = records['id'].astype(np.int64)
+    if order is None:
+        return records[np.argsort(ids, kind='stable')]
+    if len(order) != len(ids) or not np.array_equal(np.sort(order), np.sort(ids)):
+        raise ValueError("patch target order does not match the patched ids")
+    return records[np.argsort(ids)][np.searchsorted(np.sort(ids), order)]
+
+
+def _write_records(f, indices, records, itemsize):
+    for index, record in zip(indices, records):
+        f.seek(TAF1_HEADER.size + int(index) * itemsize)
+        f.write(bytes(record))
+
+
+def apply_in_place(base_path, header, upserts, in_place, verify_full=False):
+    """Overwrite the changed records of base_path. Returns (bytes read, bytes written).
+
+    Only the header and the records being replaced are read: each must
+    match the digest stored in the patch, and each write is read back.
+    With verify_full the whole file is also hashed before and after.
+    """
+    if in_place is None:
+        raise ValueError("this patch adds, removes or reorders entries; write a new file with --output")
+    if verify_full and sha256_file(base_path) != header['base_sha256']:
+        raise ValueError(f"{base_path} is not the file this patch was made from (SHA-256 differs)")
+
+    itemsize = upserts.dtype.itemsize
+    with open(base_path, 'r+b') as f:
+        fmt, count, dim = read_header(f)
+        if fmt != header['fmt'] or dim != header['dim'] or count != header['base_count']:
+            raise ValueError(f"{base_path} format, dimension or entry count does not match the patch")
+        if os.path.getsize(base_path) != TAF1_HEADER.size + count * itemsize:
+            raise ValueError(f"{base_path} size does not match its entry count")
+
+        previous = []
+        for index, digest in zip(in_place['index'], in_place['digest']):
+            f.seek(TAF1_HEADER.size + int(index) * itemsize)
+            record = f.read(itemsize)
+            if record_digest(record) != bytes(digest):
+                raise ValueError(f"record {index} of {base_path} is not the one this patch was made "
+                                 f"from; nothing written")
+            previous.append(record)
+
+        _write_records(f, in_place['index'], upserts, itemsize)
+        f.flush()
+        for index, record in zip(in_place['index'], upserts):
+            f.seek(TAF1_HEADER.size + int(index) * itemsize)
+            if f.read(itemsize) != record.tobytes():
+                _write_records(f, in_place['index'], previous, itemsize)
+                raise ValueError(f"record {index} did not read back as written; original restored")
+
+        if verify_full:
+            f.flush()
+            if sha256_file(base_path) != header['target_sha256']:
+                _write_records(f, in_place['index'], previous, itemsize)
+                raise ValueError("patched file does not match the target SHA-256; original restored")
+
+    touched = len(upserts) * itemsize
+    read = TAF1_HEADER.size + 2 * touched
+    if verify_full:
+        read += 2 * os.path.getsize(base_path)
+    return read, touched
+
+
+def apply_patch(base_path, patch_path, output_path=None, in_place=False, verify_full=False):
+    """Write the patched file (or patch base_path in place). Returns (bytes read, bytes written)."""
+    header, removed, order, upserts, in_place_table = read_patch(patch_path)
+    if in_place:
+        read, written = apply_in_place(base_path, header, upserts, in_place_table, verify_full)
+        return read + os.path.getsize(patch_path), written
+
+    if sha256_file(base_path) != header['base_sha256']:
+        raise ValueError(f"{base_path} is not the file this patch was made from (SHA-256 differs)")
+    fmt, base = read_records(base_path)
+    if fmt != header['fmt'] or base.dtype != upserts.dtype:
+        raise ValueError(f"{base_path} format does not match the patch")
+
+    records = patched_records(base, removed, order, upserts)
+    if len(records) != header['target_count']:
+        raise ValueError(f"patch produced {len(records)} entries, expected {header['target_count']}")
+    tmp_path = output_path + '.part'
+    with open(tmp_path, 'wb') as f:
+        f.write(TAF1_HEADER.pack(FORMATS[fmt], len(records), header['dim']))
+        f.write(records.tobytes())
+    if sha256_file(tmp_path) != header['target_sha256']:
+        os.remove(tmp_path)
+        raise ValueError("patched file does not match the target SHA-256; nothing written")
+    os.replace(tmp_path, output_path)
+    size = os.path.getsize(output_path)
+    # base SHA-256 and load, then the written file hashed again
+    return 2 * os.path.getsize(base_path) + os.path.getsize(patch_path) + size, size
+
+
+def print_summary(summary):
+    print(f"Format {FORMATS[summary['format']].decode()}, dim {summary['dim']}")
+    print(f"Removed {summary['removed']}, added {summary['added']}, changed {summary['changed']} "
+          f"({summary['metadata_only']} surah/ayah only), unchanged {summary['unchanged']}")
+    drift = summary['drift']
+    if drift['count']:
+        print(f"Cosine old vs new for {drift['count']} changed vectors: min {drift['min']:.4f}, "
+              f"p05 {drift['p05']:.4f}, median {drift['median']:.4f}, mean {drift['mean']:.4f}")
+        print("Most changed: " + ', '.join(f"{w['id']} ({w['cosine']:.3f})" for w in drift['worst']))
+    print(f"Patch {format_size(summary['patch_bytes'])} vs full file {format_size(summary['full_bytes'])} "
+          f"({100 * summary['patch_bytes'] / summary['full_bytes']:.2f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Diff embedding files into a patch, or apply one")
+    parser.add_argument('mode', choices=['diff', 'apply'])
+    parser.add_argument('old', help="base embedding file")
+    parser.add_argument('target', help="diff: new embedding file; apply: patch file")
+    parser.add_argument('--patch', default='build/tafseer_embeddings.patch', help="diff: patch to write")
+    parser.add_argument('--output', help="apply: file to write")
+    parser.add_argument('--in-place', action='store_true', help="apply: overwrite changed records in OLD")
+    parser.add_argument('--verify-full', action='store_true',
+                        help="apply --in-place: also check the whole-file SHA-256 before and after")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.mode == 'diff':
+        print(f"=== Diffing {args.old} -> {args.target} ===\n")
+        summary = diff_files(args.old, args.target, args.patch)
+        print_summary(summary)
+        print(f"\nPatch written to {args.patch} in {time.perf_counter() - start:.2f} s")
+        return
+
+    if not args.output and not args.in_place:
+        parser.error("apply needs --output or --in-place")
+    print(f"=== Applying {args.target} to {args.old} ===\n")
+    try:
+        read, written = apply_patch(args.old, args.target, args.output, args.in_place, args.verify_full)
+    except ValueError as e:
+        print(f"❌ {e}")
+        raise SystemExit(1)
+    if args.in_place and not args.verify_full:
+        check = "changed records verified by digest and read-back"
+    else:
+        check = "matches the target SHA-256"
+    print(f"✅ {args.old if args.in_place else args.output}: {check} "
+          f"({format_size(read)} read, {format_size(written)} written in {time.perf_counter() - start:.2f} s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+"""
+Reference semantic search over the tafseer embeddings, outside the app.
+Input: assets/embeddings/tafseer_embeddings.bin + assets/db/quran_tafsir.db
+
+The TAF1 file is memory-mapped and its vector column is viewed as an
+(count, dim) matrix without copying. Queries are scored with one matrix
+product and the top-k is taken with argpartition, then results are hydrated
+from the tafseer table with a single IN query (like getTafseerByIds).
+
+Note: TAF1 rows start with a 5-byte header, so the zero-copy view is strided
+and unaligned. --load copies the vectors once into a contiguous matrix,
+which is faster when running many queries. TAF2 files already store the
+vectors as an aligned contiguous block, so their mapped matrix needs no copy.
+
+Usage:
+    python embedding_search.py "patience in hardship"
+    python embedding_search.py --queries-file queries.txt --batch-size 64
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+import numpy as np
+
+from bench_utils import latency_summary, format_latency, peak_rss_mb, format_mb
+from embedding_format import (read_header, record_dtype, decode_embeddings, TAF1_HEADER,
+                              is_taf2, read_taf2)
+
+
+def top_k(matrix, queries, k):
+    """Indices of the k best dot-product matches per query, best first.
+
+    Returns (indices, scores), each of shape (len(queries), k).
+    """
+    scores = queries @ matrix.T
+    k = min(k, matrix.shape[0])
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    part_scores = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-part_scores, axis=1)
+    return np.take_along_axis(part, order, axis=1), np.take_along_axis(part_scores, order, axis=1)
+
+
+class TafseerSearchEngine:
+    """Brute-force inner-product search over a memory-mapped embedding file."""
+
+    def __init__(self, bin_path='assets/embeddings/tafseer_embeddings.bin',
+                 db_path='assets/db/quran_tafsir.db', load=False):
+        self.db_path = db_path
+        if is_taf2(bin_path):
+            # Columnar and 64-byte aligned: the mapped block is the matrix
+            self.ids, _, _, self.matrix = read_taf2(bin_path)
+            self.fmt = 'taf2'
+            self.dim = self.matrix.shape[1]
+            return
+        with open(bin_path, 'rb') as f:
+            fmt, count, dim = read_header(f)
+        self.records = np.memmap(bin_path, dtype=record_dtype(fmt, dim), mode='r',
+                                 offset=TAF1_HEADER.size, shape=(count,))
+        self.ids = self.records['id']
+        if fmt == 'f32':
+            # Zero-copy strided view of the vector column
+            self.matrix = self.records['embedding']
+            if load:
+                self.matrix = np.ascontiguousarray(self.matrix)
+        else:
+            self.matrix = decode_embeddings(self.records, fmt)
+        self.fmt = fmt
+        self.dim = dim
+
+    def __len__(self):
+        return len(self.ids)
+
+    def search(self, queries, k=10):
+        """Top-k for one query vector or a (n, dim) batch.
+
+        Returns (ids, scores) as (n, k) arrays.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        indices, scores = top_k(self.matrix, queries, k)
+        return self.ids[indices].astype(np.int64), scores
+
+    def hydrate(self, ids):
+        """Fetch {id: row} for all ids with one query."""
+        ids = sorted({int(i) for i in np.ravel(ids)})
+        if not ids:
+            return {}
+        conn = sqlite3.connect(self.db_path)
+        try:
+            placeholders = ','.join('?' * len(ids))
+            rows = conn.execute(
+                f"SELECT id, surah, ayah, verse_key, text FROM tafseer WHERE id IN ({placeholders})",
+                ids,
+            ).fetchall()
+        finally:
+            conn.close()
+        return {row[0]: {'surah': row[1], 'ayah': row[2], 'verse_key': row[3], 'text': row[4]}
+                for row in rows}
+
+
+def encode_queries(texts, model_name='all-MiniLM-L6-v2', backend='torch'):
+    """Encode query strings with the same model as the tafseer build.
+
+    With backend 'onnx', model_name is an ONNX graph path (None for the default).
+    """
+    if backend == 'onnx':
+        from onnx_encoder import OnnxSentenceEncoder
+        model = OnnxSentenceEncoder(model_name)
+    else:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(model_name)
+    return np.asarray(model.encode(texts, batch_size=64), dtype=np.float32)
+
+
+def run_batch(engine, queries, k=10, batch_size=64):
+    """Search all query vectors; returns per-query latencies in ms and total seconds."""
+    latencies = []
+    start = time.perf_counter()
+    for i in range(0, len(queries), batch_size):
+        batch = queries[i:i + batch_size]
+        t0 = time.perf_counter()
+        engine.search(batch, k)
+        # Every query in a batch waits for the whole batch
+        latencies.extend([(time.perf_counter() - t0) * 1000] * len(batch))
+    return latencies, time.perf_counter() - start
+
+
+def benchmark(engine, queries, k=10, batch_size=64):
+    """Print QPS and latency percentiles for single and batched search."""
+    print(f"\n=== Search benchmark: {len(queries)} queries over {len(engine)} vectors "
+          f"({'contiguous' if engine.matrix.flags['C_CONTIGUOUS'] else 'zero-copy view'}) ===")
+    for size in sorted({1, batch_size}):
+        latencies, total = run_batch(engine, queries, k, size)
+        print(f"batch {size:>4}: {len(queries) / total:>9.0f} QPS, {format_latency(latency_summary(latencies))}")
+
+    start = time.perf_counter()
+    ids, _ = engine.search(queries[:batch_size], k)
+    engine.hydrate(ids)
+    print(f"Hydrating {batch_size} x top-{k} from DB: {(time.perf_counter() - start) * 1000:.1f} ms (one query)")
+    print(f"Peak RSS: {format_mb(peak_rss_mb())}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Semantic search over tafseer_embeddings.bin")
+    parser.add_argument('query', nargs='?', help="a single query to run and print")
+    parser.add_argument('--bin', default='assets/embeddings/tafseer_embeddings.bin')
+    parser.add_argument('--db', default='assets/db/quran_tafsir.db')
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--queries-file', help="one query per line; runs the benchmark")
+    parser.add_argument('--query-embeddings', help=".npy of precomputed query vectors; runs the benchmark")
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--load', action='store_true', help="copy vectors into contiguous memory")
+    parser.add_argument('--model', default='all-MiniLM-L6-v2')
+    parser.add_argument('--backend', choices=['torch', 'onnx'], default='torch')
+    parser.add_argument('--onnx-model', help="ONNX graph for --backend onnx")
+    args = parser.parse_args()
+    model_name = args.onnx_model if args.backend == 'onnx' else args.model
+
+    if not os.path.exists(args.bin):
+        print(f"Error: {args.bin} not found!")
+        return
+
+    engine = TafseerSearchEngine(args.bin, args.db, load=args.load)
+    print(f"Mapped {len(engine)} {engine.fmt} vectors (dim {engine.dim}) from {args.bin}")
+
+    if args.query_embeddings or args.queries_file:
+        if args.query_embeddings:
+            queries = np.load(args.query_embeddings).astype(np.float32)
+        else:
+            with open(args.queries_file, encoding='utf-8') as f:
+                texts = [line.strip() for line in f if line.strip()]
+            print(f"Encoding {len(texts)} queries...")
+            queries = encode_queries(texts, model_name, args.backend)
+        benchmark(engine, queries, args.k, args.batch_size)
+        return
+
+    if not args.query:
+        parser.error("give a query, --queries-file or --query-embeddings")
+
+    ids, scores = engine.search(encode_queries([args.query], model_name, args.backend)[0], args.k)
+    rows = engine.hydrate(ids)
+    print(f"\nTop {args.k} for: {args.query!r}")
+    for id_val, score in zip(ids[0], scores[0]):
+        row = rows.get(int(id_val))
+        if row:
+            print(f"  {score:.3f}  {row['verse_key']:>8}  {row['text'][:100]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,8 +2,10 @@
 Export sentence-transformers model to ONNX format for Flutter.
 Uses PyTorch (works on Python 3.14!) - NO TensorFlow needed.
 Output: assets/models/sentence_encoder.onnx + vocab.txt
+        build/onnx/ optimized and int8 variants + manifest.json (see onnx_variants.py)
 """
 
+import argparse
 import os
 import torch
 from sentence_transformers import SentenceTransformer
@@ -28,7 +30,8 @@ class SentenceEncoderONNX(torch.nn.Module):
         embeddings = torch.nn.functional.normalize(embeddings, p=2, dim=1)
         return embeddings
 
-def export_to_onnx(model_name='all-MiniLM-L6-v2', output_dir='assets/models'):
+def export_to_onnx(model_name='all-MiniLM-L6-v2', output_dir='assets/models', opset=14,
+                   variants_dir='build/onnx'):
     """Export the sentence-transformers model to ONNX format."""
     print(f"=== Exporting {model_name} to ONNX ===\n")
     
@@ -71,7 +74,7 @@ def export_to_onnx(model_name='all-MiniLM-L6-v2', output_dir='assets/models'):
             'attention_mask': {0: 'batch_size', 1: 'sequence'},
             'embeddings': {0: 'batch_size'}
         },
-        opset_version=14,
+        opset_version=opset,
         do_constant_folding=True
     )
     
@@ -85,40 +88,45 @@ def export_to_onnx(model_name='all-MiniLM-L6-v2', output_dir='assets/models'):
     
     session = ort.InferenceSession(onnx_path)
     
-    # Test with a real sentence
-    test_text = "patience during hardship"
-    encoded = tokenizer(
-        test_text,
-        padding='max_length',
-        max_length=128,
-        truncation=True,
-        return_tensors='np'
-    )
-    
-    onnx_output = session.run(
-        None,
-        {
-            'input_ids': encoded['input_ids'].astype(np.int64),
-            'attention_mask': encoded['attention_mask'].astype(np.int64)
-        }
-    )[0]
-    
-    # Compare with original model
-    original_output = model.encode([test_text])
-    
-    similarity = np.dot(onnx_output[0], original_output[0]) / (
-        np.linalg.norm(onnx_output[0]) * np.linalg.norm(original_output[0])
-    )
-    
-    print(f"Test query: '{test_text}'")
+    # Test with real sentences at their natural lengths (no padding)
+    test_texts = [
+        "patience during hardship",
+        "what does the Quran say about kindness to parents and relatives",
+        "the story of Musa and Pharaoh and the signs shown to the people of Egypt",
+    ]
+    original_output = model.encode(test_texts)
+    similarities = []
+    for text, original in zip(test_texts, original_output):
+        encoded = tokenizer(text, truncation=True, max_length=model.max_seq_length, return_tensors='np')
+        onnx_output = session.run(
+            None,
+            {
+                'input_ids': encoded['input_ids'].astype(np.int64),
+                'attention_mask': encoded['attention_mask'].astype(np.int64)
+            }
+        )[0]
+        similarities.append(np.dot(onnx_output[0], original) / (
+            np.linalg.norm(onnx_output[0]) * np.linalg.norm(original)
+        ))
+
+    print(f"Test queries: {len(test_texts)}")
     print(f"Output shape: {onnx_output.shape}")
-    print(f"Similarity with original: {similarity:.6f}")
-    
-    if similarity > 0.99:
+    print(f"Min similarity with original: {min(similarities):.6f}")
+
+    if min(similarities) > 0.99:
         print("✅ Verification passed!")
     else:
         print("⚠️ Warning: Output differs from original")
-    
+
+    # Step 5: Optimized and int8 variants, benchmarked against this graph
+    if variants_dir:
+        print("\nStep 5: Building optimized and quantized variants...")
+        import onnx_variants
+        tokenizer_path = os.path.join(output_dir, 'tokenizer.json')
+        if not os.path.exists(tokenizer_path):
+            tokenizer_path = onnx_variants.DEFAULT_TOKENIZER
+        onnx_variants.run(onnx_path, variants_dir, tokenizer_path=tokenizer_path)
+
     print("\n=== Export Complete! ===")
     print(f"\nFiles created in {output_dir}:")
     print(f"  - sentence_encoder.onnx ({size_mb:.2f} MB)")
@@ -126,4 +134,11 @@ def export_to_onnx(model_name='all-MiniLM-L6-v2', output_dir='assets/models'):
     print("\nYou can now use these in your Flutter app with onnxruntime_flutter!")
 
 if __name__ == '__main__':
-    export_to_onnx()
+    parser = argparse.ArgumentParser(description="Export all-MiniLM-L6-v2 to ONNX")
+    parser.add_argument('--model', default='all-MiniLM-L6-v2')
+    parser.add_argument('--output-dir', default='assets/models')
+    parser.add_argument('--opset', type=int, default=14)
+    parser.add_argument('--variants-dir', default='build/onnx',
+                        help="where to build the optimized/int8 variants ('' to skip)")
+    args = parser.parse_args()
+    export_to_onnx(args.model, args.output_dir, args.opset, args.variants_dir)
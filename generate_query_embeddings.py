@@ -1,12 +1,20 @@
 """
 Generate embeddings for common search queries/concepts.
-Uses sentence-transformers (NO TensorFlow required!)
-Output: assets/embeddings/query_embeddings.json
+Uses sentence-transformers (NO TensorFlow required!), or ONNX Runtime only
+with --backend onnx (see onnx_encoder.py).
+Output: assets/embeddings/query_embeddings.bin (QEM1, see query_embedding_table.py)
+
+Queries are normalized and deduplicated before encoding. The legacy JSON
+dump is opt-in (--json), and --from-json repacks an existing dump without
+loading a model.
 """
 
+import argparse
 import json
 import os
-from sentence_transformers import SentenceTransformer
+import numpy as np
+
+from query_embedding_table import dedupe_queries, write_table
 
 # Common Islamic/Quranic search terms and concepts
 COMMON_QUERIES = [
@@ -86,36 +94,84 @@ COMMON_QUERIES = [
     "purpose of creation",
 ]
 
-def generate_query_embeddings(output_path='assets/embeddings/query_embeddings.json'):
-    """Generate embeddings for all common queries."""
-    print("=== Query Embeddings Generator ===\n")
-    
-    # Load the same model used for tafseer embeddings
+def load_encoder(backend='torch', onnx_model=None):
+    """Load the same model used for tafseer embeddings."""
+    if backend == 'onnx':
+        from onnx_encoder import OnnxSentenceEncoder
+        encoder = OnnxSentenceEncoder(onnx_model)
+        print(f"Loading ONNX model: {encoder.model_path}")
+        return encoder
+
+    from sentence_transformers import SentenceTransformer
     print("Loading model: all-MiniLM-L6-v2")
-    model = SentenceTransformer('all-MiniLM-L6-v2')
-    print("Model loaded!\n")
-    
-    print(f"Generating embeddings for {len(COMMON_QUERIES)} queries...")
-    embeddings = model.encode(COMMON_QUERIES, show_progress_bar=True)
-    
-    # Create output data
-    data = []
-    for i, query in enumerate(COMMON_QUERIES):
-        data.append({
-            'query': query,
-            'embedding': embeddings[i].tolist()
-        })
-    
-    # Save to file
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False)
-    
+    return SentenceTransformer('all-MiniLM-L6-v2')
+
+def save_table(queries, embeddings, output_path, dtype='f16'):
+    """Write the binary query table."""
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    write_table(output_path, queries, embeddings, dtype)
+
     size_kb = os.path.getsize(output_path) / 1024
     print(f"\nSaved to {output_path}")
     print(f"File size: {size_kb:.2f} KB")
-    print(f"Total queries: {len(data)}")
+    print(f"Total queries: {len(queries)}")
+
+def save_json(queries, embeddings, output_path):
+    """Save the legacy JSON dump (debug output)."""
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump([{'query': q, 'embedding': embeddings[i].tolist()} for i, q in enumerate(queries)],
+                  f, ensure_ascii=False)
+    print(f"Saved JSON dump to {output_path}")
+
+def report_dropped(dropped):
+    if dropped:
+        print(f"Dropped {len(dropped)} duplicate queries: {', '.join(sorted(set(dropped)))}")
+
+def generate_query_embeddings(output_path='assets/embeddings/query_embeddings.bin',
+                              backend='torch', onnx_model=None, dtype='f16', json_path=None):
+    """Generate embeddings for all common queries."""
+    print("=== Query Embeddings Generator ===\n")
+
+    queries, _, dropped = dedupe_queries(COMMON_QUERIES)
+    report_dropped(dropped)
+
+    model = load_encoder(backend, onnx_model)
+    print("Model loaded!\n")
+
+    print(f"Generating embeddings for {len(queries)} queries...")
+    embeddings = np.asarray(model.encode(queries, show_progress_bar=True), dtype=np.float32)
+
+    save_table(queries, embeddings, output_path, dtype)
+    if json_path:
+        save_json(queries, embeddings, json_path)
+    print("\n=== Complete! ===")
+
+def repack_json(json_path, output_path='assets/embeddings/query_embeddings.bin', dtype='f16'):
+    """Convert an existing JSON dump to the binary table without re-encoding."""
+    print(f"=== Repacking {json_path} ===\n")
+    with open(json_path, encoding='utf-8') as f:
+        data = json.load(f)
+
+    queries, embeddings, dropped = dedupe_queries([d['query'] for d in data],
+                                                  [d['embedding'] for d in data])
+    report_dropped(dropped)
+    save_table(queries, embeddings, output_path, dtype)
+    print(f"JSON size: {os.path.getsize(json_path) / 1024:.2f} KB")
     print("\n=== Complete! ===")
 
 if __name__ == '__main__':
-    generate_query_embeddings()
+    parser = argparse.ArgumentParser(description="Generate query embeddings")
+    parser.add_argument('--output', default='assets/embeddings/query_embeddings.bin')
+    parser.add_argument('--dtype', choices=['f16', 'f32'], default='f16',
+                        help="storage type of the embedding matrix")
+    parser.add_argument('--json', help="also write the legacy JSON dump to this path (debug)")
+    parser.add_argument('--from-json', help="repack an existing JSON dump instead of encoding")
+    parser.add_argument('--backend', choices=['torch', 'onnx'], default='torch',
+                        help="onnx runs without torch / sentence-transformers")
+    parser.add_argument('--onnx-model', help="ONNX graph for --backend onnx")
+    args = parser.parse_args()
+    if args.from_json:
+        repack_json(args.from_json, args.output, args.dtype)
+    else:
+        generate_query_embeddings(args.output, args.backend, args.onnx_model, args.dtype, args.json)
@@ -1,16 +1,29 @@
 """
 Tafseer Embeddings Generator
-Generates semantic embeddings for all Tafseer entries using sentence-transformers.
-Output: assets/embeddings/tafseer_embeddings.json
+Generates semantic embeddings for all Tafseer entries using sentence-transformers,
+or with ONNX Runtime only (--backend onnx, see onnx_encoder.py).
+Output: assets/embeddings/tafseer_embeddings.bin (TAF1, read by the app)
+
+The binary is written straight from the embedding matrix. A raw .npy copy
+and the legacy JSON dump are opt-in (--npy / --json).
 """
 
+import argparse
+import multiprocessing
 import sqlite3
 import json
 import os
+import queue
 import re
-from sentence_transformers import SentenceTransformer
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 
+from embedding_cache import EmbeddingCache
+from embedding_format import (MAX_ID, pack_taf1_records, patch_taf1_count, write_taf1,
+                              write_taf1_header)
+
 def clean_html(text):
     """Remove HTML tags from text."""
     clean = re.compile('<.*?>')
@@ -20,20 +33,20 @@ def load_tafseer_data(db_path):
     """Load all Tafseer entries from database."""
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
-    
+
     cursor.execute("SELECT id, surah, ayah, verse_key, text FROM tafseer ORDER BY id")
     rows = cursor.fetchall()
     conn.close()
-    
+
     data = []
     for row in rows:
         id_val, surah, ayah, verse_key, text = row
         cleaned_text = clean_html(text)
-        
+
         # Skip very short entries (likely errors or empty)
         if len(cleaned_text.strip()) < 20:
             continue
-            
+
         data.append({
             'id': id_val,
             'surah': surah,
@@ -41,65 +54,720 @@ def load_tafseer_data(db_path):
             'verse_key': verse_key,
             'text': cleaned_text.strip()
         })
-    
+
     return data
 
-def generate_embeddings(data, model_name='all-MiniLM-L6-v2'):
-    """Generate embeddings for all Tafseer entries."""
+SHARD_SIZE = 256  # rows per parallel task; a multiple of the encode batch size
+
+def load_model(model_name='all-MiniLM-L6-v2', threads=None):
+    """Load the encoder, optionally pinning its thread count.
+
+    Names of the form "onnx:<path>" load OnnxSentenceEncoder; anything else
+    is a sentence-transformers model name.
+    """
+    if model_name.startswith('onnx:'):
+        from onnx_encoder import OnnxSentenceEncoder
+        return OnnxSentenceEncoder(model_name[len('onnx:'):], intra_op_threads=threads)
+
+    from sentence_transformers import SentenceTransformer
+    if threads:
+        try:
+            import torch
+            torch.set_num_threads(threads)
+        except ImportError:
+            pass
+    return SentenceTransformer(model_name)
+
+DEFAULT_TOKEN_BUDGET = 8192  # padded tokens per batch for length-bucketed batching
+MAX_BUCKETED_BATCH = 256
+
+def token_lengths(model, texts):
+    """Token count of each text as the model will see it (special tokens, truncation)."""
+    if hasattr(model, 'token_lengths'):
+        return model.token_lengths(texts)
+    encoded = model.tokenizer(texts, add_special_tokens=True, truncation=True,
+                              max_length=model.max_seq_length)
+    return np.array([len(ids) for ids in encoded['input_ids']], dtype=np.int64)
+
+def token_ids(model, texts):
+    """Token ids of each text as the model will see them, without padding."""
+    if hasattr(model, 'encode_ids'):
+        return model.token_ids(texts)
+    encoded = model.tokenizer(texts, add_special_tokens=True, truncation=True,
+                              max_length=model.max_seq_length)
+    return encoded['input_ids']
+
+def encode_token_ids(model, ids_list):
+    """Embeddings for texts already tokenized with token_ids(), as one batch.
+
+    sentence-transformers models run forward() on the padded features, which
+    is what encode() does after tokenizing.
+    """
+    if hasattr(model, 'encode_ids'):
+        return model.encode_ids(ids_list, batch_size=len(ids_list))
+    import torch
+    longest = max(len(ids) for ids in ids_list)
+    input_ids = np.full((len(ids_list), longest), model.tokenizer.pad_token_id or 0, dtype=np.int64)
+    attention_mask = np.zeros((len(ids_list), longest), dtype=np.int64)
+    for row, ids in enumerate(ids_list):
+        input_ids[row, :len(ids)] = ids
+        attention_mask[row, :len(ids)] = 1
+    features = {'input_ids': torch.from_numpy(input_ids).to(model.device),
+                'attention_mask': torch.from_numpy(attention_mask).to(model.device)}
+    if 'token_type_ids' in model.tokenizer.model_input_names:
+        features['token_type_ids'] = torch.zeros_like(features['input_ids'])
+    model.eval()  # as encode() does: no dropout
+    with torch.no_grad():
+        embeddings = model(features)['sentence_embedding']
+    return embeddings.float().cpu().numpy()
+
+def plan_token_batches(lengths, token_budget=DEFAULT_TOKEN_BUDGET, max_batch=MAX_BUCKETED_BATCH):
+    """Group row indices into batches whose padded size stays within the token budget.
+
+    Rows are taken longest first, so each batch holds rows of similar length
+    and short rows end up in large batches.
+    """
+    batches = []
+    current = []
+    longest = 0
+    for idx in np.argsort(-lengths, kind='stable'):
+        longest = max(longest, int(lengths[idx]))
+        if current and ((len(current) + 1) * longest > token_budget or len(current) == max_batch):
+            batches.append(current)
+            current = []
+            longest = int(lengths[idx])
+        current.append(int(idx))
+    if current:
+        batches.append(current)
+    return batches
+
+def encode_bucketed(model, texts, token_budget=DEFAULT_TOKEN_BUDGET, show_progress_bar=False):
+    """Encode texts in length buckets and return rows in the original order."""
+    batches = plan_token_batches(token_lengths(model, texts), token_budget)
+    embeddings = None
+    done = 0
+    for batch in batches:
+        part = model.encode([texts[i] for i in batch], batch_size=len(batch),
+                            show_progress_bar=False)
+        if embeddings is None:
+            embeddings = np.empty((len(texts), part.shape[1]), dtype=np.float32)
+        embeddings[batch] = part
+        done += len(batch)
+        if show_progress_bar:
+            print(f"  Encoded {done}/{len(texts)} ({len(batches)} batches)", end='\r')
+    if show_progress_bar:
+        print()
+    return embeddings if embeddings is not None else np.empty((0, 0), dtype=np.float32)
+
+def encode_with_model(model, texts, token_budget=DEFAULT_TOKEN_BUDGET, show_progress_bar=False):
+    """Encode with a loaded model; a token budget of 0 uses fixed batches of 32."""
+    if token_budget:
+        return encode_bucketed(model, texts, token_budget, show_progress_bar)
+    embeddings = model.encode(texts, batch_size=32, show_progress_bar=show_progress_bar)
+    return np.asarray(embeddings, dtype=np.float32)
+
+def encode_texts(texts, model_name='all-MiniLM-L6-v2', workers=1, token_budget=DEFAULT_TOKEN_BUDGET):
+    """Encode texts with the sentence-transformers model."""
+    if workers > 1:
+        return encode_texts_parallel(texts, model_name, workers, token_budget=token_budget)
+
     print(f"Loading model: {model_name}")
-    model = SentenceTransformer(model_name)
-    
-    print(f"Generating embeddings for {len(data)} entries...")
-    texts = [entry['text'] for entry in data]
-    
+    model = load_model(model_name)
+
+    print(f"Generating embeddings for {len(texts)} entries...")
     # Generate embeddings in batches for efficiency
-    embeddings = model.encode(texts, batch_size=32, show_progress_bar=True)
-    
-    # Add embeddings to data
-    for i, entry in enumerate(data):
-        entry['embedding'] = embeddings[i].tolist()
-    
-    return data
+    return encode_with_model(model, texts, token_budget, show_progress_bar=True)
+
+# Model held by each pool worker, loaded once by _init_worker
+_worker_model = None
+_worker_token_budget = DEFAULT_TOKEN_BUDGET
+
+def _init_worker(model_name, threads, token_budget):
+    global _worker_model, _worker_token_budget
+    _worker_model = load_model(model_name, threads)
+    _worker_token_budget = token_budget
+
+def _encode_shard(texts):
+    return encode_with_model(_worker_model, texts, _worker_token_budget)
+
+def encode_texts_parallel(texts, model_name='all-MiniLM-L6-v2', workers=2, threads_per_worker=None,
+                          token_budget=DEFAULT_TOKEN_BUDGET):
+    """Encode texts on a process pool, one model per worker.
+
+    Texts are cut into fixed-size contiguous shards and merged back in
+    order, so the result does not depend on the number of workers.
+    """
+    threads = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+    shards = [texts[i:i + SHARD_SIZE] for i in range(0, len(texts), SHARD_SIZE)]
+    print(f"Encoding {len(texts)} entries in {len(shards)} shards on "
+          f"{workers} workers x {threads} threads...")
+
+    ctx = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                             initializer=_init_worker,
+                             initargs=(model_name, threads, token_budget)) as pool:
+        parts = []
+        done = 0
+        for part in pool.map(_encode_shard, shards):
+            parts.append(part)
+            done += len(part)
+            print(f"  Encoded {done}/{len(texts)}", end='\r')
+    print()
+
+    if not parts:
+        return np.empty((0, 0), dtype=np.float32)
+    return np.concatenate(parts)
+
+def report_speedup(texts, model_name, worker_counts, token_budget=DEFAULT_TOKEN_BUDGET):
+    """Time the single-process path against each pool size and print the curve."""
+    print(f"=== Encode speedup on {len(texts)} entries ===")
+    start = time.perf_counter()
+    baseline = encode_texts(texts, model_name, token_budget=token_budget)
+    rows = [('single', time.perf_counter() - start, 0.0)]
+
+    for workers in worker_counts:
+        start = time.perf_counter()
+        result = encode_texts_parallel(texts, model_name, workers, token_budget=token_budget)
+        elapsed = time.perf_counter() - start
+        diff = float(np.abs(result - baseline).max()) if len(texts) else 0.0
+        rows.append((workers, elapsed, diff))
+
+    base_time = rows[0][1]
+    print(f"\n{'workers':>8} {'time (s)':>10} {'rows/s':>10} {'speedup':>8} {'max diff':>10}")
+    for workers, elapsed, diff in rows:
+        print(f"{workers:>8} {elapsed:>10.2f} {len(texts) / elapsed:>10.1f} "
+              f"{base_time / elapsed:>8.2f} {diff:>10.2e}")
+
+def report_batching(texts, model_name, token_budget=DEFAULT_TOKEN_BUDGET):
+    """Compare fixed batches of 32 against length-bucketed batches."""
+    print(f"=== Batching benchmark on {len(texts)} entries ===")
+    model = load_model(model_name)
+    lengths = token_lengths(model, texts)
+    real_tokens = int(lengths.sum())
+
+    # sentence-transformers sorts each call by character length before batching
+    by_chars = np.argsort([-len(t) for t in texts], kind='stable')
+    fixed_padded = sum(int(lengths[by_chars[i:i + 32]].max()) * len(by_chars[i:i + 32])
+                       for i in range(0, len(texts), 32))
+    bucketed = plan_token_batches(lengths, token_budget)
+    bucketed_padded = sum(int(lengths[b].max()) * len(b) for b in bucketed)
+
+    rows = []
+    results = {}
+    for name, budget, batches, padded in (('fixed 32', 0, -(-len(texts) // 32), fixed_padded),
+                                          (f'budget {token_budget}', token_budget, len(bucketed), bucketed_padded)):
+        start = time.perf_counter()
+        results[name] = encode_with_model(model, texts, budget)
+        rows.append((name, batches, padded, time.perf_counter() - start))
+
+    print(f"\nReal tokens: {real_tokens}")
+    print(f"{'batching':>14} {'batches':>8} {'padded':>10} {'waste':>7} {'time (s)':>9} {'tokens/s':>10}")
+    for name, batches, padded, elapsed in rows:
+        print(f"{name:>14} {batches:>8} {padded:>10} {1 - real_tokens / padded:>7.1%} "
+              f"{elapsed:>9.2f} {real_tokens / elapsed:>10.0f}")
+    a, b = results.values()
+    print(f"Max abs difference between outputs: {float(np.abs(a - b).max()) if len(texts) else 0.0:.2e}")
+
+def generate_embeddings(data, model_name='all-MiniLM-L6-v2', cache=None, workers=1,
+                        token_budget=DEFAULT_TOKEN_BUDGET):
+    """Generate embeddings for all Tafseer entries.
+
+    Returns a float32 matrix with one row per entry, in the order of `data`.
+    With a cache, only rows whose text is not cached yet are encoded.
+    """
+    texts = [entry['text'] for entry in data]
+    if cache is None:
+        return encode_texts(texts, model_name, workers, token_budget)
+
+    keys = [cache.key(text) for text in texts]
+    cached = cache.get_many(set(keys))
+    hits = sum(key in cached for key in keys)
+
+    # Encode each uncached text once, even if several rows share it
+    missing = []
+    queued = set()
+    for i, key in enumerate(keys):
+        if key not in cached and key not in queued:
+            queued.add(key)
+            missing.append(i)
+    print(f"Cache: {hits} hits, {len(missing)} texts to encode")
+
+    if missing:
+        fresh = encode_texts([texts[i] for i in missing], model_name, workers, token_budget)
+        new_keys = [keys[i] for i in missing]
+        cache.put_many(new_keys, fresh)
+        cached.update(zip(new_keys, fresh))
+
+    return np.stack([cached[key] for key in keys]).astype(np.float32, copy=False)
+
+def save_binary(data, embeddings, output_path):
+    """Save embeddings in the TAF1 binary format used by the app."""
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+
+    print(f"Saving binary embeddings to {output_path}")
+    write_taf1(
+        output_path,
+        [entry['id'] for entry in data],
+        [entry['surah'] for entry in data],
+        [entry['ayah'] for entry in data],
+        embeddings,
+    )
+
+    size_mb = os.path.getsize(output_path) / (1024 * 1024)
+    print(f"File saved successfully! Size: {size_mb:.2f} MB")
+
+def save_npy(embeddings, output_path):
+    """Save the raw embedding matrix as a .npy file."""
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    np.save(output_path, embeddings)
+    print(f"Saved raw matrix {embeddings.shape} to {output_path}")
+
+def save_embeddings(data, embeddings, output_path):
+    """Save embeddings to JSON file (debug output)."""
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
 
-def save_embeddings(data, output_path):
-    """Save embeddings to JSON file."""
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    
     print(f"Saving embeddings to {output_path}")
     with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False)
-    
+        json.dump(
+            [dict(entry, embedding=embeddings[i].tolist()) for i, entry in enumerate(data)],
+            f,
+            ensure_ascii=False,
+        )
+
     # Print file size
     size_mb = os.path.getsize(output_path) / (1024 * 1024)
     print(f"File saved successfully! Size: {size_mb:.2f} MB")
 
+# Streaming pipeline: reader -> prep threads -> encoder (main thread) -> writer.
+# At most queue_depth chunks are in flight between the reader and the writer,
+# including chunks the writer holds back to restore id order.
+PIPELINE_CHUNK = SHARD_SIZE
+PIPELINE_QUEUE_DEPTH = 4
+PIPELINE_PREP_THREADS = 2
+_DONE = object()
+_POLL = 0.1  # seconds between checks of the stop flag while blocked on a queue
+
+class StageStats:
+    """Rows handled and busy time of one pipeline stage."""
+
+    def __init__(self, name):
+        self.name = name
+        self.rows = 0
+        self.chunks = 0
+        self.busy = 0.0
+        self.peak_queue = None  # most chunks seen waiting in this stage's output queue
+        self.lock = threading.Lock()
+
+    def add(self, rows, seconds):
+        with self.lock:
+            self.rows += rows
+            self.chunks += 1
+            self.busy += seconds
+
+    def saw_queue(self, q):
+        self.peak_queue = max(self.peak_queue or 0, q.qsize())
+
+def _put(q, item, stop, stats=None):
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=_POLL)
+        except queue.Full:
+            continue
+        if stats is not None:
+            stats.saw_queue(q)
+        return True
+    return False
+
+def _get(q, stop):
+    while not stop.is_set():
+        try:
+            return q.get(timeout=_POLL)
+        except queue.Empty:
+            continue
+    return _DONE
+
+def iter_tafseer_rows(db_path, chunk_size=PIPELINE_CHUNK):
+    """Yield (id, surah, ayah, verse_key, text) rows from a cursor, chunk_size at a time."""
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.execute("SELECT id, surah, ayah, verse_key, text FROM tafseer ORDER BY id")
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield rows
+    finally:
+        conn.close()
+
+def prepare_rows(rows, model=None, cache=None, tokenizer_lock=None):
+    """Clean one chunk of rows the way load_tafseer_data does.
+
+    Returns a dict of parallel lists. With a model, the token ids are
+    computed here too (token_ids()), so the encoder stage only runs
+    inference. tokenizer_lock serializes calls into a tokenizer that is not
+    safe to share between threads.
+    """
+    chunk = {'id': [], 'surah': [], 'ayah': [], 'text': []}
+    for id_val, surah, ayah, verse_key, text in rows:
+        cleaned_text = clean_html(text).strip()
+        if len(cleaned_text) < 20:
+            continue
+        chunk['id'].append(id_val)
+        chunk['surah'].append(surah)
+        chunk['ayah'].append(ayah)
+        chunk['text'].append(cleaned_text)
+    chunk['key'] = [cache.key(text) for text in chunk['text']] if cache is not None else None
+    if model is not None and chunk['text']:
+        if tokenizer_lock is None:
+            chunk['ids'] = token_ids(model, chunk['text'])
+        else:
+            with tokenizer_lock:
+                chunk['ids'] = token_ids(model, chunk['text'])
+    return chunk
+
+def encode_chunk(model, chunk, cache=None, token_budget=DEFAULT_TOKEN_BUDGET):
+    """Embeddings for one prepared chunk, using and filling the cache.
+
+    Returns (embeddings, encoded) where encoded is the number of texts that
+    went through the model.
+    """
+    n = len(chunk['text'])
+    keys = chunk['key']
+    cached = cache.get_many(set(keys)) if cache is not None else {}
+    missing = []
+    queued = set()
+    for i in range(n):
+        key = keys[i] if keys is not None else i
+        if key not in cached and key not in queued:
+            queued.add(key)
+            missing.append(i)
+
+    fresh = None
+    if missing:
+        if 'ids' in chunk:
+            ids_list = [chunk['ids'][i] for i in missing]
+            lengths = np.array([len(ids) for ids in ids_list], dtype=np.int64)
+            batches = (plan_token_batches(lengths, token_budget) if token_budget
+                       else [list(range(s, min(s + 32, len(ids_list)))) for s in range(0, len(ids_list), 32)])
+            for batch in batches:
+                part = encode_token_ids(model, [ids_list[i] for i in batch])
+                if fresh is None:
+                    fresh = np.empty((len(ids_list), part.shape[1]), dtype=np.float32)
+                fresh[batch] = part
+        else:
+            fresh = encode_with_model(model, [chunk['text'][i] for i in missing], token_budget)
+    if cache is None:
+        return (fresh if fresh is not None else np.empty((0, 0), dtype=np.float32)), len(missing)
+
+    if missing:
+        new_keys = [keys[i] for i in missing]
+        cache.put_many(new_keys, fresh)
+        cached.update(zip(new_keys, fresh))
+    if not n:
+        return np.empty((0, 0), dtype=np.float32), 0
+    return np.stack([cached[key] for key in keys]).astype(np.float32, copy=False), len(missing)
+
+def run_pipeline(db_path, output_path, model_name='all-MiniLM-L6-v2', cache=None,
+                 token_budget=DEFAULT_TOKEN_BUDGET, chunk_size=PIPELINE_CHUNK,
+                 queue_depth=PIPELINE_QUEUE_DEPTH, prep_threads=PIPELINE_PREP_THREADS,
+                 npy_path=None):
+    """Stream the tafseer table into a TAF1 file (and optionally a .npy).
+
+    A reader thread pulls chunk_size rows at a time from a SQLite cursor,
+    prep threads clean and tokenize them, the calling thread encodes, and a writer thread appends records as chunks
+    arrive, restoring id order. Each file is written to <path>.part, its
+    entry count patched at the end, then moved into place.
+
+    The reader takes one of queue_depth slots before fetching a chunk and
+    the writer frees it once the chunk is written, so a slow prep thread
+    cannot let later chunks pile up in the writer's reorder buffer.
+
+    Returns the number of entries written.
+    """
+    print(f"Loading model: {model_name}")
+    model = load_model(model_name)
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+
+    stats = {name: StageStats(name) for name in ('read', 'prep', 'encode', 'write')}
+    raw_q = queue.Queue(maxsize=queue_depth)
+    prep_q = queue.Queue(maxsize=queue_depth)
+    out_q = queue.Queue(maxsize=queue_depth)
+    # Hugging Face fast tokenizers raise "Already borrowed" when a call that
+    # sets truncation runs on two threads at once; the ONNX encoder sets it once
+    tokenizer_lock = None if hasattr(model, 'encode_ids') else threading.Lock()
+    stop = threading.Event()
+    slots = threading.Semaphore(queue_depth)
+    peak_pending = [0]
+    errors = []
+
+    def stage(target):
+        def run():
+            try:
+                target()
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+        return threading.Thread(target=run, daemon=True)
+
+    def read():
+        seq = 0
+        rows = iter_tafseer_rows(db_path, chunk_size)
+        while True:
+            while not slots.acquire(timeout=_POLL):
+                if stop.is_set():
+                    return
+            start = time.perf_counter()
+            chunk = next(rows, None)
+            if chunk is None:
+                break
+            stats['read'].add(len(chunk), time.perf_counter() - start)
+            if not _put(raw_q, (seq, chunk), stop, stats['read']):
+                return
+            seq += 1
+        for _ in range(prep_threads):
+            _put(raw_q, _DONE, stop)
+
+    def prep():
+        while True:
+            item = _get(raw_q, stop)
+            if item is _DONE:
+                _put(prep_q, _DONE, stop)
+                return
+            seq, rows = item
+            start = time.perf_counter()
+            chunk = prepare_rows(rows, model, cache, tokenizer_lock)
+            stats['prep'].add(len(rows), time.perf_counter() - start)
+            if not _put(prep_q, (seq, chunk), stop, stats['prep']):
+                return
+
+    part_path = output_path + '.part'
+    npy_part = npy_path + '.part' if npy_path else None
+    written = [0]
+
+    def write():
+        pending = {}
+        next_seq = 0
+        dim = None
+        npy_header = None
+        with open(part_path, 'wb') as f, open(npy_part or os.devnull, 'wb') as npy:
+            while True:
+                item = _get(out_q, stop)
+                if item is _DONE:
+                    break
+                seq, chunk, embeddings = item
+                pending[seq] = (chunk, embeddings)
+                peak_pending[0] = max(peak_pending[0], len(pending))
+                while next_seq in pending:
+                    chunk, embeddings = pending.pop(next_seq)
+                    next_seq += 1
+                    if not len(chunk['id']):
+                        slots.release()
+                        continue
+                    start = time.perf_counter()
+                    if dim is None:
+                        dim = embeddings.shape[1]
+                        write_taf1_header(f, 0, dim)
+                        if npy_part:
+                            # Ids are Uint16, so the final count has at most as many digits
+                            npy_header = _write_npy_header(npy, MAX_ID, dim)
+                    f.write(pack_taf1_records(chunk['id'], chunk['surah'], chunk['ayah'],
+                                              embeddings).tobytes())
+                    if npy_part:
+                        npy.write(np.asarray(embeddings, dtype='<f4').tobytes())
+                    written[0] += len(chunk['id'])
+                    stats['write'].add(len(chunk['id']), time.perf_counter() - start)
+                    slots.release()
+            if stop.is_set():
+                return
+            if pending:
+                raise RuntimeError(f"pipeline lost chunk {next_seq}")
+            if dim is None:
+                write_taf1_header(f, 0, 0)
+            patch_taf1_count(f, written[0])
+            if npy_part:
+                size = _write_npy_header(npy, written[0], dim or 0)
+                if npy_header is not None and size != npy_header:
+                    raise RuntimeError(".npy header changed size")
+
+    threads = [stage(read)] + [stage(prep) for _ in range(prep_threads)] + [stage(write)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    try:
+        finished = 0
+        while finished < prep_threads:
+            item = _get(prep_q, stop)
+            if item is _DONE:
+                if stop.is_set():
+                    break
+                finished += 1
+                continue
+            seq, chunk = item
+            start = time.perf_counter()
+            embeddings, encoded = encode_chunk(model, chunk, cache, token_budget)
+            stats['encode'].add(encoded, time.perf_counter() - start)
+            if not _put(out_q, (seq, chunk, embeddings), stop, stats['encode']):
+                break
+            print(f"  Written {written[0]} entries", end='\r')
+        _put(out_q, _DONE, stop)
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        for thread in threads:
+            thread.join()
+        if stop.is_set():
+            for path in (part_path, npy_part):
+                if path and os.path.exists(path):
+                    os.remove(path)
+    print()
+    if errors:
+        raise errors[0]
+
+    os.replace(part_path, output_path)
+    if npy_path:
+        os.replace(npy_part, npy_path)
+        print(f"Saved raw matrix ({written[0]} rows) to {npy_path}")
+    elapsed = time.perf_counter() - started
+    size_mb = os.path.getsize(output_path) / (1024 * 1024)
+    print(f"File saved successfully! Size: {size_mb:.2f} MB")
+    report_pipeline(list(stats.values()), elapsed, written[0], peak_pending[0], queue_depth)
+    return written[0]
+
+def _write_npy_header(f, count, dim):
+    """(Re)write a .npy header for a (count, dim) float32 matrix at the start of f.
+
+    np.lib.format pads the header to a multiple of 64 bytes, so a placeholder
+    count can be patched once the stream ends. Returns the header size.
+    """
+    pos = f.tell()
+    f.seek(0)
+    np.lib.format.write_array_header_1_0(
+        f, {'descr': '<f4', 'fortran_order': False, 'shape': (count, dim)})
+    size = f.tell()
+    f.seek(max(pos, size))
+    return size
+
+def report_pipeline(stages, elapsed, entries, peak_pending=0, queue_depth=PIPELINE_QUEUE_DEPTH):
+    """Per-stage throughput; a stage busy close to 100% of the wall time is the bottleneck."""
+    print(f"\nPipeline: {entries} entries in {elapsed:.2f}s ({entries / elapsed:.1f} rows/s)")
+    print(f"{'stage':>8} {'rows':>8} {'chunks':>7} {'busy (s)':>9} {'rows/s':>10} {'busy %':>7} {'peak queue':>11}")
+    for s in stages:
+        rate = s.rows / s.busy if s.busy else 0.0
+        peak = '-' if s.peak_queue is None else s.peak_queue
+        print(f"{s.name:>8} {s.rows:>8} {s.chunks:>7} {s.busy:>9.2f} {rate:>10.1f} "
+              f"{s.busy / elapsed:>7.1%} {peak:>11}")
+    print(f"Reorder buffer peak: {peak_pending} chunks (in-flight limit {queue_depth})")
+
 def main():
+    parser = argparse.ArgumentParser(description="Generate Tafseer embeddings")
+    parser.add_argument('--db', default='assets/db/quran_tafsir.db')
+    parser.add_argument('--output', default='assets/embeddings/tafseer_embeddings.bin',
+                        help="TAF1 binary output")
+    parser.add_argument('--npy', help="also write the raw float32 matrix to this .npy path")
+    parser.add_argument('--json', help="also write the legacy JSON dump to this path (debug)")
+    parser.add_argument('--model', default='all-MiniLM-L6-v2')
+    parser.add_argument('--backend', choices=['torch', 'onnx'], default='torch',
+                        help="onnx runs without torch / sentence-transformers")
+    parser.add_argument('--onnx-model', help="ONNX graph for --backend onnx "
+                        "(default: sentence_encoder.onnx, else model.onnx)")
+    parser.add_argument('--cache', default='.embedding_cache/tafseer.sqlite',
+                        help="sidecar SQLite cache of previously encoded texts")
+    parser.add_argument('--no-cache', action='store_true', help="re-encode every row")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="encoder processes; >1 shards rows across a process pool")
+    parser.add_argument('--speedup-curve', metavar='N,N,...',
+                        help="only benchmark these worker counts against the single-process path")
+    parser.add_argument('--token-budget', type=int, default=DEFAULT_TOKEN_BUDGET,
+                        help="padded tokens per length-bucketed batch; 0 for fixed batches of 32")
+    parser.add_argument('--batching-benchmark', action='store_true',
+                        help="only compare fixed and length-bucketed batching")
+    parser.add_argument('--sample', type=int, default=1024,
+                        help="rows used by --speedup-curve and --batching-benchmark")
+    parser.add_argument('--no-pipeline', action='store_true',
+                        help="load, encode and write in sequence instead of streaming")
+    parser.add_argument('--chunk-size', type=int, default=PIPELINE_CHUNK,
+                        help="rows per pipeline chunk")
+    parser.add_argument('--queue-depth', type=int, default=PIPELINE_QUEUE_DEPTH,
+                        help="chunks in flight between the reader and the writer")
+    parser.add_argument('--prep-threads', type=int, default=PIPELINE_PREP_THREADS,
+                        help="threads cleaning and tokenizing rows ahead of the encoder")
+    args = parser.parse_args()
+
     # Paths
-    db_path = 'assets/db/quran_tafsir.db'
-    output_path = 'assets/embeddings/tafseer_embeddings.json'
-    
+    db_path = args.db
+    output_path = args.output
+
+    model_name = args.model
+    cache_model_id = args.model
+    if args.backend == 'onnx':
+        from onnx_encoder import default_model_path, onnx_model_id
+        onnx_path = args.onnx_model or default_model_path()
+        model_name = 'onnx:' + onnx_path
+        cache_model_id = onnx_model_id(onnx_path)
+
     print("=== Tafseer Embeddings Generator ===")
     print(f"Database: {db_path}")
-    print(f"Output: {output_path}\n")
-    
+    print(f"Output: {output_path}")
+    print(f"Encoder: {model_name}")
+    print(f"Cache: {'disabled' if args.no_cache else args.cache}\n")
+
+    # The streaming pipeline covers the default build; process pools and the
+    # JSON dump need every row in memory, as do the benchmarks
+    if not (args.no_pipeline or args.json or args.workers > 1
+            or args.speedup_curve or args.batching_benchmark):
+        print(f"Streaming {args.chunk_size}-row chunks through {args.prep_threads} prep threads "
+              f"(queue depth {args.queue_depth})...")
+        cache = None if args.no_cache else EmbeddingCache(args.cache, cache_model_id)
+        try:
+            entries = run_pipeline(db_path, output_path, model_name, cache, args.token_budget,
+                                   args.chunk_size, args.queue_depth, args.prep_threads,
+                                   args.npy)
+        finally:
+            if cache is not None:
+                cache.close()
+        print("\n=== Complete! ===")
+        print(f"Embeddings ready for use in Flutter app")
+        print(f"Total entries: {entries}")
+        return
+
     # Load data
     print("Step 1: Loading Tafseer data...")
     data = load_tafseer_data(db_path)
     print(f"Loaded {len(data)} valid Tafseer entries\n")
-    
+
+    if args.speedup_curve:
+        worker_counts = [int(n) for n in args.speedup_curve.split(',')]
+        report_speedup([entry['text'] for entry in data[:args.sample]], model_name,
+                       worker_counts, args.token_budget)
+        return
+    if args.batching_benchmark:
+        report_batching([entry['text'] for entry in data[:args.sample]], model_name,
+                        args.token_budget or DEFAULT_TOKEN_BUDGET)
+        return
+
     # Generate embeddings
     print("Step 2: Generating embeddings...")
     print("(This may take a few minutes on first run as the model is downloaded)")
-    data_with_embeddings = generate_embeddings(data)
+    cache = None if args.no_cache else EmbeddingCache(args.cache, cache_model_id)
+    try:
+        embeddings = generate_embeddings(data, model_name, cache, args.workers, args.token_budget)
+    finally:
+        if cache is not None:
+            cache.close()
     print("Embeddings generated successfully!\n")
-    
+
     # Save to file
-    print("Step 3: Saving to JSON file...")
-    save_embeddings(data_with_embeddings, output_path)
-    
+    print("Step 3: Saving binary file...")
+    save_binary(data, embeddings, output_path)
+    if args.npy:
+        save_npy(embeddings, args.npy)
+    if args.json:
+        save_embeddings(data, embeddings, args.json)
+
     print("\n=== Complete! ===")
     print(f"Embeddings ready for use in Flutter app")
-    print(f"Total entries: {len(data_with_embeddings)}")
+    print(f"Total entries: {len(data)}")
 
 if __name__ == '__main__':
     main()
@@ -31,10 +31,18 @@ class LightweightEmbedding {
 /// Binary file reader
 class EmbeddingLoader {
   static List<LightweightEmbedding> parseBinary(Uint8List bytes) {
-    final buffer = bytes.buffer;
+    // "TAF2" -> columnar layout, see embedding_format.py
+    if (bytes.length >= 4 &&
+        bytes[0] == 84 &&
+        bytes[1] == 65 &&
+        bytes[2] == 70 &&
+        bytes[3] == 50) {
+      return parseTaf2(bytes);
+    }
+
     var offset = 0;
 
-    final view = ByteData.view(buffer);
+    final view = ByteData.sublistView(bytes);
 
     // Read Header
     // "TAF1" -> 0x54414631
@@ -81,4 +89,47 @@ class EmbeddingLoader {
 
     return embeddings;
   }
+
+  /// Read a TAF2 file: typed metadata arrays, then a 64-byte aligned block
+  /// of L2-normalized Float32 vectors. Each embedding is a view into that
+  /// block, so no vector is copied or boxed.
+  static List<LightweightEmbedding> parseTaf2(Uint8List bytes) {
+    final header = ByteData.sublistView(bytes, 0, 64);
+    final count = header.getUint32(4, Endian.little);
+    final dim = header.getUint32(8, Endian.little);
+    final idsOffset = header.getUint32(16, Endian.little);
+    final ayahsOffset = header.getUint32(20, Endian.little);
+    final surahsOffset = header.getUint32(24, Endian.little);
+    final vectorsOffset = header.getUint32(28, Endian.little);
+
+    if (vectorsOffset + count * dim * 4 > bytes.length) {
+      throw Exception('Truncated TAF2 file');
+    }
+
+    print('Loading TAF2 embeddings: Count=$count, Dim=$dim');
+
+    // Float32List views need 4-byte alignment within the buffer (and use
+    // host byte order, little endian on every Flutter target); copy otherwise
+    final start = bytes.offsetInBytes + vectorsOffset;
+    final Float32List matrix;
+    if (start % 4 == 0) {
+      matrix = Float32List.view(bytes.buffer, start, count * dim);
+    } else {
+      matrix = Float32List(count * dim);
+      matrix.buffer.asUint8List().setAll(
+        0,
+        Uint8List.sublistView(bytes, vectorsOffset, vectorsOffset + count * dim * 4),
+      );
+    }
+
+    final meta = ByteData.sublistView(bytes);
+    return List<LightweightEmbedding>.generate(count, (i) {
+      return LightweightEmbedding(
+        id: meta.getUint16(idsOffset + 2 * i, Endian.little),
+        surah: meta.getUint8(surahsOffset + i),
+        ayah: meta.getUint16(ayahsOffset + 2 * i, Endian.little),
+        embedding: Float32List.sublistView(matrix, i * dim, (i + 1) * dim),
+      );
+    }, growable: false);
+  }
 }
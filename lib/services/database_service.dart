@@ -200,6 +200,15 @@ class DatabaseService {
     String translation = 'sahih',
     String pronunciation = 'latin_english',
   }) async {
+    final reading = await _getAyahsFromReadingTable(
+      surahNumber * 1000,
+      surahNumber * 1000 + 999,
+      arabicScript: arabicScript,
+      translation: translation,
+      pronunciation: pronunciation,
+    );
+    if (reading != null) return reading;
+
     final db = await quranDatabase;
 
     // Determine table names based on preferences
@@ -279,6 +288,62 @@ class DatabaseService {
     return ayahs;
   }
 
+  /// Ayahs with ids (sura * 1000 + aya) in [fromKey, toKey] from the
+  /// precomputed ayah_reading table (build_reading_table.py): one range read
+  /// instead of a query per table. Returns null if the table is missing.
+  Future<List<Map<String, dynamic>>?> _getAyahsFromReadingTable(
+    int fromKey,
+    int toKey, {
+    required String arabicScript,
+    required String translation,
+    required String pronunciation,
+  }) async {
+    // Same column choices as app_queries.reading_sql()
+    final arabicColumn = arabicScript == 'indopak' ? 'indopak' : 'utsmani';
+    final translationColumn = translation == 'sahih' ? 'sahih' : 'jalalayn';
+    final pronunciationColumn =
+        pronunciation == 'latin' || pronunciation == 'latin_english'
+        ? pronunciation
+        : null;
+
+    try {
+      final db = await quranDatabase;
+      final rows = await db.rawQuery(
+        'SELECT sura, aya, $arabicColumn AS text, $translationColumn AS translation'
+        '${pronunciationColumn != null ? ', $pronunciationColumn AS pronunciation' : ''} '
+        'FROM ayah_reading WHERE id BETWEEN ? AND ? ORDER BY id',
+        [fromKey, toKey],
+      );
+      final headers = {
+        for (final row in await db.rawQuery(
+          'SELECT sura, name, ayahs FROM surah_reading '
+          'WHERE sura BETWEEN ? / 1000 AND ? / 1000',
+          [fromKey, toKey],
+        ))
+          row['sura'] as int: row,
+      };
+
+      return [
+        for (final row in rows)
+          {
+            'number': row['sura'],
+            'text': row['text'],
+            'numberInSurah': row['aya'],
+            'surahNumber': row['sura'],
+            'surahName': headers[row['sura']]?['name'] ?? 'Surah ${row['sura']}',
+            'numberOfAyahs': headers[row['sura']]?['ayahs'] ?? 0,
+            'totalVerses': headers[row['sura']]?['ayahs'] ?? 0,
+            'translation': row['translation'],
+            if (pronunciationColumn != null)
+              'pronunciation': row['pronunciation'],
+          },
+      ];
+    } catch (e) {
+      print('ayah_reading unavailable, using per-table queries: $e');
+      return null;
+    }
+  }
+
   /// Get word-by-word translation for a specific ayah from 'allwords' table
   Future<List<Map<String, dynamic>>> getWordByWordForAyah(
     int surah,
@@ -487,6 +552,15 @@ class DatabaseService {
     final endSurah = boundary['endSurah'] as int;
     final endAyah = boundary['endAyah'] as int;
 
+    final reading = await _getAyahsFromReadingTable(
+      startSurah * 1000 + startAyah,
+      endSurah * 1000 + endAyah,
+      arabicScript: arabicScript,
+      translation: translation,
+      pronunciation: pronunciation,
+    );
+    if (reading != null) return reading;
+
     List<Map<String, dynamic>> allAyahs = [];
 
     // Fetch all surahs in this juz
@@ -677,8 +751,79 @@ class DatabaseService {
     }
   }
 
-  /// Search Tafseer text using SQL LIKE (fallback for keyword search)
+  /// Get precomputed related Tafseer entries (build_related_tafseer.py)
+  /// Returns an empty list if the table has not been built into the DB
+  Future<List<Map<String, dynamic>>> getRelatedTafseer(
+    int id, {
+    int limit = 10,
+  }) async {
+    try {
+      final db = await tafseerDatabase;
+      return await db.rawQuery(
+        '''
+        SELECT t.id, t.surah, t.ayah, t.verse_key, t.text, r.score
+        FROM tafseer_related r
+        JOIN tafseer t ON t.id = r.related_id
+        WHERE r.id = ?
+        ORDER BY r.rank
+        LIMIT ?
+        ''',
+        [id, limit],
+      );
+    } catch (e) {
+      print('Error fetching related tafseer: $e');
+      return [];
+    }
+  }
+
+  // Harakat, Quranic marks, tatweel and transliteration apostrophes,
+  // removed as in build_fts_index.py (arabic_text.py 'search' profile)
+  static final RegExp _ftsStrip = RegExp(
+    "[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u08D3-\u08E1\u08F0-\u08F2\u0640\u02BF\u02BE'\u2019\u2018`]",
+  );
+  static final RegExp _ftsAlef = RegExp('[\u0622\u0623\u0625\u0671\u0672\u0673]');
+
+  /// FTS5 MATCH expression for a keyword query: every term required, the
+  /// last one as a prefix. Mirrors fts_query() in build_fts_index.py.
+  static String? _ftsQuery(String query) {
+    final normalized = query
+        .replaceAll(_ftsStrip, '')
+        .replaceAll(_ftsAlef, '\u0627')
+        .replaceAll('\u0624', '\u0648')
+        .replaceAll('\u0626', '\u064A')
+        .replaceAll('\u0649', '\u064A')
+        .replaceAll('\u06CC', '\u064A')
+        .replaceAll('\u0629', '\u0647')
+        .replaceAll('"', ' ');
+    final terms = normalized.split(RegExp(r'\s+')).where((t) => t.isNotEmpty);
+    if (terms.isEmpty) return null;
+    return '${terms.map((t) => '"$t"').join(' ')}*';
+  }
+
+  /// Search Tafseer text by keyword, ranked by bm25 through the tafseer_fts
+  /// index (build_fts_index.py). Falls back to an unranked LIKE scan when the
+  /// index is missing or this platform's SQLite has no FTS5.
   Future<List<Map<String, dynamic>>> searchTafseerKeywords(String query) async {
+    final match = _ftsQuery(query);
+    if (match != null) {
+      try {
+        final db = await tafseerDatabase;
+        return await db.rawQuery(
+          '''
+          SELECT t.id, t.surah, t.ayah, t.verse_key, t.text
+          FROM tafseer_fts f
+          JOIN tafseer t ON t.id = f.rowid
+          WHERE tafseer_fts MATCH ?
+          ORDER BY f.rank
+          LIMIT 50
+          ''',
+          [match],
+        );
+      } catch (e) {
+        print('FTS search unavailable, using LIKE: $e');
+      }
+    }
+
     try {
       final db = await tafseerDatabase;
       final results = await db.query(
@@ -31,7 +31,10 @@ class SemanticSearchService {
       final byteData = await rootBundle.load(
         'assets/embeddings/tafseer_embeddings.bin',
       );
-      final bytes = byteData.buffer.asUint8List();
+      final bytes = byteData.buffer.asUint8List(
+        byteData.offsetInBytes,
+        byteData.lengthInBytes,
+      );
 
       _embeddings = EmbeddingLoader.parseBinary(bytes);
       _isLoaded = true;
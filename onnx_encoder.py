@@ -0,0 +1,155 @@
+"""
+Torch-free sentence encoder for the Python build scripts.
+
+Runs an exported all-MiniLM-L6-v2 graph with ONNX Runtime and tokenizes with
+the shipped assets/models/tokenizer.json, so neither torch nor
+sentence-transformers has to be installed or imported.
+
+Tokenization uses the `tokenizers` package when it is installed and falls
+back to the pure Python wordpiece_tokenizer.py otherwise (same token ids).
+
+Works with both graphs the repo produces:
+- assets/models/sentence_encoder.onnx (export_model_to_onnx.py): already
+  mean-pooled and normalized
+- assets/models/model.onnx (download_onnx_model.py): token embeddings,
+  pooled here with the same attention-masked mean as SentenceEncoderONNX
+Output vectors are always L2-normalized float32.
+"""
+
+import hashlib
+import os
+import numpy as np
+
+from wordpiece_tokenizer import WordPieceTokenizer
+
+DEFAULT_TOKENIZER = 'assets/models/tokenizer.json'
+DEFAULT_MAX_LENGTH = 256  # max_seq_length of all-MiniLM-L6-v2 in sentence-transformers
+
+
+def default_model_path():
+    """Prefer the fp32 export; fall back to the downloaded model."""
+    for path in ('assets/models/sentence_encoder.onnx', 'assets/models/model.onnx'):
+        if os.path.exists(path):
+            return path
+    return 'assets/models/sentence_encoder.onnx'
+
+
+def onnx_model_id(model_path):
+    """Identity of an ONNX graph (file name + content hash), for embedding caches."""
+    h = hashlib.sha256()
+    with open(model_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return f"onnx:{os.path.basename(model_path)}:{h.hexdigest()[:16]}"
+
+
+def mean_pooling(token_embeddings, attention_mask):
+    """Mean Pooling - Take attention mask into account for correct averaging"""
+    mask = attention_mask[:, :, None].astype(np.float32)
+    summed = (token_embeddings * mask).sum(axis=1)
+    return summed / np.clip(mask.sum(axis=1), 1e-9, None)
+
+
+def l2_normalize(x):
+    return x / np.clip(np.linalg.norm(x, axis=1, keepdims=True), 1e-12, None)
+
+
+class OnnxSentenceEncoder:
+    """Batched sentence encoder on ONNX Runtime.
+
+    Mirrors the parts of SentenceTransformer the build scripts use:
+    encode(texts, batch_size, show_progress_bar) and max_seq_length.
+    """
+
+    def __init__(self, model_path=None, tokenizer_path=DEFAULT_TOKENIZER,
+                 max_length=DEFAULT_MAX_LENGTH, intra_op_threads=None, inter_op_threads=None):
+        import onnxruntime as ort
+
+        self.model_path = model_path or default_model_path()
+
+        try:
+            from tokenizers import Tokenizer
+            self.tokenizer = Tokenizer.from_file(tokenizer_path)
+            self.tokenizer.no_padding()
+        except ImportError:
+            self.tokenizer = WordPieceTokenizer(tokenizer_path, max_length)
+        self.max_seq_length = max_length
+        self.pad_id = self.tokenizer.token_to_id('[PAD]') or 0
+
+        options = ort.SessionOptions()
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        if inter_op_threads:
+            options.inter_op_num_threads = inter_op_threads
+        self.session = ort.InferenceSession(self.model_path, options,
+                                            providers=['CPUExecutionProvider'])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    @property
+    def max_seq_length(self):
+        return self._max_seq_length
+
+    @max_seq_length.setter
+    def max_seq_length(self, max_length):
+        """Change the truncation length, as with SentenceTransformer.max_seq_length."""
+        self._max_seq_length = max_length
+        if isinstance(self.tokenizer, WordPieceTokenizer):
+            self.tokenizer.max_length = max_length
+        else:
+            self.tokenizer.enable_truncation(max_length)
+
+    @property
+    def model_id(self):
+        return onnx_model_id(self.model_path)
+
+    def token_ids(self, texts):
+        """Token ids of each text, with special tokens and truncation."""
+        if isinstance(self.tokenizer, WordPieceTokenizer):
+            return self.tokenizer.token_ids(texts)
+        return [enc.ids for enc in self.tokenizer.encode_batch(list(texts))]
+
+    def token_lengths(self, texts):
+        return np.array([len(ids) for ids in self.token_ids(texts)], dtype=np.int64)
+
+    def _run(self, ids_list):
+        longest = max(len(ids) for ids in ids_list)
+        input_ids = np.full((len(ids_list), longest), self.pad_id, dtype=np.int64)
+        attention_mask = np.zeros((len(ids_list), longest), dtype=np.int64)
+        for row, ids in enumerate(ids_list):
+            input_ids[row, :len(ids)] = ids
+            attention_mask[row, :len(ids)] = 1
+
+        feeds = {'input_ids': input_ids, 'attention_mask': attention_mask}
+        if 'token_type_ids' in self.input_names:
+            feeds['token_type_ids'] = np.zeros_like(input_ids)
+        output = self.session.run(None, feeds)[0]
+
+        if output.ndim == 3:
+            output = mean_pooling(output, attention_mask)
+        return l2_normalize(output.astype(np.float32))
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False, **kwargs):
+        """Encode texts into normalized float32 embeddings, in input order."""
+        texts = list(texts)
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        return self.encode_ids(self.token_ids(texts), batch_size, show_progress_bar)
+
+    def encode_ids(self, ids_list, batch_size=32, show_progress_bar=False):
+        """encode() for texts already tokenized with token_ids()."""
+        if not ids_list:
+            return np.empty((0, 0), dtype=np.float32)
+        # Batch rows of similar length together, as sentence-transformers does
+        order = np.argsort([-len(ids) for ids in ids_list], kind='stable')
+        embeddings = None
+        for start in range(0, len(ids_list), batch_size):
+            batch = order[start:start + batch_size]
+            part = self._run([ids_list[i] for i in batch])
+            if embeddings is None:
+                embeddings = np.empty((len(ids_list), part.shape[1]), dtype=np.float32)
+            embeddings[batch] = part
+            if show_progress_bar:
+                print(f"  Encoded {min(start + batch_size, len(ids_list))}/{len(ids_list)}", end='\r')
+        if show_progress_bar:
+            print()
+        return embeddings
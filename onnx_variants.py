@@ -0,0 +1,230 @@
+"""
+Build, benchmark and select ONNX variants of the sentence encoder.
+Input: an fp32 graph (assets/models/sentence_encoder.onnx from export_model_to_onnx.py)
+Output: build/onnx/ with the variants and manifest.json
+
+Variants:
+- fp32: the exported graph as-is
+- optimized: ONNX Runtime offline graph optimization (constant folding,
+  node fusions) saved to disk, so the app does not redo it at load time
+- int8: dynamic quantization of the weights (QInt8), activations stay float
+Extra graphs (e.g. the third-party model.onnx from download_onnx_model.py)
+can be measured against the same bar with --extra.
+
+Every variant encodes the same queries one at a time, as the app does, and
+is compared with the fp32 output by cosine similarity. The manifest names
+the fastest variant (p50 latency) whose minimum similarity meets
+--min-similarity; --install copies it to the path the app loads.
+
+Usage:
+    python onnx_variants.py --model assets/models/sentence_encoder.onnx
+    python onnx_variants.py --extra assets/models/model.onnx --install
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+import numpy as np
+
+from bench_utils import latency_summary, format_latency
+from onnx_encoder import OnnxSentenceEncoder, DEFAULT_TOKENIZER
+
+DEFAULT_MIN_SIMILARITY = 0.98
+APP_MODEL_PATH = 'assets/models/model.onnx'
+
+# Fallback benchmark queries when query_embeddings.bin is not available
+SAMPLE_QUERIES = [
+    "patience",
+    "patience in hardship",
+    "forgiveness of sins",
+    "what does the Quran say about charity to the poor",
+    "the story of Musa and Pharaoh",
+    "how should we treat our parents when they grow old",
+    "reward for those who believe and do righteous deeds",
+    "signs of Allah in the creation of the heavens and the earth",
+    "the day of judgement and accountability for every soul",
+    "verses about seeking knowledge, reflection and understanding the signs",
+]
+
+
+def sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def load_benchmark_queries(path='assets/embeddings/query_embeddings.bin'):
+    """Real app queries if the precomputed table exists, else SAMPLE_QUERIES."""
+    if path and os.path.exists(path):
+        from query_embedding_table import QueryEmbeddingTable
+        return QueryEmbeddingTable(path).queries
+    return list(SAMPLE_QUERIES)
+
+
+def optimize_model(src, dst):
+    """Save the graph after ONNX Runtime's extended CPU optimizations."""
+    import onnxruntime as ort
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+    options.optimized_model_filepath = dst
+    ort.InferenceSession(src, options, providers=['CPUExecutionProvider'])
+    return dst
+
+
+def quantize_model(src, dst):
+    """Dynamic int8 quantization of the weights, after shape inference and
+    the basic graph cleanup ONNX Runtime recommends before quantizing."""
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+    prepared = dst + '.pre.onnx'
+    try:
+        quant_pre_process(src, prepared, skip_symbolic_shape=True)
+        quantize_dynamic(prepared, dst, weight_type=QuantType.QInt8)
+    finally:
+        if os.path.exists(prepared):
+            os.remove(prepared)
+    return dst
+
+
+def build_variants(model_path, output_dir='build/onnx'):
+    """Write the fp32, optimized and int8 graphs; returns {name: path}."""
+    os.makedirs(output_dir, exist_ok=True)
+    variants = {'fp32': os.path.join(output_dir, 'model_fp32.onnx')}
+    shutil.copyfile(model_path, variants['fp32'])
+
+    print("Optimizing graph...")
+    variants['optimized'] = optimize_model(variants['fp32'], os.path.join(output_dir, 'model_optimized.onnx'))
+    print("Quantizing to int8...")
+    variants['int8'] = quantize_model(variants['fp32'], os.path.join(output_dir, 'model_int8.onnx'))
+    return variants
+
+
+def benchmark_variant(path, queries, tokenizer_path=DEFAULT_TOKENIZER, warmup=5, repeats=3):
+    """Encode each query on its own; returns (embeddings, latency summary, load ms)."""
+    start = time.perf_counter()
+    encoder = OnnxSentenceEncoder(path, tokenizer_path)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    for query in queries[:warmup]:
+        encoder.encode([query])
+
+    latencies = []
+    embeddings = None
+    for _ in range(repeats):
+        rows = []
+        for query in queries:
+            t0 = time.perf_counter()
+            rows.append(encoder.encode([query])[0])
+            latencies.append((time.perf_counter() - t0) * 1000)
+        embeddings = np.vstack(rows)
+    return embeddings, latency_summary(latencies), load_ms
+
+
+def select_variant(results, min_similarity=DEFAULT_MIN_SIMILARITY):
+    """Name of the fastest variant that meets the similarity bar, or None."""
+    passing = [name for name, r in results.items() if r['min_similarity'] >= min_similarity]
+    if not passing:
+        return None
+    return min(passing, key=lambda name: results[name]['latency']['p50_ms'])
+
+
+def evaluate_variants(variants, queries, tokenizer_path=DEFAULT_TOKENIZER,
+                      min_similarity=DEFAULT_MIN_SIMILARITY, reference='fp32'):
+    """Benchmark every variant against the reference; returns the manifest dict."""
+    import onnxruntime as ort
+
+    encoder = OnnxSentenceEncoder(variants[reference], tokenizer_path)
+    lengths = encoder.token_lengths(queries)
+    print(f"\nBenchmark queries: {len(queries)} (tokens p50 {int(np.median(lengths))}, "
+          f"p95 {int(np.percentile(lengths, 95))}, max {int(lengths.max())})")
+
+    results = {}
+    reference_embeddings = None
+    for name in [reference] + [n for n in variants if n != reference]:
+        path = variants[name]
+        embeddings, latency, load_ms = benchmark_variant(path, queries, tokenizer_path)
+        if reference_embeddings is None:
+            reference_embeddings = embeddings
+        similarity = (embeddings * reference_embeddings).sum(axis=1)
+        results[name] = {
+            'path': path,
+            'size_bytes': os.path.getsize(path),
+            'sha256': sha256_file(path),
+            'load_ms': load_ms,
+            'latency': latency,
+            'min_similarity': float(similarity.min()),
+            'mean_similarity': float(similarity.mean()),
+        }
+
+    print(f"\n{'variant':<12} {'size MB':>8} {'load ms':>8} {'min sim':>8}  latency (batch 1)")
+    for name, r in results.items():
+        print(f"{name:<12} {r['size_bytes'] / (1024 * 1024):>8.2f} {r['load_ms']:>8.0f} "
+              f"{r['min_similarity']:>8.4f}  {format_latency(r['latency'])}")
+
+    selected = select_variant(results, min_similarity)
+    return {
+        'onnxruntime_version': ort.__version__,
+        'reference': reference,
+        'min_similarity': min_similarity,
+        'query_count': len(queries),
+        'selected': selected,
+        'variants': results,
+    }
+
+
+def run(model_path=None, output_dir='build/onnx', extra=(), tokenizer_path=DEFAULT_TOKENIZER,
+        min_similarity=DEFAULT_MIN_SIMILARITY, install=None,
+        queries_path='assets/embeddings/query_embeddings.bin'):
+    model_path = model_path or 'assets/models/sentence_encoder.onnx'
+    print(f"=== Building ONNX variants of {model_path} ===\n")
+    if not os.path.exists(model_path):
+        print(f"Error: {model_path} not found! Run export_model_to_onnx.py first.")
+        return None
+
+    variants = build_variants(model_path, output_dir)
+    for path in extra:
+        variants[os.path.basename(path)] = path
+
+    manifest = evaluate_variants(variants, load_benchmark_queries(queries_path), tokenizer_path, min_similarity)
+    manifest_path = os.path.join(output_dir, 'manifest.json')
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    print(f"\nManifest written to {manifest_path}")
+
+    selected = manifest['selected']
+    if selected is None:
+        print(f"⚠️ No variant reached min similarity {min_similarity}")
+        raise SystemExit(1)
+    print(f"Selected: {selected} ({manifest['variants'][selected]['path']})")
+
+    if install:
+        shutil.copyfile(manifest['variants'][selected]['path'], install)
+        print(f"Installed {selected} to {install}")
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and select optimized / int8 ONNX encoder variants")
+    parser.add_argument('--model', help="fp32 ONNX graph (default: assets/models/sentence_encoder.onnx)")
+    parser.add_argument('--output-dir', default='build/onnx')
+    parser.add_argument('--extra', action='append', default=[],
+                        help="another ONNX graph to benchmark (repeatable)")
+    parser.add_argument('--tokenizer', default=DEFAULT_TOKENIZER)
+    parser.add_argument('--queries', default='assets/embeddings/query_embeddings.bin',
+                        help="QEM1 query table to benchmark with")
+    parser.add_argument('--min-similarity', type=float, default=DEFAULT_MIN_SIMILARITY,
+                        help="minimum cosine similarity to fp32 over all queries")
+    parser.add_argument('--install', nargs='?', const=APP_MODEL_PATH,
+                        help=f"copy the selected variant here (default {APP_MODEL_PATH})")
+    args = parser.parse_args()
+    run(args.model, args.output_dir, args.extra, args.tokenizer, args.min_similarity,
+        args.install, args.queries)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,372 @@
+"""
+Build optimized copies of the shipped SQLite assets (Quran.db,
+quran_tafsir.db) for the query shapes DatabaseService actually runs
+(app_queries.py).
+
+For every table in TABLE_SPECS:
+- the key is the column list the app filters and orders by
+- if the key is unique and non-null and rows are small (at most
+  MAX_ROW_FRACTION of a page), the table is rebuilt WITHOUT ROWID with the
+  key as its primary key, so a surah's rows are stored together in key
+  order and a key lookup needs one b-tree search instead of index + rowid
+- otherwise the key (plus any 'cover' columns) becomes an index
+- the old primary key (e.g. id) is kept as a UNIQUE index, which also
+  serves the FTS join (build_fts_index.py joins on id)
+- extra 'indexes' are added, e.g. (sura) alone so the per-surah COUNT(*)
+  reads a small index instead of the verse text
+
+Then ANALYZE (the stats ship with the database), page size, VACUUM.
+With --page-size auto every candidate size is built and the fastest
+workload wins; near-ties (within 5%) go to the smaller file.
+
+Every output is checked against its source: identical row counts and an
+order-independent checksum per table, and identical results for every app
+query. The report has file size and per-query p50 latency before and after,
+plus the query plan. Sources are only read; outputs go to build/db/ unless
+--install copies them over the assets.
+
+Usage:
+    python optimize_asset_db.py [--quran-db assets/db/Quran.db] [--tafseer-db assets/db/quran_tafsir.db]
+    python optimize_asset_db.py --page-size 8192 --install
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import time
+
+from app_queries import APP_QUERIES, VERSE_TABLES, bind, sample_params, time_query
+from bench_utils import latency_summary
+from check_word_alignment import read_only_uri
+
+TABLE_SPECS = {
+    **{table: {'key': ('sura', 'aya')} for table in VERSE_TABLES},
+    'al_quran_indopak_quran': {'key': ('sura', 'aya'), 'indexes': [('sura',)]},
+    'allwords': {'key': ('sura', 'ayah', 'word'), 'cover': ('en', 'en_trans')},
+    'corpus': {'key': ('surah', 'ayah', 'word'), 'cover': ('ar1', 'ar2', 'ar3', 'ar4', 'ar5')},
+    'sura_search_sura_search': {'key': ('no',)},
+    'chapter_information': {'key': ('chapter_no',)},
+    'juz_information': {'key': ('juz_no',)},
+    'tafseer': {'key': ('surah', 'ayah')},
+}
+
+PAGE_SIZES = [4096, 8192, 16384]
+# SQLite's guidance for WITHOUT ROWID: rows under about 1/20 of a page
+MAX_ROW_FRACTION = 1 / 20
+# Page sizes whose workloads are this close count as a tie (timer noise)
+TIE_FRACTION = 0.05
+TIE_MS = 0.1
+
+
+def quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def column_list(columns):
+    return ', '.join(quote(c) for c in columns)
+
+
+def table_columns(conn, table):
+    """[(name, declared type, notnull, pk position)] from PRAGMA table_info."""
+    return [(name, ctype, notnull, pk) for _, name, ctype, notnull, _, pk
+            in conn.execute(f"PRAGMA table_info({quote(table)})")]
+
+
+def is_without_rowid(conn, table):
+    sql = conn.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name=?", (table,)).fetchone()[0]
+    return 'WITHOUT ROWID' in sql.upper()
+
+
+def key_is_unique(conn, table, key):
+    cols = column_list(key)
+    not_null = ' AND '.join(f'{quote(c)} IS NOT NULL' for c in key)
+    total, valid = conn.execute(
+        f"SELECT COUNT(*), SUM({not_null}) FROM {quote(table)}").fetchone()
+    if total == 0 or valid != total:
+        return False
+    distinct = conn.execute(f"SELECT COUNT(*) FROM (SELECT DISTINCT {cols} FROM {quote(table)})").fetchone()[0]
+    return distinct == total
+
+
+def average_row_bytes(conn, table, columns):
+    lengths = ' + '.join(f'COALESCE(length(CAST({quote(c)} AS BLOB)), 1)' for c in columns)
+    return conn.execute(f"SELECT AVG({lengths}) FROM {quote(table)}").fetchone()[0] or 0
+
+
+def index_name(table, columns, unique=False):
+    return f"{'ux' if unique else 'idx'}_{table}_{'_'.join(columns)}"
+
+
+def rebuild_without_rowid(conn, table, columns, key):
+    """Recreate table as WITHOUT ROWID keyed on key, keeping its other indexes."""
+    indexes = [sql for (sql,) in conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type='index' AND tbl_name=? AND sql IS NOT NULL", (table,))]
+    definitions = [f"{quote(name)} {ctype}".rstrip() + (' NOT NULL' if notnull else '')
+                   for name, ctype, notnull, _ in columns]
+    names = column_list(name for name, *_ in columns)
+    staging = f"{table}__optimized"
+    conn.execute(f"DROP TABLE IF EXISTS {quote(staging)}")
+    conn.execute(f"CREATE TABLE {quote(staging)} ({', '.join(definitions)}, "
+                 f"PRIMARY KEY ({column_list(key)})) WITHOUT ROWID")
+    conn.execute(f"INSERT INTO {quote(staging)} ({names}) "
+                 f"SELECT {names} FROM {quote(table)} ORDER BY {column_list(key)}")
+    conn.execute(f"DROP TABLE {quote(table)}")
+    conn.execute(f"ALTER TABLE {quote(staging)} RENAME TO {quote(table)}")
+    for sql in indexes:
+        conn.execute(sql)
+
+
+def optimize_table(conn, table, spec, page_size):
+    """Apply spec to one table; returns a description of what was done."""
+    columns = table_columns(conn, table)
+    names = [name for name, *_ in columns]
+    key = [c for c in spec['key'] if c in names]
+    if len(key) != len(spec['key']):
+        return f"key {spec['key']} not found, skipped"
+
+    actions = []
+    old_pk = [name for name, _, _, pk in sorted(columns, key=lambda c: c[3]) if pk]
+    if is_without_rowid(conn, table):
+        actions.append("already WITHOUT ROWID")
+    else:
+        row_bytes = average_row_bytes(conn, table, names)
+        if key_is_unique(conn, table, key) and row_bytes <= page_size * MAX_ROW_FRACTION:
+            rebuild_without_rowid(conn, table, columns, key)
+            actions.append(f"WITHOUT ROWID on ({', '.join(key)}), {row_bytes:.0f} B/row")
+            if old_pk and old_pk != key:
+                conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {quote(index_name(table, old_pk, True))} "
+                             f"ON {quote(table)} ({column_list(old_pk)})")
+                actions.append(f"unique ({', '.join(old_pk)})")
+        else:
+            cover = [c for c in spec.get('cover', ()) if c in names]
+            indexed = key + cover
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {quote(index_name(table, key))} "
+                         f"ON {quote(table)} ({column_list(indexed)})")
+            actions.append(f"index ({', '.join(indexed)}), {row_bytes:.0f} B/row")
+
+    for extra in spec.get('indexes', []):
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {quote(index_name(table, extra))} "
+                     f"ON {quote(table)} ({column_list(extra)})")
+        actions.append(f"index ({', '.join(extra)})")
+    return '; '.join(actions)
+
+
+def open_read_only(path):
+    return sqlite3.connect(read_only_uri(path), uri=True)
+
+
+def database_size(path):
+    return os.path.getsize(path)
+
+
+def build_optimized(source, output, page_size):
+    """Copy source to output and optimize it for page_size. Returns {table: action}."""
+    if os.path.exists(output):
+        os.remove(output)
+    src = open_read_only(source)
+    dst = sqlite3.connect(output)
+    try:
+        src.backup(dst)
+    finally:
+        src.close()
+
+    actions = {}
+    try:
+        tables = {row[0] for row in dst.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+        with dst:
+            for table, spec in TABLE_SPECS.items():
+                if table in tables:
+                    actions[table] = optimize_table(dst, table, spec, page_size)
+        dst.execute("ANALYZE")
+        dst.execute("PRAGMA journal_mode=DELETE")
+        dst.execute(f"PRAGMA page_size={int(page_size)}")
+        dst.execute("VACUUM")
+    finally:
+        dst.close()
+    return actions
+
+
+def table_checksums(conn):
+    """{table: (rows, checksum)} for every ordinary table; the checksum ignores row order."""
+    tables = [name for name, sql in conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'")
+        if not sql.upper().startswith('CREATE VIRTUAL')]
+    sums = {}
+    for table in tables:
+        names = column_list(name for name, *_ in table_columns(conn, table))
+        rows, total = 0, 0
+        for row in conn.execute(f"SELECT {names} FROM {quote(table)}"):
+            digest = hashlib.blake2b(repr(row).encode('utf-8'), digest_size=8).digest()
+            total = (total + int.from_bytes(digest, 'little')) % (1 << 64)
+            rows += 1
+        sums[table] = (rows, total)
+    return sums
+
+
+def check_results(before, after, queries, params):
+    """Names of app queries whose results differ between the two connections."""
+    different = []
+    for query in queries:
+        for args in params[query['params']]:
+            sql, args = bind(query, args)
+            try:
+                old = sorted(before.execute(sql, args).fetchall(), key=repr)
+            except sqlite3.OperationalError:
+                break
+            new = sorted(after.execute(sql, args).fetchall(), key=repr)
+            if old != new:
+                different.append(query['name'])
+                break
+    return different
+
+
+def query_plan(conn, query, params):
+    sql, args = bind(query, params)
+    return '; '.join(row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", args))
+
+
+def run_workload(conn, queries, params, repeats):
+    """{query name: latency summary} for the queries conn can run."""
+    results = {}
+    for query in queries:
+        samples = time_query(conn, query, params[query['params']], repeats)
+        if samples:
+            results[query['name']] = latency_summary(samples)
+    return results
+
+
+def workload_ms(latencies):
+    return sum(summary['p50_ms'] for summary in latencies.values())
+
+
+def optimize_database(db, source, output_dir, page_sizes, repeats, samples):
+    """Build, pick a page size, verify and measure one database. Returns a report dict."""
+    queries = [q for q in APP_QUERIES if q['db'] == db]
+    name = os.path.basename(source)
+    output = os.path.join(output_dir, name)
+    print(f"\n{name} ({database_size(source) / (1024 * 1024):.2f} MB)")
+
+    before = open_read_only(source)
+    params = sample_params({db: before}, samples)
+    before_latency = run_workload(before, queries, params, repeats)
+
+    candidates = []
+    for page_size in page_sizes:
+        path = output if len(page_sizes) == 1 else f"{output}.{page_size}"
+        start = time.perf_counter()
+        actions = build_optimized(source, path, page_size)
+        built = time.perf_counter() - start
+        conn = open_read_only(path)
+        try:
+            latency = run_workload(conn, queries, params, repeats)
+        finally:
+            conn.close()
+        candidates.append({'page_size': page_size, 'path': path, 'actions': actions, 'latency': latency,
+                           'size': database_size(path)})
+        print(f"  page size {page_size:>5}: {database_size(path) / (1024 * 1024):.2f} MB, "
+              f"workload {workload_ms(latency):.2f} ms (built in {built:.1f} s)")
+
+    fastest = min(workload_ms(c['latency']) for c in candidates)
+    ties = [c for c in candidates if workload_ms(c['latency']) <= fastest * (1 + TIE_FRACTION) + TIE_MS]
+    chosen = min(ties, key=lambda c: c['size'])
+    for candidate in candidates:
+        if candidate is not chosen:
+            os.remove(candidate['path'])
+    if chosen['path'] != output:
+        os.replace(chosen['path'], output)
+    if len(page_sizes) > 1:
+        print(f"  chose page size {chosen['page_size']}")
+
+    print("\n  Tables:")
+    for table, action in chosen['actions'].items():
+        print(f"    {table:<28} {action}")
+
+    after = open_read_only(output)
+    try:
+        source_sums = table_checksums(before)
+        output_sums = table_checksums(after)
+        data_diffs = [t for t in source_sums if output_sums.get(t) != source_sums[t]]
+        result_diffs = check_results(before, after, queries, params)
+
+        print(f"\n  {'query':<44} {'before p50':>11} {'after p50':>11} {'speedup':>8}")
+        report_queries = []
+        for query in queries:
+            old, new = before_latency.get(query['name']), chosen['latency'].get(query['name'])
+            if not old or not new:
+                continue
+            plan = query_plan(after, query, params[query['params']][0])
+            speedup = old['p50_ms'] / new['p50_ms'] if new['p50_ms'] else float('nan')
+            print(f"  {query['name'][:44]:<44} {old['p50_ms']:>9.3f}ms {new['p50_ms']:>9.3f}ms {speedup:>7.1f}x")
+            print(f"      {plan}")
+            report_queries.append({'name': query['name'], 'before': old, 'after': new, 'plan': plan})
+    finally:
+        before.close()
+        after.close()
+
+    size_before, size_after = database_size(source), database_size(output)
+    print(f"\n  size {size_before / (1024 * 1024):.2f} MB -> {size_after / (1024 * 1024):.2f} MB, "
+          f"workload {workload_ms(before_latency):.2f} ms -> {workload_ms(chosen['latency']):.2f} ms")
+    if data_diffs:
+        print(f"  ❌ table contents differ: {', '.join(data_diffs)}")
+    if result_diffs:
+        print(f"  ❌ query results differ: {', '.join(result_diffs)}")
+    if not data_diffs and not result_diffs:
+        print(f"  ✅ {len(source_sums)} tables and {len(report_queries)} queries match the source")
+
+    return {
+        'source': source,
+        'output': output,
+        'page_size': chosen['page_size'],
+        'size_before': size_before,
+        'size_after': size_after,
+        'tables': chosen['actions'],
+        'queries': report_queries,
+        'data_diffs': data_diffs,
+        'result_diffs': result_diffs,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write optimized copies of the asset databases")
+    parser.add_argument('--quran-db', default='assets/db/Quran.db')
+    parser.add_argument('--tafseer-db', default='assets/db/quran_tafsir.db')
+    parser.add_argument('--output-dir', default='build/db')
+    parser.add_argument('--page-size', default='auto', help="bytes, or 'auto' to try " +
+                        ', '.join(map(str, PAGE_SIZES)))
+    parser.add_argument('--repeats', type=int, default=5, help="runs of each sampled query")
+    parser.add_argument('--samples', type=int, default=30, help="parameter sets per query")
+    parser.add_argument('--report', default='build/db/optimize_report.json')
+    parser.add_argument('--install', action='store_true', help="copy verified outputs over the sources")
+    args = parser.parse_args()
+
+    page_sizes = PAGE_SIZES if args.page_size == 'auto' else [int(args.page_size)]
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    print("=== Optimizing asset databases ===")
+    reports = []
+    for db, source in (('quran', args.quran_db), ('tafseer', args.tafseer_db)):
+        if not os.path.exists(source):
+            print(f"\nSkipping {source}: not found")
+            continue
+        reports.append(optimize_database(db, source, args.output_dir, page_sizes, args.repeats, args.samples))
+
+    if args.report and reports:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, ensure_ascii=False, indent=2)
+        print(f"\nReport written to {args.report}")
+
+    failed = [r for r in reports if r['data_diffs'] or r['result_diffs']]
+    if failed:
+        print("\n❌ Outputs do not match their sources; nothing installed")
+        raise SystemExit(1)
+    if args.install:
+        for report in reports:
+            shutil.copyfile(report['output'], report['source'])
+            print(f"Installed {report['output']} -> {report['source']}")
+
+
+if __name__ == '__main__':
+    main()
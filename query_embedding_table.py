@@ -0,0 +1,147 @@
+"""
+Binary table of precomputed query embeddings with O(1) lookup by query text.
+
+Queries are normalized (NFKC, case-folded, whitespace collapsed) before they
+are stored or looked up, so "Piety" and " piety " share one entry.
+
+Binary Format (little endian):
+- Header (32 bytes):
+  - Magic: "QEM1" (4 bytes)
+  - Count: Uint32
+  - Dim: Uint32
+  - DType: Uint32 (0 = Float32, 1 = Float16)
+  - Slots: Uint32 (hash table size, a power of two)
+  - Strings size: Uint32 (bytes of UTF-8 text)
+  - Reserved: 2 * Uint32 (0)
+- Hash table: Slots * Uint32, entry index + 1 (0 = empty), FNV-1a 32-bit
+  hash of the normalized UTF-8 query, linear probing
+- String offsets: (Count + 1) * Uint32 into the string blob
+- String blob: Strings size bytes, padded with zeros to a multiple of 16
+- Matrix: Count * Dim values of DType, row i belongs to query i
+"""
+
+import struct
+import unicodedata
+import numpy as np
+
+QEM_MAGIC = b'QEM1'
+QEM_HEADER = struct.Struct('<4s7I')
+DTYPES = {'f32': (0, '<f4'), 'f16': (1, '<f2')}
+
+
+def normalize_query(query):
+    """Canonical form used for storage and lookup."""
+    return ' '.join(unicodedata.normalize('NFKC', query).casefold().split())
+
+
+def fnv1a_32(data):
+    h = 0x811C9DC5
+    for byte in data:
+        h = ((h ^ byte) * 0x01000193) & 0xFFFFFFFF
+    return h
+
+
+def dedupe_queries(queries, embeddings=None):
+    """Normalize queries and drop repeats, keeping the first occurrence.
+
+    Returns (queries, embeddings or None, dropped).
+    """
+    seen = {}
+    dropped = []
+    for i, query in enumerate(queries):
+        key = normalize_query(query)
+        if not key:
+            continue
+        if key in seen:
+            dropped.append(query)
+        else:
+            seen[key] = i
+    keep = list(seen.values())
+    if embeddings is not None:
+        embeddings = np.asarray(embeddings)[keep]
+    return list(seen.keys()), embeddings, dropped
+
+
+def write_table(path, queries, embeddings, dtype='f16'):
+    """Write normalized, unique queries and their embeddings."""
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    keys = [normalize_query(q) for q in queries]
+    if len(set(keys)) != len(keys):
+        raise ValueError("queries must be unique after normalization (use dedupe_queries)")
+
+    encoded = [k.encode('utf-8') for k in keys]
+    offsets = np.zeros(len(encoded) + 1, dtype='<u4')
+    offsets[1:] = np.cumsum([len(b) for b in encoded])
+    blob = b''.join(encoded)
+    blob += b'\0' * (-len(blob) % 16)
+
+    slots = 1
+    while slots < 2 * max(len(keys), 1):
+        slots *= 2
+    table = np.zeros(slots, dtype='<u4')
+    for i, data in enumerate(encoded):
+        slot = fnv1a_32(data) & (slots - 1)
+        while table[slot]:
+            slot = (slot + 1) & (slots - 1)
+        table[slot] = i + 1
+
+    code, np_dtype = DTYPES[dtype]
+    with open(path, 'wb') as f:
+        f.write(QEM_HEADER.pack(QEM_MAGIC, len(keys), embeddings.shape[1], code,
+                                slots, int(offsets[-1]), 0, 0))
+        f.write(table.tobytes())
+        f.write(offsets.tobytes())
+        f.write(blob)
+        f.write(embeddings.astype(np_dtype).tobytes())
+
+
+class QueryEmbeddingTable:
+    """Reader for QEM1 files; lookups hash the query and probe the table."""
+
+    def __init__(self, path):
+        data = np.memmap(path, dtype=np.uint8, mode='r')
+        magic, count, dim, code, slots, strings_size, _, _ = QEM_HEADER.unpack(bytes(data[:QEM_HEADER.size]))
+        if magic != QEM_MAGIC:
+            raise ValueError(f"Invalid magic bytes: {magic!r}")
+        np_dtype = {c: d for c, d in DTYPES.values()}[code]
+
+        pos = QEM_HEADER.size
+        self.table = np.frombuffer(data, dtype='<u4', count=slots, offset=pos)
+        pos += 4 * slots
+        self.offsets = np.frombuffer(data, dtype='<u4', count=count + 1, offset=pos)
+        pos += 4 * (count + 1)
+        self.blob = data[pos:pos + strings_size]
+        pos += strings_size + (-strings_size % 16)
+        self.matrix = np.frombuffer(data, dtype=np_dtype, count=count * dim, offset=pos).reshape(count, dim)
+        self.mask = slots - 1
+
+    def __len__(self):
+        return len(self.matrix)
+
+    def query(self, i):
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]]).decode('utf-8')
+
+    @property
+    def queries(self):
+        return [self.query(i) for i in range(len(self))]
+
+    def index_of(self, query):
+        """Row of a query, or -1 if it is not in the table."""
+        data = normalize_query(query).encode('utf-8')
+        slot = fnv1a_32(data) & self.mask
+        while True:
+            entry = int(self.table[slot])
+            if entry == 0:
+                return -1
+            start, end = self.offsets[entry - 1], self.offsets[entry]
+            if end - start == len(data) and bytes(self.blob[start:end]) == data:
+                return entry - 1
+            slot = (slot + 1) & self.mask
+
+    def get(self, query):
+        """Float32 embedding of a query, or None if it is not precomputed."""
+        i = self.index_of(query)
+        return None if i < 0 else self.matrix[i].astype(np.float32)
+
+    def __contains__(self, query):
+        return self.index_of(query) >= 0
@@ -0,0 +1,273 @@
+"""
+Pure Python WordPiece tokenizer for assets/models/tokenizer.json.
+
+Reproduces the HuggingFace BertNormalizer + BertPreTokenizer + WordPiece
+pipeline the encoder was trained with, so the build scripts do not need the
+`tokenizers` package (see check_tokenizer_parity.py for the parity check).
+
+- Normalization runs as str.translate passes whose tables fill themselves
+  per character on first sight, so Unicode category lookups happen once per
+  distinct character rather than once per character of input.
+- The vocabulary is stored as two character tries (word-initial pieces and
+  "##" continuations); the longest piece at a position is found in one walk
+  instead of probing every substring.
+- Words and whole texts are cached in LRU caches, so repeated queries and
+  common words skip the WordPiece step.
+- encode_batch writes straight into preallocated int64 arrays.
+"""
+
+import json
+import re
+import unicodedata
+from functools import lru_cache
+import numpy as np
+
+DEFAULT_TOKENIZER = 'assets/models/tokenizer.json'
+
+# Unicode White_Space characters (char::is_whitespace in the Rust tokenizer)
+WHITESPACE = set('\t\n\x0b\x0c\r \x85\xa0\u1680\u2028\u2029\u202f\u205f\u3000') | \
+    {chr(c) for c in range(0x2000, 0x200B)}
+
+CJK_RANGES = (
+    (0x4E00, 0x9FFF), (0x3400, 0x4DBF), (0x20000, 0x2A6DF), (0x2A700, 0x2B73F),
+    (0x2B740, 0x2B81F), (0x2B820, 0x2CEAF), (0xF900, 0xFAFF), (0x2F800, 0x2FA1F),
+)
+
+# The Rust tokenizer classifies characters with older Unicode tables than
+# Python's unicodedata. These ranges are where the two disagree (characters
+# added or recategorized in newer Unicode versions); they are handled the way
+# the tokenizer does: 'word' = ordinary letter, 'punct' = split off, 'drop' = removed.
+LEGACY_UNICODE_RANGES = {
+    'word': (
+        (0x061D, 0x061D), (0x07FD, 0x07FD), (0x0890, 0x0891), (0x0898, 0x089F),
+        (0x08CA, 0x08E2), (0x09FD, 0x09FE), (0x0A76, 0x0A76), (0x0AFA, 0x0AFF),
+        (0x0B55, 0x0B55), (0x0C04, 0x0C04), (0x0C3C, 0x0C3C), (0x0C77, 0x0C77),
+        (0x0C84, 0x0C84), (0x0D00, 0x0D00), (0x0D3B, 0x0D3C), (0x0D81, 0x0D81),
+        (0x0EBA, 0x0EBA), (0x180F, 0x180F), (0x1885, 0x1886), (0x1ABF, 0x1ACE),
+        (0x1B7D, 0x1B7E), (0x1DF6, 0x1DFB), (0x2E43, 0x2E4F), (0x2E52, 0x2E5D),
+        (0xA82C, 0xA82C), (0xA8C5, 0xA8C5), (0xA8FF, 0xA8FF), (0xA9BD, 0xA9BD),
+        (0x10D24, 0x10D27), (0x10EAB, 0x10EAD), (0x10F46, 0x10F50), (0x10F55, 0x10F59),
+        (0x10F82, 0x10F89), (0x11070, 0x11070), (0x11073, 0x11074), (0x110C2, 0x110C2),
+        (0x110CD, 0x110CD), (0x111CF, 0x111CF), (0x1123E, 0x1123E), (0x1133B, 0x1133B),
+        (0x11438, 0x1143F), (0x11442, 0x11444), (0x11446, 0x11446), (0x1144B, 0x1144F),
+        (0x1145A, 0x1145B), (0x1145D, 0x1145E), (0x11660, 0x1166C), (0x116B9, 0x116B9),
+        (0x1182F, 0x11837), (0x11839, 0x1183B), (0x1193B, 0x1193C), (0x1193E, 0x1193E),
+        (0x11943, 0x11946), (0x119D4, 0x119D7), (0x119DA, 0x119DB), (0x119E0, 0x119E0),
+        (0x119E2, 0x119E2), (0x11A01, 0x11A0A), (0x11A33, 0x11A38), (0x11A3B, 0x11A47),
+        (0x11A51, 0x11A56), (0x11A59, 0x11A5B), (0x11A8A, 0x11A96), (0x11A98, 0x11A9C),
+        (0x11A9E, 0x11AA2), (0x11C30, 0x11C36), (0x11C38, 0x11C3D), (0x11C3F, 0x11C3F),
+        (0x11C41, 0x11C45), (0x11C70, 0x11C71), (0x11C92, 0x11CA7), (0x11CAA, 0x11CB0),
+        (0x11CB2, 0x11CB3), (0x11CB5, 0x11CB6), (0x11D31, 0x11D36), (0x11D3A, 0x11D3A),
+        (0x11D3C, 0x11D3D), (0x11D3F, 0x11D45), (0x11D47, 0x11D47), (0x11D90, 0x11D91),
+        (0x11D95, 0x11D95), (0x11D97, 0x11D97), (0x11EF3, 0x11EF4), (0x11EF7, 0x11EF8),
+        (0x11FFF, 0x11FFF), (0x12FF1, 0x12FF2), (0x13430, 0x13438), (0x16E97, 0x16E9A),
+        (0x16F4F, 0x16F4F), (0x16FE2, 0x16FE2), (0x16FE4, 0x16FE4), (0x1CF00, 0x1CF2D),
+        (0x1CF30, 0x1CF46), (0x1E000, 0x1E006), (0x1E008, 0x1E018), (0x1E01B, 0x1E021),
+        (0x1E023, 0x1E024), (0x1E026, 0x1E02A), (0x1E130, 0x1E136), (0x1E2AE, 0x1E2AE),
+        (0x1E2EC, 0x1E2EF), (0x1E944, 0x1E94A), (0x1E95E, 0x1E95F), (0x2B820, 0x2B91F),
+    ),
+    'punct': (
+        (0x166D, 0x166D), (0x111C9, 0x111C9),
+    ),
+    'drop': (
+        (0x1734, 0x1734),
+    ),
+}
+LEGACY_UNICODE = {cp: kind for kind, ranges in LEGACY_UNICODE_RANGES.items()
+                  for lo, hi in ranges for cp in range(lo, hi + 1)}
+
+
+def is_punctuation(ch):
+    """BERT punctuation: all non-alphanumeric printable ASCII plus Unicode P*."""
+    cp = ord(ch)
+    if 33 <= cp <= 47 or 58 <= cp <= 64 or 91 <= cp <= 96 or 123 <= cp <= 126:
+        return True
+    return unicodedata.category(ch).startswith('P')
+
+
+def is_cjk(cp):
+    return any(lo <= cp <= hi for lo, hi in CJK_RANGES)
+
+
+class _CleanTable(dict):
+    """clean_text + handle_chinese_chars, one character at a time."""
+
+    def __missing__(self, cp):
+        ch = chr(cp)
+        kind = LEGACY_UNICODE.get(cp)
+        if kind:
+            value = None if kind == 'drop' else ch
+        elif ch in '\t\n\r':
+            value = ' '
+        elif cp == 0 or cp == 0xFFFD or unicodedata.category(ch) in ('Cc', 'Cf', 'Co', 'Cs'):
+            value = None
+        elif ch in WHITESPACE:
+            value = ' '
+        elif is_cjk(cp):
+            value = f' {ch} '
+        else:
+            value = ch
+        self[cp] = value
+        return value
+
+
+class _SplitTable(dict):
+    """Accent stripping, per-character lowercasing and punctuation isolation."""
+
+    def __init__(self, lowercase, strip_accents):
+        super().__init__()
+        self.lowercase = lowercase
+        self.strip_accents = strip_accents
+
+    def __missing__(self, cp):
+        ch = chr(cp)
+        kind = LEGACY_UNICODE.get(cp)
+        if kind == 'drop':
+            value = None
+        elif kind == 'word':
+            value = ch.lower() if self.lowercase else ch
+        elif kind == 'punct':
+            value = f' {ch} '
+        elif self.strip_accents and unicodedata.category(ch) == 'Mn':
+            value = None
+        elif is_punctuation(ch):
+            value = f' {ch} '
+        elif self.lowercase:
+            value = ch.lower()
+        else:
+            value = ch
+        self[cp] = value
+        return value
+
+
+def build_trie(pieces):
+    """Character trie of {piece: id}; a node's '' key holds the id ending there."""
+    root = {}
+    for piece, token_id in pieces.items():
+        node = root
+        for ch in piece:
+            node = node.setdefault(ch, {})
+        node[''] = token_id
+    return root
+
+
+class WordPieceTokenizer:
+    """BERT WordPiece tokenizer read from a HuggingFace tokenizer.json."""
+
+    def __init__(self, path=DEFAULT_TOKENIZER, max_length=256, cache_size=65536):
+        with open(path, encoding='utf-8') as f:
+            config = json.load(f)
+
+        model = config['model']
+        if model.get('type') != 'WordPiece':
+            raise ValueError(f"Unsupported tokenizer model: {model.get('type')}")
+        self.vocab = dict(model['vocab'])
+        for token in config.get('added_tokens', []):
+            self.vocab[token['content']] = token['id']
+        self.prefix = model.get('continuing_subword_prefix', '##')
+        self.max_input_chars = model.get('max_input_chars_per_word', 100)
+        self.unk_id = self.vocab[model.get('unk_token', '[UNK]')]
+        self.cls_id = self.vocab['[CLS]']
+        self.sep_id = self.vocab['[SEP]']
+        self.pad_id = self.vocab.get('[PAD]', 0)
+        self.max_length = max_length
+
+        normalizer = config.get('normalizer') or {}
+        self.lowercase = normalizer.get('lowercase', True)
+        strip_accents = normalizer.get('strip_accents')
+        # BertNormalizer strips accents whenever it lowercases, unless told otherwise
+        self.strip_accents = self.lowercase if strip_accents is None else strip_accents
+        self.clean_table = _CleanTable()
+        self.split_table = _SplitTable(self.lowercase, self.strip_accents)
+
+        specials = [t['content'] for t in config.get('added_tokens', []) if t.get('special')]
+        self.special_re = re.compile('(' + '|'.join(map(re.escape, specials)) + ')') if specials else None
+
+        self.initial_trie = build_trie({p: i for p, i in model['vocab'].items()
+                                        if not p.startswith(self.prefix)})
+        self.continuation_trie = build_trie({p[len(self.prefix):]: i for p, i in model['vocab'].items()
+                                             if p.startswith(self.prefix)})
+
+        self.word_ids = lru_cache(maxsize=cache_size)(self._word_ids)
+        self.text_ids = lru_cache(maxsize=cache_size)(self._text_ids)
+
+    def token_to_id(self, token):
+        return self.vocab.get(token)
+
+    def normalize(self, text):
+        """BertNormalizer: clean text, space CJK, strip accents, lowercase."""
+        text = text.translate(self.clean_table)
+        if self.strip_accents and not text.isascii():
+            text = unicodedata.normalize('NFD', text)
+        return text
+
+    def pre_tokenize(self, text):
+        """BertPreTokenizer on normalized text: whitespace split, punctuation isolated."""
+        return text.translate(self.split_table).split()
+
+    def _longest(self, word, start, trie):
+        """(end, id) of the longest vocabulary piece starting at word[start]."""
+        node = trie
+        best = None
+        for pos in range(start, len(word)):
+            node = node.get(word[pos])
+            if node is None:
+                break
+            if '' in node:
+                best = (pos + 1, node[''])
+        return best
+
+    def _word_ids(self, word):
+        if len(word) > self.max_input_chars:
+            return (self.unk_id,)
+        ids = []
+        start = 0
+        trie = self.initial_trie
+        while start < len(word):
+            match = self._longest(word, start, trie)
+            if match is None:
+                return (self.unk_id,)
+            start, token_id = match
+            ids.append(token_id)
+            trie = self.continuation_trie
+        return tuple(ids)
+
+    def _text_ids(self, text):
+        """Token ids of one text, without special tokens or truncation."""
+        ids = []
+        parts = self.special_re.split(text) if self.special_re and '[' in text else [text]
+        for i, part in enumerate(parts):
+            if i % 2:
+                ids.append(self.vocab[part])
+                continue
+            for word in self.pre_tokenize(self.normalize(part)):
+                ids.extend(self.word_ids(word))
+        return tuple(ids)
+
+    def encode(self, text, max_length=None):
+        """[CLS] + ids + [SEP], truncated to max_length."""
+        max_length = max_length or self.max_length
+        ids = self.text_ids(text)[:max_length - 2]
+        return [self.cls_id, *ids, self.sep_id]
+
+    def token_ids(self, texts, max_length=None):
+        return [self.encode(text, max_length) for text in texts]
+
+    def token_lengths(self, texts, max_length=None):
+        max_length = max_length or self.max_length
+        return np.array([min(len(self.text_ids(t)) + 2, max_length) for t in texts], dtype=np.int64)
+
+    def encode_batch(self, texts, max_length=None, pad_to=None):
+        """Encode into preallocated (input_ids, attention_mask) int64 arrays.
+
+        Rows are padded to the longest text, or to pad_to when given.
+        """
+        encoded = self.token_ids(texts, max_length)
+        width = pad_to or max((len(ids) for ids in encoded), default=0)
+        input_ids = np.full((len(encoded), width), self.pad_id, dtype=np.int64)
+        attention_mask = np.zeros((len(encoded), width), dtype=np.int64)
+        for row, ids in enumerate(encoded):
+            ids = ids[:width]
+            input_ids[row, :len(ids)] = ids
+            attention_mask[row, :len(ids)] = 1
+        return input_ids, attention_mask